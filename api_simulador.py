@@ -0,0 +1,393 @@
+"""
+API HTTP local (JSON) do simulador, sem dependências além do próprio motor.
+
+Rotas:
+    POST /simular   um participante (objeto JSON) ou uma lista de até
+                    MAX_PARTICIPANTES_POR_REQUISICAO participantes
+    GET  /metricas  latência p50/p99 das simulações, requisições e lotes
+    GET  /saude     {"status": "ok"}
+
+Campos de cada participante:
+    salario_mensal, parcela_b_pct, voluntaria_pct, contribuicoes_no_ano e,
+    opcionalmente, esporadica (0 = sem esporádica), ano (regras do plano;
+    padrão: o mais recente) e matricula (devolvida como veio)
+    Os valores seguem as faixas dos campos da página (FAIXAS): Parcela B de
+    4,5% a 10% em passos de 0,5, voluntária de 0% a 10% em passos de 1, até
+    13 contribuições no ano, salário não negativo e esporádica zero ou a
+    partir do mínimo do plano.
+
+As requisições que chegam ao mesmo tempo são agrupadas e calculadas em uma
+única chamada vetorizada do motor, em vez de uma chamada por requisição. O
+cálculo roda fora do laço de eventos, que segue atendendo as conexões.
+
+Uso:
+    python api_simulador.py --porta 8765
+    curl -X POST localhost:8765/simular -d '{"salario_mensal": 10000, "parcela_b_pct": 10,
+        "voluntaria_pct": 0, "contribuicoes_no_ano": 13}'
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from motor import (
+    PARCELA_B_MAXIMA, PARCELA_B_MINIMA, PASSO_PARCELA_B, PASSO_VOLUNTARIA, VOLUNTARIA_MAXIMA, calcular_simulacao,
+)
+from parametros import ErroParametros, parametros_do_ano
+
+MAX_PARTICIPANTES_POR_REQUISICAO = 10_000
+MAX_LINHAS_POR_LOTE = 50_000  # Limite de participantes em um único cálculo agrupado
+JANELA_LOTE = 0.0  # Segundos que o agrupador espera por outras requisições
+MAX_CORPO = 16 * 1024 * 1024
+AMOSTRAS_LATENCIA = 10_000  # Latências mais recentes usadas no p50/p99
+
+CAMPOS_OBRIGATORIOS = ["salario_mensal", "parcela_b_pct", "voluntaria_pct", "contribuicoes_no_ano"]
+# Faixa de cada campo, a mesma dos campos da página: (mínimo, máximo ou None, passo ou None)
+FAIXAS = {
+    "salario_mensal": (0.0, None, None),
+    "parcela_b_pct": (PARCELA_B_MINIMA, PARCELA_B_MAXIMA, PASSO_PARCELA_B),
+    "voluntaria_pct": (0.0, VOLUNTARIA_MAXIMA, PASSO_VOLUNTARIA),
+    "contribuicoes_no_ano": (0, 13, 1),  # 12 meses e o 13º
+}
+
+# Colunas do motor devolvidas para cada participante
+CAMPOS_SAIDA = [
+    "salario_anual",
+    "valor_basica",  # Parcela A
+    "valor_outro",  # Parcela B
+    "contribuicao_voluntaria_valor",
+    "contribuicao_mensal_total",
+    "total_contribuicao_anual",
+    "percentual_recolhido",
+    "valor_minimo_esporadica",
+    "valor_maximo_esporadica",
+    "valor_ideal_esporadica",
+    "valor_esporadica",
+    "total_final",
+    "novo_percentual",
+    "economia_irpf",
+    "economia_marginal_irpf",  # Economia no IRPF por real a mais de esporádica
+]
+
+STATUS_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErroRequisicao(ValueError):
+    """Requisição inválida; `status` é o código HTTP da resposta"""
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _numero(participante, campo, indice, padrao=None):
+    valor = participante.get(campo, padrao)
+    if valor is None:
+        raise ErroRequisicao(f"Participante {indice}: campo obrigatório ausente: {campo}")
+    try:
+        numero = not isinstance(valor, bool) and isinstance(valor, (int, float)) and math.isfinite(valor)
+    except OverflowError:  # Inteiro grande demais para um float (como 1 seguido de 400 zeros)
+        numero = False
+    if not numero:
+        raise ErroRequisicao(f"Participante {indice}: {campo} deve ser um número: {valor!r}")
+    return valor
+
+
+def _inteiro(participante, campo, indice, padrao=None):
+    valor = _numero(participante, campo, indice, padrao)
+    if not float(valor).is_integer():
+        raise ErroRequisicao(f"Participante {indice}: {campo} deve ser um número inteiro: {valor!r}")
+    return int(valor)
+
+
+def _na_faixa(valor, campo, indice):
+    minimo, maximo, passo = FAIXAS[campo]
+    if valor < minimo or (maximo is not None and valor > maximo):
+        faixa = f"de {minimo:g} a {maximo:g}" if maximo is not None else f"a partir de {minimo:g}"
+        raise ErroRequisicao(f"Participante {indice}: {campo} deve estar {faixa}: {valor!r}")
+    if passo is not None and not ((valor - minimo) / passo).is_integer():
+        raise ErroRequisicao(f"Participante {indice}: {campo} deve variar em passos de {passo:g}: {valor!r}")
+    return valor
+
+
+def ler_participantes(corpo):
+    """
+    JSON da requisição -> (entradas por ano, matrículas, veio_lista).
+
+    `entradas` é {ano: (índices, salario, parcela_b, voluntaria, quantidade, esporadica)}
+    com arrays NumPy, para que cada ano seja calculado com os próprios parâmetros.
+    """
+    try:
+        dados = json.loads(corpo)
+    except ValueError as erro:  # JSON mal formado, UTF-8 inválido ou inteiro com dígitos demais
+        raise ErroRequisicao(f"JSON inválido: {erro}") from None
+
+    veio_lista = isinstance(dados, list)
+    participantes = dados if veio_lista else [dados]
+    if not participantes:
+        raise ErroRequisicao("Nenhum participante informado")
+    if len(participantes) > MAX_PARTICIPANTES_POR_REQUISICAO:
+        raise ErroRequisicao(
+            f"No máximo {MAX_PARTICIPANTES_POR_REQUISICAO} participantes por requisição", status=413
+        )
+
+    por_ano = {}
+    matriculas = []
+    for indice, participante in enumerate(participantes):
+        if not isinstance(participante, dict):
+            raise ErroRequisicao(f"Participante {indice}: esperado um objeto JSON")
+        linha = [_na_faixa((_inteiro if campo == "contribuicoes_no_ano" else _numero)(participante, campo, indice),
+                           campo, indice)
+                 for campo in CAMPOS_OBRIGATORIOS]
+        esporadica = _numero(participante, "esporadica", indice, padrao=0.0)
+        ano = participante.get("ano")
+        try:
+            parametros = parametros_do_ano(None if ano is None else _inteiro(participante, "ano", indice))
+        except ErroParametros as erro:
+            raise ErroRequisicao(f"Participante {indice}: {erro}") from None
+        minimo_esporadica = round(parametros.valor_minimo_esporadica, 2)  # O mínimo do slider da página
+        if esporadica != 0 and not esporadica >= minimo_esporadica:
+            raise ErroRequisicao(f"Participante {indice}: esporadica deve ser 0 (sem esporádica) ou a partir de "
+                                 f"{minimo_esporadica:g}: {esporadica!r}")
+        por_ano.setdefault(parametros.ano, []).append((indice, *linha, esporadica))
+        matriculas.append(participante.get("matricula"))
+
+    entradas = {}
+    for ano, linhas in por_ano.items():
+        colunas = list(zip(*linhas))
+        entradas[ano] = (
+            np.array(colunas[0], dtype=np.int64),
+            *(np.array(coluna, dtype=np.float64) for coluna in colunas[1:]),
+        )
+    return entradas, matriculas, veio_lista
+
+
+class Agrupador:
+    """
+    Junta as requisições que chegam dentro de JANELA_LOTE em um único cálculo.
+
+    Cada requisição entrega seus arrays e espera um future; a tarefa `executar`
+    concatena os arrays do mesmo ano, chama o motor uma vez e devolve a cada
+    requisição a sua fatia do resultado.
+    """
+
+    def __init__(self, janela=JANELA_LOTE, max_linhas=MAX_LINHAS_POR_LOTE):
+        self.janela = janela
+        self.max_linhas = max_linhas
+        self._fila = asyncio.Queue()
+        self.lotes = 0
+        self.linhas = 0
+
+    async def simular(self, ano, entradas):
+        """Resultado do motor ({coluna: array}) para as entradas de um ano"""
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((ano, entradas, futuro))
+        return await futuro
+
+    async def executar(self):
+        while True:
+            pendentes = [await self._fila.get()]
+            linhas = len(pendentes[0][1][0])
+            if linhas < self.max_linhas:
+                # Sem janela, só cede a vez uma rodada: o lote é o que já chegou enquanto
+                # o cálculo anterior rodava
+                await asyncio.sleep(self.janela)
+            while linhas < self.max_linhas and not self._fila.empty():
+                item = self._fila.get_nowait()
+                pendentes.append(item)
+                linhas += len(item[1][0])
+            # O motor roda em outra thread, para não parar o laço de eventos (leitura e
+            # resposta das demais conexões); os futures são resolvidos de volta no laço
+            resolvidos = await asyncio.get_running_loop().run_in_executor(None, self._calcular, pendentes)
+            for futuro, resultado, erro in resolvidos:
+                if futuro.done():  # A requisição pode ter sido cancelada (cliente desconectou)
+                    continue
+                if erro is not None:
+                    futuro.set_exception(erro)
+                else:
+                    futuro.set_result(resultado)
+
+    def _calcular(self, pendentes):
+        """Calcula os lotes de `pendentes` e devolve [(future, resultado, erro), ...]"""
+        resolvidos = []
+        por_ano = {}
+        for item in pendentes:
+            por_ano.setdefault(item[0], []).append(item)
+
+        for ano, itens in por_ano.items():
+            try:
+                colunas = [np.concatenate([entradas[i] for _, entradas, _ in itens]) for i in range(1, 6)]
+                salario, parcela_b, voluntaria, quantidade, esporadica = colunas
+                resultado = calcular_simulacao(
+                    salario, parcela_b, voluntaria, quantidade,
+                    valor_esporadica=esporadica,
+                    incluir_esporadica=esporadica > 0,
+                    parametros=parametros_do_ano(ano),
+                )
+            except Exception as erro:  # Não derruba o agrupador: a falha vai para cada requisição
+                resolvidos += [(futuro, None, erro) for _, _, futuro in itens]
+                continue
+
+            self.lotes += 1
+            self.linhas += len(salario)
+            inicio = 0
+            for _, entradas, futuro in itens:
+                fim = inicio + len(entradas[0])
+                resolvidos.append((futuro, {campo: resultado[campo][inicio:fim] for campo in CAMPOS_SAIDA}, None))
+                inicio = fim
+        return resolvidos
+
+
+class Metricas:
+    """Latências recentes das simulações e contadores do serviço"""
+
+    def __init__(self):
+        self.latencias = deque(maxlen=AMOSTRAS_LATENCIA)
+        self.requisicoes = 0
+        self.participantes = 0
+        self.erros = 0
+
+    def registrar(self, duracao, participantes):
+        self.latencias.append(duracao)
+        self.requisicoes += 1
+        self.participantes += participantes
+
+    def resumo(self, agrupador):
+        if self.latencias:
+            p50, p99 = np.percentile(np.fromiter(self.latencias, dtype=np.float64), [50, 99]) * 1000
+        else:
+            p50 = p99 = 0.0
+        return {
+            "latencia_p50_ms": round(float(p50), 3),
+            "latencia_p99_ms": round(float(p99), 3),
+            "amostras": len(self.latencias),
+            "requisicoes": self.requisicoes,
+            "participantes": self.participantes,
+            "erros": self.erros,
+            "lotes_calculados": agrupador.lotes,
+            "participantes_por_lote": round(agrupador.linhas / agrupador.lotes, 1) if agrupador.lotes else 0.0,
+        }
+
+
+class ServidorSimulacao:
+    """Servidor HTTP/1.1 mínimo (com keep-alive) sobre asyncio"""
+
+    def __init__(self, janela=JANELA_LOTE, max_linhas=MAX_LINHAS_POR_LOTE):
+        self.agrupador = Agrupador(janela, max_linhas)
+        self.metricas = Metricas()
+
+    async def iniciar(self, host="127.0.0.1", porta=8765):
+        """Abre o socket e a tarefa do agrupador; devolve o asyncio.Server"""
+        self._tarefa_agrupador = asyncio.create_task(self.agrupador.executar())
+        return await asyncio.start_server(self._atender, host, porta)
+
+    async def simular(self, corpo):
+        """Corpo JSON da requisição -> resposta (objeto ou lista, como veio)"""
+        entradas, matriculas, veio_lista = ler_participantes(corpo)
+        respostas = [None] * len(matriculas)
+        anos = list(entradas)
+        resultados = await asyncio.gather(*(self.agrupador.simular(ano, entradas[ano]) for ano in anos))
+
+        for ano, resultado in zip(anos, resultados):
+            indices = entradas[ano][0].tolist()
+            valores = zip(*(resultado[campo].tolist() for campo in CAMPOS_SAIDA))
+            for indice, linha in zip(indices, valores):
+                resposta = {"ano": ano}
+                if matriculas[indice] is not None:
+                    resposta["matricula"] = matriculas[indice]
+                resposta.update(zip(CAMPOS_SAIDA, linha))
+                respostas[indice] = resposta
+        return respostas if veio_lista else respostas[0]
+
+    async def _rotear(self, metodo, caminho, corpo):
+        caminho = caminho.split("?", 1)[0]
+        if caminho == "/simular":
+            if metodo != "POST":
+                raise ErroRequisicao("Use POST em /simular", status=405)
+            return await self.simular(corpo)
+        if caminho == "/metricas" and metodo == "GET":
+            return self.metricas.resumo(self.agrupador)
+        if caminho == "/saude" and metodo == "GET":
+            return {"status": "ok"}
+        raise ErroRequisicao(f"Rota não encontrada: {metodo} {caminho}", status=404)
+
+    async def _atender(self, leitor, escritor):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                inicio = time.perf_counter()
+                metodo, caminho, versao = linha.decode("latin-1").split()
+                cabecalhos = {}
+                while (linha := await leitor.readline()) not in (b"\r\n", b"\n", b""):
+                    nome, _, valor = linha.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                tamanho = int(cabecalhos.get("content-length", 0))
+                if tamanho > MAX_CORPO:
+                    await self._responder(escritor, 413, {"erro": "Corpo da requisição muito grande"}, fechar=True)
+                    break
+                corpo = await leitor.readexactly(tamanho)
+
+                try:
+                    status, resposta = 200, await self._rotear(metodo, caminho, corpo)
+                except ErroRequisicao as erro:
+                    status, resposta = erro.status, {"erro": str(erro)}
+                except Exception as erro:
+                    status, resposta = 500, {"erro": f"Erro interno: {erro}"}
+
+                fechar = cabecalhos.get("connection", "").lower() == "close" or versao == "HTTP/1.0"
+                await self._responder(escritor, status, resposta, fechar)
+                if caminho.startswith("/simular"):
+                    if status == 200:
+                        participantes = len(resposta) if isinstance(resposta, list) else 1
+                        self.metricas.registrar(time.perf_counter() - inicio, participantes)
+                    else:
+                        self.metricas.erros += 1
+                if fechar:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # Conexão encerrada pelo cliente ou requisição HTTP mal formada
+        finally:
+            escritor.close()
+
+    @staticmethod
+    async def _responder(escritor, status, resposta, fechar=False):
+        corpo = json.dumps(resposta, ensure_ascii=False).encode("utf-8")
+        escritor.write(
+            f"HTTP/1.1 {status} {STATUS_HTTP[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n".encode("latin-1") + corpo
+        )
+        await escritor.drain()
+
+
+async def _servir(host, porta, janela):
+    servidor = await ServidorSimulacao(janela=janela).iniciar(host, porta)
+    print(f"API do simulador em http://{host}:{porta} (POST /simular, GET /metricas)")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP local do simulador de contribuição esporádica.")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--janela-ms", type=float, default=JANELA_LOTE * 1000,
+                        help="Espera para agrupar requisições simultâneas (padrão: %(default)s ms)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_servir(args.host, args.porta, args.janela_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
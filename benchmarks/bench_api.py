@@ -0,0 +1,107 @@
+"""
+Teste de carga da API HTTP local (api_simulador.py).
+
+Sobe o servidor no próprio processo, abre várias conexões keep-alive
+simultâneas e envia requisições de um participante (ou listas, com
+--participantes) medindo vazão e latência p50/p99 do lado do cliente.
+No final mostra também as métricas publicadas pelo servidor em /metricas
+(incluindo quantos participantes, em média, foram calculados por lote).
+
+Uso:
+    python benchmarks/bench_api.py [--conexoes 64] [--requisicoes 200] [--participantes 1]
+    python benchmarks/bench_api.py --janela-ms 2    # espera até 2 ms para agrupar
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+import comum  # noqa: F401  Põe a raiz do repositório no sys.path
+from api_simulador import ServidorSimulacao
+
+
+def _corpo(gerador, participantes):
+    lista = [
+        {
+            "matricula": str(i),
+            "salario_mensal": round(float(gerador.uniform(1_500, 60_000)), 2),
+            "parcela_b_pct": float(gerador.choice(np.arange(4.5, 10.5, 0.5))),
+            "voluntaria_pct": int(gerador.integers(0, 11)),
+            "contribuicoes_no_ano": int(gerador.integers(1, 14)),
+            "esporadica": float(gerador.choice([0.0, 5_000.0])),
+        }
+        for i in range(participantes)
+    ]
+    return json.dumps(lista if participantes > 1 else lista[0]).encode()
+
+
+async def _requisicao(leitor, escritor, metodo, caminho, corpo=b""):
+    escritor.write(
+        f"{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(corpo)}\r\n\r\n".encode()
+        + corpo
+    )
+    await escritor.drain()
+    status = int((await leitor.readline()).split()[1])
+    tamanho = 0
+    while (linha := await leitor.readline()) != b"\r\n":
+        if linha.lower().startswith(b"content-length:"):
+            tamanho = int(linha.split(b":")[1])
+    return status, await leitor.readexactly(tamanho)
+
+
+async def _cliente(porta, corpos, latencias):
+    leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+    try:
+        for corpo in corpos:
+            inicio = time.perf_counter()
+            status, resposta = await _requisicao(leitor, escritor, "POST", "/simular", corpo)
+            latencias.append(time.perf_counter() - inicio)
+            if status != 200:
+                raise RuntimeError(f"HTTP {status}: {resposta[:200]!r}")
+    finally:
+        escritor.close()
+
+
+async def executar(args):
+    servidor_api = ServidorSimulacao(janela=args.janela_ms / 1000)
+    servidor = await servidor_api.iniciar("127.0.0.1", 0)
+    porta = servidor.sockets[0].getsockname()[1]
+
+    gerador = np.random.default_rng(42)
+    corpos = [_corpo(gerador, args.participantes) for _ in range(64)]
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(porta, [corpos[(c + i) % len(corpos)] for i in range(args.requisicoes)], latencias)
+        for c in range(args.conexoes)
+    ))
+    duracao = time.perf_counter() - inicio
+
+    leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+    _, metricas = await _requisicao(leitor, escritor, "GET", "/metricas")
+    escritor.close()
+    await escritor.wait_closed()
+    servidor.close()
+    await asyncio.sleep(0.1)  # Deixa o servidor encerrar as conexões antes de sair
+
+    total = len(latencias)
+    p50, p99 = np.percentile(latencias, [50, 99]) * 1000
+    print(f"{total} requisições ({total * args.participantes} participantes) em {duracao:.2f}s")
+    print(f"vazão: {total / duracao:,.0f} req/s, {total * args.participantes / duracao:,.0f} participantes/s")
+    print(f"latência no cliente: p50 {p50:.2f}ms, p99 {p99:.2f}ms")
+    print(f"métricas do servidor: {metricas.decode()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--conexoes", type=int, default=64, help="Conexões simultâneas")
+    parser.add_argument("--requisicoes", type=int, default=200, help="Requisições por conexão")
+    parser.add_argument("--participantes", type=int, default=1, help="Participantes por requisição")
+    parser.add_argument("--janela-ms", type=float, default=0.0, help="Janela de agrupamento do servidor")
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
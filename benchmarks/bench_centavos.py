@@ -0,0 +1,69 @@
+"""
+Benchmark do caminho em centavos (motor.calcular_simulacao_centavos).
+
+Mede a vazão (linhas/s) do caminho em centavos e das fórmulas em float
+(calcular_simulacao) em blocos de participantes aleatórios. A conferência dos
+valores (referência em Decimal e diferenças para o float) fica em
+tests/test_centavos.py.
+
+Uso:
+    python benchmarks/bench_centavos.py [--linhas 10000000] [--bloco 1000000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import comum  # noqa: F401  Põe a raiz do repositório no sys.path
+from motor import calcular_simulacao, calcular_simulacao_centavos
+from parametros import parametros_do_ano
+
+
+def gerar_bloco(gerador, n):
+    return {
+        "salario_mensal": gerador.integers(100_000, 10_000_000, n),  # Centavos
+        "contribuicao_basica_outro_pct": gerador.choice(np.arange(4.5, 10.5, 0.5), n),
+        "contribuicao_voluntaria_pct": gerador.integers(0, 11, n).astype(np.float64),
+        "quantidade_contribuicoes": gerador.integers(0, 14, n),
+        "valor_esporadica": gerador.integers(0, 5_000_000, n) * (gerador.random(n) < 0.5),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=10_000_000, help="Total de participantes simulados")
+    parser.add_argument("--bloco", type=int, default=1_000_000, help="Participantes por chamada ao motor")
+    args = parser.parse_args()
+
+    parametros = parametros_do_ano()
+    gerador = np.random.default_rng(42)
+    tempo_float = tempo_centavos = 0.0
+
+    for inicio in range(0, args.linhas, args.bloco):
+        n = min(args.bloco, args.linhas - inicio)
+        bloco = gerar_bloco(gerador, n)
+
+        t = time.perf_counter()
+        calcular_simulacao(
+            bloco["salario_mensal"] / 100, bloco["contribuicao_basica_outro_pct"],
+            bloco["contribuicao_voluntaria_pct"], bloco["quantidade_contribuicoes"],
+            valor_esporadica=bloco["valor_esporadica"] / 100, parametros=parametros,
+        )
+        tempo_float += time.perf_counter() - t
+        t = time.perf_counter()
+        calcular_simulacao_centavos(
+            bloco["salario_mensal"], bloco["contribuicao_basica_outro_pct"],
+            bloco["contribuicao_voluntaria_pct"], bloco["quantidade_contribuicoes"],
+            valor_esporadica_centavos=bloco["valor_esporadica"], parametros=parametros,
+        )
+        tempo_centavos += time.perf_counter() - t
+
+    print(f"{args.linhas:,} linhas em blocos de {args.bloco:,}")
+    print(f"  float:    {args.linhas / tempo_float:>14,.0f} linhas/s ({tempo_float:.2f}s)")
+    print(f"  centavos: {args.linhas / tempo_centavos:>14,.0f} linhas/s ({tempo_centavos:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
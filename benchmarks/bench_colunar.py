@@ -0,0 +1,103 @@
+"""
+Benchmark do processamento em lote com entrada e saída colunares.
+
+Gera a mesma folha de participantes em CSV, Parquet e Arrow (IPC) e roda
+simular_arquivo de ponta a ponta em cada formato (CSV -> CSV formatado,
+Parquet -> Parquet tipado, Arrow -> Arrow tipado). Cada variante roda em um
+processo novo, para que o pico de memória (RSS) de uma não contamine a outra.
+Depois, confere em uma amostra que as saídas tipadas, formatadas, dão o
+mesmo texto do CSV.
+
+Uso:
+    python benchmarks/bench_colunar.py [--linhas 1000000] [--lote 50000] [--processos 1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from comum import gerar_folha, medir_em_processo_novo  # Também põe a raiz do repositório no sys.path
+from formatacao import CAMPOS_RESUMO, formatar_campo_vetor
+
+_CODIGO_MEDICAO = """
+import json, resource, time
+from simulador_lote import simular_arquivo
+inicio = time.perf_counter()
+total = simular_arquivo({entrada!r}, {saida!r}, tamanho_lote={lote}, processos={processos})
+print(json.dumps({{
+    "tempo_s": time.perf_counter() - inicio,
+    "linhas": total,
+    "pico_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "pico_rss_processos_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+}}))
+"""
+
+VARIANTES = {"csv": (".csv", ".csv"), "parquet": (".parquet", ".parquet"), "arrow": (".arrow", ".arrow")}
+
+
+def gravar_folha(linhas, diretorio):
+    folha = gerar_folha(np.random.default_rng(42), linhas)
+    folha.to_csv(diretorio / "folha.csv", index=False)
+    folha.to_parquet(diretorio / "folha.parquet", index=False)
+    folha.to_feather(diretorio / "folha.arrow")
+    return {extensao: (diretorio / f"folha{extensao}").stat().st_size / 2**20
+            for extensao in (".csv", ".parquet", ".arrow")}
+
+
+def medir(entrada, saida, lote, processos):
+    codigo = _CODIGO_MEDICAO.format(entrada=str(entrada), saida=str(saida), lote=lote, processos=processos)
+    return medir_em_processo_novo(codigo)[0]
+
+
+def conferir(diretorio, amostra=10_000):
+    """As saídas tipadas, formatadas, devem dar o mesmo texto do resumo em CSV"""
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    texto = pd.read_csv(diretorio / "resumo.csv", dtype=str, nrows=amostra)
+    problemas = []
+    for nome, tabela in (("parquet", pq.read_table(diretorio / "resumo.parquet")),
+                         ("arrow", feather.read_table(diretorio / "resumo.arrow"))):
+        tabela = tabela.slice(0, amostra)
+        for descricao, coluna, tipo in CAMPOS_RESUMO:
+            valores = tabela[coluna].cast("float64") if tipo == "reais" else tabela[coluna]
+            if not (formatar_campo_vetor(valores.to_numpy(), tipo) == texto[descricao].to_numpy()).all():
+                problemas.append(f"{nome}: {coluna}")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="Participantes na folha")
+    parser.add_argument("--lote", type=int, default=50_000, help="Linhas por lote")
+    parser.add_argument("--processos", type=int, default=1, help="Processos do simular_arquivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        diretorio = Path(temporario)
+        tamanhos = gravar_folha(args.linhas, diretorio)
+        print(f"{args.linhas:,} participantes, lotes de {args.lote:,}, {args.processos} processo(s)")
+        resultados = {}
+        for variante, (entrada, saida) in VARIANTES.items():
+            m = resultados[variante] = medir(diretorio / f"folha{entrada}", diretorio / f"resumo{saida}",
+                                             args.lote, args.processos)
+            tamanho_saida = os.path.getsize(diretorio / f"resumo{saida}") / 2**20
+            print(f"  {variante:<8} {m['tempo_s']:6.1f}s ({m['linhas'] / m['tempo_s']:>9,.0f} linhas/s)"
+                  f"  pico RSS {m['pico_rss_mb']:4.0f}MB (processos {m['pico_rss_processos_mb']:4.0f}MB)"
+                  f"  entrada {tamanhos[entrada]:6.1f}MB  saída {tamanho_saida:6.1f}MB")
+        for variante in ("parquet", "arrow"):
+            print(f"{variante}: {resultados['csv']['tempo_s'] / resultados[variante]['tempo_s']:.1f}x o CSV")
+        problemas = conferir(diretorio)
+    if problemas:
+        print("Saídas divergentes do CSV: " + ", ".join(problemas))
+        return 1
+    print("Saídas tipadas conferidas com o CSV formatado.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark da gravação do resumo do lote em .xlsx.
+
+Compara o EscritorExcel (planilha_excel.py, em fluxo) com o caminho usado
+pela página para o resumo individual (pd.ExcelWriter com openpyxl, como em
+converter_para_excel), gravando o mesmo resumo numérico, com o formato do
+Excel de cada coluna. Cada variante roda
+em um processo novo, para que o pico de memória (RSS) de uma não contamine
+a outra; o resumo é gerado dentro do processo em lotes de --lote linhas,
+como no simulador_lote.py.
+
+Uso:
+    python benchmarks/bench_excel.py [--linhas 100000] [--lote 50000]
+    python benchmarks/bench_excel.py --linhas 500000 --so-fluxo
+"""
+import argparse
+
+from comum import medir_em_processo_novo
+
+_CODIGO_MEDICAO = """
+import json, resource, tempfile, time
+import numpy as np
+import pandas as pd
+from comum import gerar_folha
+from simulador_lote import FORMATOS_EXCEL_RESUMO, processar_lote
+
+def lotes():
+    gerador = np.random.default_rng(42)
+    for inicio in range(0, {linhas}, {lote}):
+        yield processar_lote(gerar_folha(gerador, min({lote}, {linhas} - inicio), inicio), numerico=True)
+
+rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+destino = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False).name
+inicio = time.perf_counter()
+gravacao = 0.0
+if {variante!r} == "fluxo":
+    from planilha_excel import EscritorExcel
+    escritor = EscritorExcel(destino)
+    for df in lotes():
+        t = time.perf_counter()
+        for grupo, linhas in df.groupby("Departamento", sort=False):
+            escritor.escrever(linhas, aba=grupo, formatos=FORMATOS_EXCEL_RESUMO)
+        gravacao += time.perf_counter() - t
+    t = time.perf_counter()
+    escritor.fechar()
+    gravacao += time.perf_counter() - t
+else:
+    # Mesmo caminho de converter_para_excel (simulador.py): tudo em memória
+    resumo = pd.concat(list(lotes()), ignore_index=True)
+    t = time.perf_counter()
+    with pd.ExcelWriter(destino, engine="openpyxl") as writer:
+        for grupo, linhas in resumo.groupby("Departamento", sort=False):
+            linhas.to_excel(writer, index=False, sheet_name=grupo)
+            planilha = writer.sheets[grupo]
+            for numero, nome in enumerate(linhas.columns, start=1):
+                if nome in FORMATOS_EXCEL_RESUMO:
+                    for (celula,) in planilha.iter_rows(min_row=2, min_col=numero, max_col=numero):
+                        celula.number_format = FORMATOS_EXCEL_RESUMO[nome]
+    gravacao = time.perf_counter() - t
+total = time.perf_counter() - inicio
+rss_final = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "gravacao_s": gravacao,
+    "total_s": total,
+    "pico_rss_mb": rss_final / 1024,
+    "crescimento_rss_mb": (rss_final - rss_inicial) / 1024,
+    "tamanho_mb": __import__("os").path.getsize(destino) / 2**20,
+}}))
+__import__("os").remove(destino)
+"""
+
+
+def medir(variante, linhas, lote):
+    codigo = _CODIGO_MEDICAO.format(variante=variante, linhas=linhas, lote=lote)
+    return medir_em_processo_novo(codigo)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=100_000, help="Participantes no resumo")
+    parser.add_argument("--lote", type=int, default=50_000, help="Linhas por lote gravado")
+    parser.add_argument("--so-fluxo", action="store_true",
+                        help="Mede só o EscritorExcel (o openpyxl é lento para volumes grandes)")
+    args = parser.parse_args()
+
+    variantes = ["fluxo"] if args.so_fluxo else ["fluxo", "openpyxl"]
+    print(f"{args.linhas} linhas, lotes de {args.lote}, uma aba por departamento")
+    for variante in variantes:
+        m = medir(variante, args.linhas, args.lote)
+        print(f"  {variante:<9} gravação {m['gravacao_s']:6.1f}s ({args.linhas / m['gravacao_s']:>9,.0f} linhas/s)"
+              f"  pico RSS {m['pico_rss_mb']:6.0f}MB (+{m['crescimento_rss_mb']:.0f}MB)"
+              f"  arquivo {m['tamanho_mb']:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
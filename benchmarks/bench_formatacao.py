@@ -0,0 +1,52 @@
+"""
+Micro-benchmark da formatação em reais: versão escalar x vetorizada.
+
+Confere também que as duas versões produzem exatamente o mesmo texto.
+
+Uso:
+    python benchmarks/bench_formatacao.py [--linhas 1000000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import comum  # noqa: F401  Põe a raiz do repositório no sys.path
+from formatacao import formatar_reais, formatar_reais_vetor
+
+
+def medir(funcao, repeticoes=3):
+    """Menor tempo de `repeticoes` execuções, em segundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    gerador = np.random.default_rng(42)
+    # Valores na faixa das colunas do resumo, com alguns negativos e nulos
+    valores = gerador.uniform(-5_000, 200_000, args.linhas)
+    valores[gerador.random(args.linhas) < 0.01] = np.nan
+
+    tempo_escalar, escalar = medir(lambda: [formatar_reais(v) for v in valores.tolist()])
+    tempo_vetor, vetor = medir(lambda: formatar_reais_vetor(valores))
+
+    divergencias = sum(a != b for a, b in zip(escalar, vetor.tolist()))
+    print(f"linhas:        {args.linhas:,}")
+    print(f"escalar:       {tempo_escalar:.3f}s ({args.linhas / tempo_escalar:,.0f} valores/s)")
+    print(f"vetorizada:    {tempo_vetor:.3f}s ({args.linhas / tempo_vetor:,.0f} valores/s)")
+    print(f"ganho:         {tempo_escalar / tempo_vetor:.1f}x")
+    print(f"divergências:  {divergencias}")
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
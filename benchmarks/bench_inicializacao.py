@@ -0,0 +1,121 @@
+"""
+Benchmark da inicialização a frio da página (simulador.py).
+
+Cada medição roda em um processo Python novo: importa o Streamlit e executa
+a primeira renderização da página com o AppTest, como na primeira sessão de
+um container recém-iniciado. Mostra:
+- o tempo de importação do Streamlit e da primeira renderização (mediana);
+- os módulos mais caros importados pela página (`python -X importtime`);
+- se algum módulo usado só nas exportações (fpdf, requests, openpyxl) foi
+  carregado antes de o usuário pedir um Excel ou PDF.
+
+Uso:
+    python benchmarks/bench_inicializacao.py --salvar-baseline   # grava a referência
+    python benchmarks/bench_inicializacao.py                     # compara com a referência
+
+Sai com código 1 se a primeira renderização ficar mais lenta que a
+referência além do limite (--limite, padrão 20%) ou se um módulo de
+exportação for importado na inicialização.
+"""
+import argparse
+import json
+import statistics
+import sys
+from pathlib import Path
+
+from comum import RAIZ, medir_em_processo_novo
+
+CAMINHO_BASELINE = Path(__file__).resolve().parent / "baseline_inicializacao.json"
+
+# Só devem ser carregados quando o usuário pede uma exportação
+MODULOS_EXPORTACAO = ["recibo", "fpdf", "requests", "openpyxl"]
+
+_CODIGO_MEDICAO = """
+import json, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+importado = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+fim = time.perf_counter()
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+print(json.dumps({{
+    "importacao_streamlit_s": importado - inicio,
+    "primeira_renderizacao_s": fim - importado,
+    "modulos_exportacao": [m for m in {modulos!r} if m in sys.modules],
+}}))
+"""
+
+
+def medir_processo_novo(importtime=False):
+    """Executa uma inicialização a frio; devolve (medidas, saída do -X importtime)"""
+    codigo = _CODIGO_MEDICAO.format(app=str(RAIZ / "simulador.py"), modulos=MODULOS_EXPORTACAO)
+    return medir_em_processo_novo(codigo, ["-X", "importtime"] if importtime else [])
+
+
+def modulos_mais_caros(saida_importtime, quantidade):
+    """Pacotes de primeiro nível com maior tempo acumulado de importação"""
+    tempos = {}
+    for linha in saida_importtime.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = linha.split("|")
+        if acumulado.strip().isdigit() and not nome.startswith("  "):  # Só o primeiro nível
+            nome = nome.strip()
+            tempos[nome] = tempos.get(nome, 0) + int(acumulado)
+    return sorted(tempos.items(), key=lambda item: item[1], reverse=True)[:quantidade]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização a frio do simulador")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos novos medidos")
+    parser.add_argument("--top", type=int, default=15, help="Módulos mostrados no perfil de importação")
+    parser.add_argument("--limite", type=float, default=0.20,
+                        help="Regressão tolerada na mediana em relação à referência (0.20 = 20%%)")
+    parser.add_argument("--baseline", type=Path, default=CAMINHO_BASELINE)
+    parser.add_argument("--salvar-baseline", action="store_true",
+                        help="Grava os resultados como nova referência")
+    args = parser.parse_args()
+
+    _, saida_importtime = medir_processo_novo(importtime=True)
+    print("Módulos de primeiro nível mais caros (importação acumulada):")
+    for nome, microssegundos in modulos_mais_caros(saida_importtime, args.top):
+        print(f"  {microssegundos / 1000:>8.1f}ms  {nome}")
+
+    medidas = [medir_processo_novo()[0] for _ in range(args.repeticoes)]
+    resultado = {
+        "importacao_streamlit_ms": statistics.median(m["importacao_streamlit_s"] for m in medidas) * 1000,
+        "primeira_renderizacao_ms": statistics.median(m["primeira_renderizacao_s"] for m in medidas) * 1000,
+    }
+    carregados = sorted({modulo for m in medidas for modulo in m["modulos_exportacao"]})
+    print(f"Importação do Streamlit: {resultado['importacao_streamlit_ms']:.0f}ms (mediana)")
+    print(f"Primeira renderização:   {resultado['primeira_renderizacao_ms']:.0f}ms (mediana)")
+
+    problemas = []
+    if carregados:
+        problemas.append(f"módulos de exportação carregados na inicialização: {', '.join(carregados)}")
+
+    if args.salvar_baseline:
+        args.baseline.write_text(json.dumps(resultado, indent=2), encoding="utf-8")
+        print(f"Referência gravada em {args.baseline}")
+    elif args.baseline.exists():
+        referencia = json.loads(args.baseline.read_text(encoding="utf-8"))
+        anterior = referencia["primeira_renderizacao_ms"]
+        variacao = resultado["primeira_renderizacao_ms"] / anterior - 1
+        if variacao > args.limite:
+            problemas.append(f"primeira renderização: {anterior:.0f}ms -> "
+                             f"{resultado['primeira_renderizacao_ms']:.0f}ms (+{variacao:.0%})")
+    else:
+        print("Nenhuma referência encontrada; rode com --salvar-baseline para comparar tempos.")
+
+    if problemas:
+        print("Regressão na inicialização:")
+        for problema in problemas:
+            print(f"  {problema}")
+        return 1
+    print("Sem regressões na inicialização.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
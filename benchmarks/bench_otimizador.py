@@ -0,0 +1,85 @@
+"""
+Conferência e benchmark da combinação de menor custo (motor.otimizar_limite_centavos).
+
+Em blocos de participantes aleatórios (incluindo salários abaixo do total das
+UR, folhas sem contribuições e salários altos), compara a solução fechada com
+a busca exaustiva em todas as combinações de Parcela B × voluntária dos
+sliders (tests/test_otimizador.py, que faz a mesma conferência em uma amostra
+pequena), com a esporádica de cada uma escolhida pela regra do regulamento. A
+escolha deve ser idêntica, inclusive nos empates. Mede a vazão (linhas/s)
+dos dois caminhos.
+
+Uso:
+    python benchmarks/bench_otimizador.py [--linhas 1000000] [--bloco 100000]
+
+Sai com código 1 se alguma conferência falhar.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import comum  # noqa: F401  Põe a raiz do repositório no sys.path
+from motor import otimizar_limite_centavos
+from parametros import parametros_do_ano
+from tests.test_otimizador import exaustiva
+
+
+def gerar_bloco(gerador, n):
+    faixa = gerador.integers(0, 3, n)
+    salario = np.select([faixa == 0, faixa == 1],
+                        [gerador.integers(10_000, 600_000, n),  # Até R$ 6.000,00: total das UR e mínimo > máximo
+                         gerador.integers(600_000, 3_000_000, n)],
+                        gerador.integers(3_000_000, 20_000_000, n))
+    return salario, gerador.integers(0, 14, n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="Total de participantes")
+    parser.add_argument("--bloco", type=int, default=100_000, help="Participantes por chamada")
+    parser.add_argument("--conferidas", type=int, default=20_000, help="Linhas de cada bloco na busca exaustiva")
+    args = parser.parse_args()
+
+    parametros = parametros_do_ano()
+    gerador = np.random.default_rng(42)
+    tempo = tempo_exaustiva = 0.0
+    conferidas = 0
+    problemas = []
+    atingem = 0
+    for inicio in range(0, args.linhas, args.bloco):
+        n = min(args.bloco, args.linhas - inicio)
+        salario, quantidade = gerar_bloco(gerador, n)
+
+        t = time.perf_counter()
+        otimo = otimizar_limite_centavos(salario, quantidade, parametros=parametros)
+        tempo += time.perf_counter() - t
+        atingem += int(otimo["atinge_limite"].sum())
+
+        amostra = slice(0, min(args.conferidas, n))
+        t = time.perf_counter()
+        esperado = exaustiva(salario[amostra], quantidade[amostra], parametros)
+        tempo_exaustiva += time.perf_counter() - t
+        conferidas += min(args.conferidas, n)
+        for coluna, valores in esperado.items():
+            divergentes = np.flatnonzero(otimo[coluna][amostra] != valores)
+            for i in divergentes[:5]:
+                problemas.append(f"linha {inicio + i} (salário {salario[i]}, {quantidade[i]} contribuições), "
+                                 f"{coluna}: {otimo[coluna][i]} != {valores[i]} (exaustiva)")
+
+    print(f"{args.linhas:,} linhas em blocos de {args.bloco:,}")
+    print(f"  solução fechada: {args.linhas / tempo:>12,.0f} linhas/s ({tempo:.2f}s)")
+    print(f"  busca exaustiva: {conferidas / tempo_exaustiva:>12,.0f} linhas/s ({conferidas:,} linhas)")
+    print(f"  atingem o limite: {atingem / args.linhas:.1%}")
+    if problemas:
+        print(f"{len(problemas)} problemas:")
+        for problema in problemas[:20]:
+            print(f"  {problema}")
+        return 1
+    print("Conferência com a busca exaustiva: idêntica.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Benchmark da geração de recibos em PDF (recibo.py).
+
+Compara, no mesmo processo, recibos por segundo:
+- "sem modelo": o layout inteiro é desenhado a cada recibo, como antes do
+  modelo (o cache do modelo é descartado antes de cada chamada);
+- "com modelo": o layout fixo é desenhado uma vez e cada recibo só escreve
+  a data e os valores sobre uma cópia dele.
+
+Sem o logo local (assets/convenio040.png), o recibo sai com o cabeçalho em
+texto; use --logo para medir com uma imagem.
+
+Uso:
+    python benchmarks/bench_recibo.py [--recibos 2000] [--logo caminho.png]
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from comum import salarios_aleatorios  # Também põe a raiz do repositório no sys.path
+import recibo  # noqa: E402
+
+
+def _valores(gerador, quantidade):
+    salarios = salarios_aleatorios(gerador, quantidade)
+    return [
+        (None, salario, salario * 14, salario * 0.08, salario * 0.08 * 13, 5_000.0, salario * 0.08 * 13 + 5_000)
+        for salario in salarios
+    ]
+
+
+def medir(valores, com_modelo):
+    inicio = time.perf_counter()
+    for argumentos in valores:
+        if not com_modelo:
+            recibo._cache_modelo["modelo"] = None
+        recibo.gerar_pdf_recibo(*argumentos)
+    return len(valores) / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recibos", type=int, default=2000, help="Recibos gerados em cada variante")
+    parser.add_argument("--logo", type=Path, help="PNG usado como logo do recibo")
+    args = parser.parse_args()
+
+    if args.logo:
+        recibo.CAMINHO_LOGO_LOCAL = args.logo
+    print(f"logo: {'sim' if recibo.obter_logo() is not None else 'não (cabeçalho em texto)'}")
+
+    valores = _valores(np.random.default_rng(42), args.recibos)
+    recibo.gerar_pdf_recibo(*valores[0])  # Aquecimento (logo e modelo)
+    sem_modelo = medir(valores, com_modelo=False)
+    com_modelo = medir(valores, com_modelo=True)
+    print(f"sem modelo: {sem_modelo:8,.0f} recibos/s ({1000 / sem_modelo:.3f}ms por recibo)")
+    print(f"com modelo: {com_modelo:8,.0f} recibos/s ({1000 / com_modelo:.3f}ms por recibo)")
+    print(f"ganho: {com_modelo / sem_modelo:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark de latência dos reruns da página (simulador.py).
+
+Executa o app sem navegador com o AppTest do Streamlit, altera cada widget
+(salário, Parcela B, voluntária, quantidade de contribuições, checkbox e
+slider da esporádica) e mede, por rerun: tempo de parede, memória alocada
+e tamanho do conteúdo enviado ao navegador.
+
+Uso:
+    python benchmarks/bench_reruns.py --salvar-baseline   # grava a referência
+    python benchmarks/bench_reruns.py                     # compara com a referência
+
+Sai com código 1 se a mediana de algum cenário ficar mais lenta que a
+referência além do limite (--limite, padrão 20%).
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from comum import RAIZ
+
+CAMINHO_APP = RAIZ / "simulador.py"
+CAMINHO_BASELINE = Path(__file__).resolve().parent / "baseline_reruns.json"
+
+
+def _widget(at, tipo, rotulo):
+    """Localiza um widget pelo trecho do rótulo, para não depender da ordem na página"""
+    for widget in getattr(at, tipo):
+        if rotulo in widget.label:
+            return widget
+    raise LookupError(f"Widget não encontrado: {tipo} '{rotulo}'")
+
+
+# Cenários: (nome, função que altera o widget). Cada chamada alterna entre dois
+# valores, para que todo rerun medido seja de fato uma mudança de entrada.
+def _alternar(tipo, rotulo, valor_a, valor_b):
+    def acao(at, i):
+        _widget(at, tipo, rotulo).set_value(valor_a if i % 2 == 0 else valor_b)
+    return acao
+
+
+def _alternar_checkbox(at, i):
+    _widget(at, "checkbox", "Incluir contribuição esporádica").set_value(i % 2 == 1)
+
+
+CENARIOS = [
+    ("salario", _alternar("number_input", "Salário Mensal", 12500.0, 10000.0)),
+    ("parcela_b", _alternar("slider", "Contribuição Básica B", 8.0, 10.0)),
+    ("voluntaria", _alternar("slider", "Contribuição Voluntária", 3.0, 0.0)),
+    ("quantidade", _alternar("slider", "Quantidade de contribuições", 10, 13)),
+    ("esporadica_checkbox", _alternar_checkbox),
+    ("esporadica_valor", _alternar("slider", "Valor da Contribuição Esporádica", 6000.0, 5000.0)),
+]
+
+
+def tamanho_payload(at):
+    """Soma do tamanho serializado (protobuf) de todos os elementos da página"""
+    def percorrer(no):
+        total = 0
+        proto = getattr(no, "proto", None)
+        if proto is not None:
+            total += proto.ByteSize()
+        for filho in getattr(no, "children", {}).values():
+            total += percorrer(filho)
+        return total
+    return percorrer(at._tree)
+
+
+def medir_cenario(acao, repeticoes):
+    """Mede tempo (sem tracemalloc) e depois memória alocada (com tracemalloc) do rerun"""
+    at = AppTest.from_file(str(CAMINHO_APP), default_timeout=60).run()
+
+    tempos = []
+    for i in range(repeticoes):
+        acao(at, i)
+        inicio = time.perf_counter()
+        at.run()
+        tempos.append(time.perf_counter() - inicio)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    tracemalloc.start()
+    try:
+        acao(at, repeticoes)
+        tracemalloc.reset_peak()
+        antes, _ = tracemalloc.get_traced_memory()
+        at.run()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "mediana_ms": statistics.median(tempos) * 1000,
+        "p90_ms": sorted(tempos)[int(0.9 * (len(tempos) - 1))] * 1000,
+        "alocacao_pico_kb": (pico - antes) / 1024,
+        "payload_kb": tamanho_payload(at) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latência dos reruns do simulador")
+    parser.add_argument("--repeticoes", type=int, default=20, help="Reruns medidos por cenário")
+    parser.add_argument("--limite", type=float, default=0.20,
+                        help="Regressão tolerada na mediana em relação à referência (0.20 = 20%%)")
+    parser.add_argument("--baseline", type=Path, default=CAMINHO_BASELINE)
+    parser.add_argument("--salvar-baseline", action="store_true",
+                        help="Grava os resultados como nova referência")
+    args = parser.parse_args()
+
+    resultados = {}
+    print(f"{'cenário':<22}{'mediana':>10}{'p90':>10}{'alocação':>12}{'payload':>10}")
+    for nome, acao in CENARIOS:
+        r = medir_cenario(acao, args.repeticoes)
+        resultados[nome] = r
+        print(f"{nome:<22}{r['mediana_ms']:>8.1f}ms{r['p90_ms']:>8.1f}ms"
+              f"{r['alocacao_pico_kb']:>10.0f}KB{r['payload_kb']:>8.1f}KB")
+
+    if args.salvar_baseline:
+        args.baseline.write_text(json.dumps(resultados, indent=2), encoding="utf-8")
+        print(f"Referência gravada em {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("Nenhuma referência encontrada; rode com --salvar-baseline primeiro.")
+        return 0
+
+    referencia = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressoes = []
+    for nome, r in resultados.items():
+        if nome not in referencia:
+            continue
+        anterior = referencia[nome]["mediana_ms"]
+        variacao = r["mediana_ms"] / anterior - 1
+        if variacao > args.limite:
+            regressoes.append(f"{nome}: {anterior:.1f}ms -> {r['mediana_ms']:.1f}ms (+{variacao:.0%})")
+
+    if regressoes:
+        print("Regressão de tempo de rerun acima do limite:")
+        for linha in regressoes:
+            print(f"  {linha}")
+        return 1
+    print(f"Sem regressões acima de {args.limite:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""
+Teste de carga com sessões simultâneas da página (simulador.py).
+
+Sobe um servidor Streamlit local (ou usa um já em execução, com --url) e
+abre N sessões pelo mesmo websocket que o navegador usa (/_stcore/stream).
+Cada sessão repete o roteiro de um participante: primeira renderização,
+salário e parcela B (rerun completo), alguns ajustes da esporádica
+(fragmento) e a preparação do Excel e do PDF.
+
+Mostra:
+- vazão (interações/s) e latência p50/p95/p99 de cada tipo de interação;
+- CPU consumida pelo servidor e RSS antes, no pico e com as N sessões
+  abertas, e o RSS adicional por sessão;
+- os objetos do session_state e do script (resumo_df, exportações) que
+  mais ocupam memória, publicados pela instrumentação da página
+  (SIMULADOR_METRICAS=1), separando o que é compartilhado entre sessões.
+
+CPU e RSS são lidos de /proc (Linux) e só estão disponíveis para o
+servidor iniciado pelo próprio teste.
+
+Uso:
+    python benchmarks/carga_sessoes.py [--sessoes 50] [--ciclos 3] [--pausa 0.5]
+    python benchmarks/carga_sessoes.py --url ws://localhost:8501/_stcore/stream
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+from comum import RAIZ
+
+# Rótulos (trechos) dos widgets usados no roteiro
+SALARIO = "Salário Mensal"
+PARCELA_B = "Contribuição Básica B"
+ESPORADICA = "Valor da Contribuição Esporádica"
+PREPARAR_EXCEL = "Preparar Relatório em Excel"
+GERAR_PDF = "Gerar Recibo em PDF"
+
+_CAMPOS_VALOR = {
+    "slider": "double_array_value",
+    "number_input": "double_value",
+    "checkbox": "bool_value",
+    "button": "trigger_value",
+}
+
+
+class SessaoNavegador:
+    """Uma sessão da página, falando o protocolo do navegador pelo websocket"""
+
+    def __init__(self, url):
+        self.url = url
+        self.conexao = None
+        self.hash_pagina = ""
+        self.widgets = {}  # rótulo -> (tipo, id, fragmento, mínimo, máximo)
+        self.valores = {}  # id -> (campo do WidgetState, valor)
+        self.erros = 0
+
+    async def conectar(self):
+        self.conexao = await websocket_connect(self.url, subprotocols=["streamlit", "x"])
+
+    def fechar(self):
+        if self.conexao is not None:
+            self.conexao.close()
+
+    async def executar(self, fragmento="", gatilho=None):
+        """Envia um rerun com o estado atual dos widgets; devolve a latência até o fim do script"""
+        mensagem = BackMsg()
+        rerun = mensagem.rerun_script
+        rerun.page_script_hash = self.hash_pagina
+        if fragmento:
+            rerun.fragment_id = fragmento
+        for identificador, (campo, valor) in self.valores.items():
+            estado = rerun.widget_states.widgets.add()
+            estado.id = identificador
+            if campo == "double_array_value":
+                estado.double_array_value.data.extend(valor)
+            else:
+                setattr(estado, campo, valor)
+        if gatilho is not None:
+            estado = rerun.widget_states.widgets.add()
+            estado.id = gatilho
+            estado.trigger_value = True
+
+        inicio = time.perf_counter()
+        await self.conexao.write_message(mensagem.SerializeToString(), binary=True)
+        while True:
+            bruto = await self.conexao.read_message()
+            if bruto is None:
+                raise ConnectionError("O servidor fechou o websocket")
+            resposta = ForwardMsg()
+            resposta.ParseFromString(bruto)
+            tipo = resposta.WhichOneof("type")
+            if tipo == "new_session":
+                self.hash_pagina = resposta.new_session.page_script_hash
+            elif tipo == "delta" and resposta.delta.WhichOneof("type") == "new_element":
+                self._registrar_elemento(resposta.delta.new_element, resposta.delta.fragment_id)
+            elif tipo == "script_finished":
+                return time.perf_counter() - inicio
+
+    def _registrar_elemento(self, elemento, fragmento):
+        tipo = elemento.WhichOneof("type")
+        if tipo == "exception":
+            self.erros += 1
+        if tipo not in _CAMPOS_VALOR:
+            return
+        widget = getattr(elemento, tipo)
+        minimo, maximo = (widget.min, widget.max) if tipo in ("slider", "number_input") else (0, 0)
+        self.widgets[widget.label] = (tipo, widget.id, fragmento, minimo, maximo)
+        if tipo == "button" or widget.id in self.valores:
+            return
+        if tipo == "slider":
+            self.valores[widget.id] = ("double_array_value", list(widget.value or widget.default))
+        elif tipo == "number_input":
+            self.valores[widget.id] = ("double_value", widget.value if widget.HasField("value") else widget.default)
+        else:
+            self.valores[widget.id] = ("bool_value", widget.value if widget.set_value else widget.default)
+
+    def widget(self, trecho):
+        for rotulo, dados in self.widgets.items():
+            if trecho in rotulo:
+                return dados
+        return None
+
+    async def alterar(self, trecho, escolher_valor):
+        """Muda o valor de um widget (escolhido dentro dos limites) e reexecuta"""
+        tipo, identificador, fragmento, minimo, maximo = self.widget(trecho)
+        valor = escolher_valor(minimo, maximo)
+        campo = self.valores[identificador][0]
+        self.valores[identificador] = (campo, [valor] if campo == "double_array_value" else valor)
+        return await self.executar(fragmento)
+
+    async def clicar(self, trecho):
+        """Clica em um botão, se estiver na tela; devolve None se não estiver"""
+        dados = self.widget(trecho)
+        if dados is None:
+            return None
+        _, identificador, fragmento, _, _ = dados
+        del self.widgets[[rotulo for rotulo in self.widgets if trecho in rotulo][0]]
+        return await self.executar(fragmento, gatilho=identificador)
+
+
+async def roteiro_participante(sessao, ciclos, pausa, gerador, latencias):
+    """Interações de um participante; acumula as latências por tipo de interação"""
+    async def medir(nome, corrotina):
+        latencia = await corrotina
+        if latencia is not None:
+            latencias[nome].append(latencia)
+        if pausa:
+            await asyncio.sleep(gerador.expovariate(1 / pausa))
+
+    await medir("abertura", sessao.executar())
+    for _ in range(ciclos):
+        await medir("salario", sessao.alterar(SALARIO, lambda mi, ma: round(gerador.uniform(2_000, 40_000), 2)))
+        await medir("parcela_b", sessao.alterar(
+            PARCELA_B, lambda mi, ma: mi + 0.5 * gerador.randint(0, int((ma - mi) / 0.5))))
+        for _ in range(3):
+            await medir("esporadica", sessao.alterar(ESPORADICA, lambda mi, ma: round(gerador.uniform(mi, ma), 2)))
+        await medir("excel", sessao.clicar(PREPARAR_EXCEL))
+        await medir("pdf", sessao.clicar(GERAR_PDF))
+
+
+class ProcessoServidor:
+    """Servidor Streamlit local com a instrumentação da página ligada"""
+
+    def __init__(self, porta, arquivo_metricas):
+        self.porta = porta
+        self.arquivo_metricas = arquivo_metricas
+        self.processo = None
+
+    def iniciar(self, timeout=120):
+        ambiente = dict(os.environ, SIMULADOR_METRICAS="1", SIMULADOR_METRICAS_ARQUIVO=self.arquivo_metricas)
+        self.processo = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", str(RAIZ / "simulador.py"),
+             "--server.headless", "true", "--server.port", str(self.porta),
+             "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+            cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            if self.processo.poll() is not None:
+                raise RuntimeError("O servidor Streamlit terminou durante a inicialização")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.porta}/_stcore/health", timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise TimeoutError("O servidor Streamlit não respondeu a tempo")
+
+    def parar(self):
+        if self.processo is not None:
+            self.processo.terminate()
+            self.processo.wait(timeout=30)
+
+    def uso(self):
+        """(segundos de CPU, RSS atual em MB, pico de RSS em MB) do processo"""
+        campos = Path(f"/proc/{self.processo.pid}/stat").read_text().rsplit(")", 1)[1].split()
+        cpu = (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+        status = dict(
+            linha.split(":", 1) for linha in Path(f"/proc/{self.processo.pid}/status").read_text().splitlines()
+        )
+        return cpu, int(status["VmRSS"].split()[0]) / 1024, int(status["VmHWM"].split()[0]) / 1024
+
+
+def _porta_livre():
+    with socket.socket() as soquete:
+        soquete.bind(("127.0.0.1", 0))
+        return soquete.getsockname()[1]
+
+
+def ler_memoria_objetos(caminho):
+    """Memória por objeto publicada pela instrumentação: {(origem, objeto): {métrica: valor}}"""
+    objetos = defaultdict(dict)
+    padrao = re.compile(r'simulador_memoria_objetos_(\w+)\{origem="([^"]*)",objeto="([^"]*)"\} (\S+)')
+    for linha in Path(caminho).read_text(encoding="utf-8").splitlines():
+        encontrado = padrao.match(linha)
+        if encontrado:
+            metrica, origem, objeto, valor = encontrado.groups()
+            objetos[origem, objeto][metrica] = float(valor)
+    return objetos
+
+
+async def executar(args, servidor):
+    url = args.url or f"ws://127.0.0.1:{servidor.porta}/_stcore/stream"
+
+    # Aquecimento: a primeira sessão paga as importações e os caches do processo
+    aquecimento = SessaoNavegador(url)
+    await aquecimento.conectar()
+    await roteiro_participante(aquecimento, 1, 0, random.Random(0), defaultdict(list))
+    aquecimento.fechar()
+    await asyncio.sleep(1)
+    uso_inicial = servidor.uso() if servidor else None
+
+    sessoes = [SessaoNavegador(url) for _ in range(args.sessoes)]
+    latencias = defaultdict(list)
+
+    async def participante(indice, sessao):
+        await asyncio.sleep(indice * args.rampa / max(args.sessoes, 1))
+        await sessao.conectar()
+        await roteiro_participante(sessao, args.ciclos, args.pausa, random.Random(indice + 1), latencias)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(participante(i, sessao) for i, sessao in enumerate(sessoes)))
+    duracao = time.perf_counter() - inicio
+
+    # Com as N sessões ainda abertas: memória mantida por elas
+    await asyncio.sleep(1.1)  # Intervalo mínimo entre publicações das métricas
+    await sessoes[0].alterar(ESPORADICA, lambda mi, ma: mi)
+    uso_final = servidor.uso() if servidor else None
+    erros = sum(sessao.erros for sessao in sessoes)
+    for sessao in sessoes:
+        sessao.fechar()
+
+    total = sum(len(valores) for valores in latencias.values())
+    print(f"{args.sessoes} sessões, {total} interações em {duracao:.1f}s: {total / duracao:,.1f} interações/s"
+          f" ({erros} erros na página)")
+    print(f"{'interação':<12}{'qtd':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for nome, valores in latencias.items():
+        p50, p95, p99 = np.percentile(valores, [50, 95, 99]) * 1000
+        print(f"{nome:<12}{len(valores):>7}{p50:>8.0f}ms{p95:>8.0f}ms{p99:>8.0f}ms")
+
+    if servidor:
+        cpu = uso_final[0] - uso_inicial[0]
+        print(f"CPU do servidor: {cpu:.1f}s ({cpu / duracao:.0%} de um núcleo, "
+              f"{cpu / total * 1000:.1f}ms por interação)")
+        print(f"RSS do servidor: {uso_inicial[1]:.0f}MB após o aquecimento, {uso_final[1]:.0f}MB com as sessões "
+              f"abertas, pico {uso_final[2]:.0f}MB; "
+              f"{(uso_final[1] - uso_inicial[1]) / args.sessoes:.2f}MB por sessão")
+
+        objetos = ler_memoria_objetos(servidor.arquivo_metricas)
+        print("Objetos mantidos pelas sessões, incluindo as já encerradas (compartilhados contados uma vez):")
+        print(f"  {'origem/objeto':<34}{'sessões':>8}{'memória':>12}{'referenciada':>14}")
+        ordenados = sorted(objetos.items(), key=lambda item: item[1].get("bytes", 0), reverse=True)
+        for (origem, objeto), metricas in ordenados[:args.top]:
+            print(f"  {origem + '/' + objeto:<34}{metricas.get('sessoes', 0):>8.0f}"
+                  f"{metricas.get('bytes', 0) / 1024:>10.1f}KB{metricas.get('referenciados_bytes', 0) / 1024:>12.1f}KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessoes", type=int, default=50, help="Sessões simultâneas")
+    parser.add_argument("--ciclos", type=int, default=3, help="Repetições do roteiro em cada sessão")
+    parser.add_argument("--pausa", type=float, default=0.5,
+                        help="Tempo médio de reflexão entre interações, em segundos (0 = sem pausa)")
+    parser.add_argument("--rampa", type=float, default=5.0, help="Segundos para abrir todas as sessões")
+    parser.add_argument("--top", type=int, default=10, help="Objetos mostrados no relatório de memória")
+    parser.add_argument("--url", help="Websocket de um servidor já em execução (sem CPU, RSS e objetos)")
+    args = parser.parse_args()
+
+    servidor = None
+    if not args.url:
+        servidor = ProcessoServidor(_porta_livre(), tempfile.mktemp(suffix=".prom"))
+        servidor.iniciar()
+    try:
+        asyncio.run(executar(args, servidor))
+    finally:
+        if servidor:
+            servidor.parar()
+            Path(servidor.arquivo_metricas).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
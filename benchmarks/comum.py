@@ -0,0 +1,57 @@
+"""
+Peças compartilhadas pelos benchmarks desta pasta.
+
+Importar este módulo põe a raiz do repositório no sys.path, para que os
+scripts (executados como `python benchmarks/<script>.py`) importem os
+módulos do simulador. Também oferece a folha de participantes aleatória
+usada nas medições e a execução de um trecho de código em um processo
+Python novo, para que o pico de memória (RSS) de uma variante não contamine
+a outra.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parent.parent
+BENCHMARKS = RAIZ / "benchmarks"
+for _caminho in (str(RAIZ), str(BENCHMARKS)):
+    if _caminho not in sys.path:
+        sys.path.insert(0, _caminho)
+
+DEPARTAMENTOS = ["Operação", "Engenharia", "TI", "Jurídico"]
+
+
+def salarios_aleatorios(gerador, quantidade):
+    """Salários mensais (R$ 1.500 a R$ 60.000, em reais com centavos)"""
+    return gerador.uniform(1_500, 60_000, quantidade).round(2)
+
+
+def gerar_folha(gerador, linhas, inicio=0):
+    """Folha de participantes aleatória, com as colunas de entrada do simulador_lote"""
+    return pd.DataFrame({
+        "matricula": np.char.add("M", np.arange(inicio, inicio + linhas).astype(str)),
+        "departamento": gerador.choice(DEPARTAMENTOS, linhas),
+        "salario_mensal": salarios_aleatorios(gerador, linhas),
+        "parcela_b_pct": gerador.choice(np.arange(4.5, 10.5, 0.5), linhas),
+        "voluntaria_pct": gerador.integers(0, 11, linhas),
+        "contribuicoes_no_ano": gerador.integers(1, 14, linhas),
+        "esporadica": gerador.choice([0.0, 5_000.0], linhas),
+    })
+
+
+def medir_em_processo_novo(codigo, opcoes_python=()):
+    """
+    Executa `codigo` em um processo Python novo e devolve (medidas, stderr).
+
+    O processo já começa com a raiz do repositório e esta pasta no sys.path
+    (o código pode importar o simulador e `comum`); `medidas` é o JSON da
+    última linha que ele imprimir.
+    """
+    preambulo = f"import sys\nsys.path[:0] = [{str(RAIZ)!r}, {str(BENCHMARKS)!r}]\n"
+    processo = subprocess.run([sys.executable, *opcoes_python, "-c", preambulo + codigo],
+                              capture_output=True, text=True, cwd=RAIZ, check=True)
+    return json.loads(processo.stdout.strip().splitlines()[-1]), processo.stderr
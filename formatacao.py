@@ -0,0 +1,255 @@
+"""
+Formatação de valores no padrão brasileiro e definição do resumo da simulação.
+
+Usado tanto pela página Streamlit quanto pelo processamento em lote.
+As funções terminadas em "_vetor" formatam um array NumPy ou uma Series do
+pandas inteira de uma vez e produzem o mesmo texto que as versões escalares.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from motor import para_centavos
+
+
+# Função para formatar valores em reais no formato brasileiro (Versão Universal)
+def formatar_reais(valor):
+    """
+    Formata valor monetário no padrão brasileiro (R$ 1.234,56)
+    Funciona em Windows e Linux (Streamlit Cloud) sem depender de locale.
+    """
+    if valor is None or valor != valor:  # None ou NaN
+        return "R$ 0,00"
+
+    # 1. Formata com padrão americano: 1,234.56
+    valor_formatado = _sem_zero_negativo(f"{valor:,.2f}")
+
+    # 2. Inverte os separadores usando um caractere temporário (X)
+    # Vírgula (milhar) vira Ponto
+    # Ponto (decimal) vira Vírgula
+    valor_formatado = valor_formatado.replace(",", "X").replace(".", ",").replace("X", ".")
+
+    return f"R$ {valor_formatado}"
+
+# Função para formatar números (não moedas) caso precise
+def formatar_numero(valor, casas_decimais=2):
+    if valor is None or valor != valor:  # None ou NaN
+        valor = 0.0
+    format_str = f"{{:,.{casas_decimais}f}}"
+    v = _sem_zero_negativo(format_str.format(valor))
+    return v.replace(",", "X").replace(".", ",").replace("X", ".")
+
+def _sem_zero_negativo(texto):
+    """Valores negativos que arredondam para zero ("-0.00") viram "0.00" """
+    if texto.startswith("-") and not texto.strip("-0.,"):
+        return texto[1:]
+    return texto
+
+
+# ===== VERSÕES VETORIZADAS =====
+# Os grupos de milhar (0 a 999) e as casas decimais vêm de tabelas pré-montadas,
+# então o texto é montado por indexação e concatenação de arrays, sem laço em Python.
+_GRUPOS = np.array([str(i) for i in range(1000)])
+_GRUPOS_COM_ZEROS = np.array([f"{i:03d}" for i in range(1000)])
+
+
+@lru_cache(maxsize=None)
+def _tabela_decimais(casas_decimais):
+    """",00" a ",99" para 2 casas; "" quando não há casas decimais"""
+    if casas_decimais == 0:
+        return np.array([""])
+    return np.array([f",{i:0{casas_decimais}d}" for i in range(10 ** casas_decimais)])
+
+
+def _inteiros_para_texto(inteiros, separador_milhar):
+    """Converte um array de inteiros não negativos em texto, agrupando os milhares"""
+    com_separador = np.strings.add(separador_milhar, _GRUPOS_COM_ZEROS)
+    resto = inteiros
+    texto = np.where(resto >= 1000, com_separador[resto % 1000], _GRUPOS[resto % 1000])
+    resto = resto // 1000
+    while (resto > 0).any():
+        grupo = np.where(resto >= 1000, com_separador[resto % 1000], _GRUPOS[resto % 1000])
+        texto = np.where(resto > 0, np.strings.add(grupo, texto), texto)
+        resto = resto // 1000
+    return texto
+
+
+def _arredondar_como_format(valores, escala):
+    """
+    round(valor * escala) com o mesmo resultado do format() do Python.
+
+    O format() arredonda o valor binário exato; um simples np.rint(valor * escala)
+    erra quando o produto cai exatamente em x,5 por causa do arredondamento da
+    multiplicação (ex.: 0.005 -> "0.01"). O erro exato do produto (Dekker) desempata.
+    """
+    produto = valores * escala
+    unidades = np.floor(produto)
+    fracao = produto - unidades
+
+    # Divide os valores em parte alta/baixa (Veltkamp) para obter o erro exato do produto
+    auxiliar = valores * 134217729.0
+    alta = auxiliar - (auxiliar - valores)
+    baixa = valores - alta
+    erro = (alta * escala - produto) + baixa * escala
+
+    empate = fracao == 0.5
+    arredonda_para_cima = (fracao > 0.5) | (
+        empate & ((erro > 0) | ((erro == 0) & (unidades % 2 == 1)))
+    )
+    return unidades.astype(np.int64) + arredonda_para_cima
+
+
+# Acima disso (em unidades da última casa) o arredondamento não cabe em int64
+_MAXIMO_UNIDADES = 2.0 ** 62
+
+
+def _formatar_escalar(valor, casas_decimais, separador_milhar, prefixo):
+    """Um valor pelo format() do Python (infinitos e valores enormes), no mesmo padrão"""
+    agrupamento = "," if separador_milhar else ""
+    texto = _sem_zero_negativo(f"{valor:{agrupamento}.{casas_decimais}f}")
+    return prefixo + texto.replace(",", "X").replace(".", ",").replace("X", separador_milhar)
+
+
+def _formatar_vetor(valores, casas_decimais, separador_milhar, prefixo=""):
+    """Arredonda, separa parte inteira e decimais e monta o texto de todos os valores"""
+    valores = np.asarray(valores, dtype=np.float64)  # None vira NaN
+    valores = np.where(np.isnan(valores), 0.0, valores)
+
+    escala = 10 ** casas_decimais
+    fora = ~(np.abs(valores) < _MAXIMO_UNIDADES / escala)  # Infinitos e valores enormes
+    if fora.any():
+        texto = _formatar_vetor(np.where(fora, 0.0, valores), casas_decimais, separador_milhar, prefixo)
+        escalares = np.array([_formatar_escalar(valor, casas_decimais, separador_milhar, prefixo)
+                              for valor in valores[fora]])
+        texto = texto.astype(np.result_type(texto, escalares))
+        texto[fora] = escalares
+        return texto
+
+    unidades = _arredondar_como_format(np.abs(valores), escala)
+    negativo = (valores < 0) & (unidades > 0)
+
+    # O sinal fica depois do prefixo, como no formatar_reais: "R$ -1.234,56"
+    sinal = np.where(negativo, prefixo + "-", prefixo) if negativo.any() else prefixo
+    texto = np.strings.add(sinal, _inteiros_para_texto(unidades // escala, separador_milhar))
+    return np.strings.add(texto, _tabela_decimais(casas_decimais)[unidades % escala])
+
+
+def formatar_numero_vetor(valores, casas_decimais=2):
+    """Versão vetorizada de formatar_numero: array/Series -> array de textos"""
+    return _formatar_vetor(valores, casas_decimais, ".")
+
+
+def formatar_reais_vetor(valores):
+    """Versão vetorizada de formatar_reais: [1234.56, None] -> ["R$ 1.234,56", "R$ 0,00"]"""
+    return _formatar_vetor(valores, 2, ".", prefixo="R$ ")
+
+
+def formatar_percentual_vetor(valores, casas_decimais=1, razao=False):
+    """
+    Formata percentuais sem separador de milhar: 10.0 -> "10,0%".
+    Com razao=True o valor é uma fração (0.12 -> "12,00%" com 2 casas).
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    if razao:
+        valores = valores * 100
+    return np.strings.add(_formatar_vetor(valores, casas_decimais, ""), "%")
+
+
+# Linhas do "Resumo Completo da Simulação": (Descrição, coluna do motor, tipo de formatação)
+CAMPOS_RESUMO = [
+    ("Salário Mensal", "salario_mensal", "reais"),
+    ("Salário Anual estimado (14× incluindo PLR)", "salario_anual", "reais"),
+    ("Contribuição Básica A (%)", "contribuicao_basica_pct", "percentual"),
+    ("Contribuição Básica B (%)", "contribuicao_basica_outro_pct", "percentual"),
+    ("Contribuição Voluntária (%)", "contribuicao_voluntaria_pct", "percentual"),
+    ("Contribuição Voluntária (R$)", "contribuicao_voluntaria_valor", "reais"),
+    ("Quantidade de UR (fixo)", "quantidade_ur", "inteiro"),
+    ("Valor da UR (fixo)", "valor_ur", "reais"),
+    ("Valor total das UR", "total_ur", "reais"),
+    ("Contribuição Básica Mensal", "contribuicao_mensal_sem_voluntaria", "reais"),
+    ("Contribuição Mensal Total", "contribuicao_mensal_total", "reais"),
+    ("Contribuições no Ano", "quantidade_contribuicoes", "inteiro"),
+    ("Total Contribuído no Ano", "total_contribuicao_anual", "reais"),
+    ("Percentual Atual", "percentual_recolhido", "razao"),
+    ("Valor Esporádica Sugerido", "valor_ideal_esporadica", "reais"),
+    ("Valor Esporádica Personalizado", "valor_esporadica", "reais"),
+    ("Total Final Anual", "total_final", "reais"),
+    ("Percentual Final", "novo_percentual", "razao"),
+    ("Dedução no IRPF", "deducao_irpf", "reais"),
+    ("IRPF Estimado sem a Dedução", "irpf_sem_deducao", "reais"),
+    ("IRPF Estimado com a Dedução", "irpf_com_deducao", "reais"),
+    ("Economia Estimada no IRPF", "economia_irpf", "reais"),
+    ("Economia no IRPF por Real a mais de Esporádica", "economia_marginal_irpf", "razao"),
+]
+
+# Colunas da recomendação de menor custo para atingir o limite fiscal
+# (motor.otimizar_limite_centavos), acrescentadas ao resumo no lote com --recomendacao
+CAMPOS_RECOMENDACAO = [
+    ("Parcela B Recomendada (%)", "contribuicao_basica_outro_pct", "percentual"),
+    ("Voluntária Recomendada (%)", "contribuicao_voluntaria_pct", "percentual"),
+    ("Contribuição Mensal Recomendada", "contribuicao_mensal_total", "reais"),
+    ("Esporádica Recomendada", "valor_esporadica", "reais"),
+    ("Total Anual com a Recomendação", "total_final", "reais"),
+    ("Percentual com a Recomendação", "novo_percentual", "razao"),
+    ("Economia no IRPF com a Recomendação", "economia_irpf", "reais"),
+]
+
+
+# Resumo tipado: cada linha de CAMPOS_RESUMO preenche só a coluna do seu tipo, e a
+# formatação fica para a exibição (column_config na página, formatos do Excel)
+FORMATO_EXCEL = {"reais": '"R$" #,##0.00', "percentual": "0.0%", "razao": "0.00%", "inteiro": "0"}
+
+
+_DESCRICOES_RESUMO = [descricao for descricao, _, _ in CAMPOS_RESUMO]
+_TIPOS_RESUMO = np.array([tipo for _, _, tipo in CAMPOS_RESUMO])
+
+
+def resumo_tipado(resultado):
+    """
+    Resumo da simulação como registro numérico, uma linha por CAMPOS_RESUMO.
+
+    Colunas: "Descrição"; "Centavos" (Int64) para os valores em reais;
+    "Razão" (Float64) para percentuais e razões, sempre como fração (10,0% ->
+    0.10); "Quantidade" (Int64) para as contagens. As colunas que não são do
+    tipo da linha ficam vazias (<NA>).
+    """
+    valores = np.array([float(resultado[coluna]) for _, coluna, _ in CAMPOS_RESUMO])
+    reais = _TIPOS_RESUMO == "reais"
+    inteiros = _TIPOS_RESUMO == "inteiro"
+    razoes = ~(reais | inteiros)
+    fracoes = np.where(_TIPOS_RESUMO == "percentual", valores / 100, valores)
+    return pd.DataFrame({
+        "Descrição": _DESCRICOES_RESUMO,
+        "Centavos": pd.arrays.IntegerArray(para_centavos(np.where(reais, valores, 0.0)), ~reais),
+        "Razão": pd.arrays.FloatingArray(np.where(razoes, fracoes, 0.0), ~razoes),
+        "Quantidade": pd.arrays.IntegerArray(np.where(inteiros, valores, 0).astype(np.int64), ~inteiros),
+    })
+
+
+def formatar_campo(valor, tipo):
+    """Formata um valor do resumo conforme o tipo definido em CAMPOS_RESUMO"""
+    if tipo == "reais":
+        return formatar_reais(valor)
+    if tipo == "percentual":
+        # Percentual já em pontos (ex.: 10.0 -> "10,0%")
+        return f"{valor:.1f}%".replace(".", ",")
+    if tipo == "razao":
+        # Fração (ex.: 0.12 -> "12,00%")
+        return f"{valor:.2%}".replace(".", ",")
+    if tipo == "inteiro":
+        return f"{int(valor)}"
+    raise ValueError(f"Tipo de formatação desconhecido: {tipo}")
+
+
+def formatar_campo_vetor(valores, tipo):
+    """Versão vetorizada de formatar_campo para uma coluna inteira do resumo"""
+    if tipo == "reais":
+        return formatar_reais_vetor(valores)
+    if tipo == "percentual":
+        return formatar_percentual_vetor(valores, casas_decimais=1)
+    if tipo == "razao":
+        return formatar_percentual_vetor(valores, casas_decimais=2, razao=True)
+    if tipo == "inteiro":
+        return _formatar_vetor(valores, 0, "")
+    raise ValueError(f"Tipo de formatação desconhecido: {tipo}")
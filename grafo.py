@@ -0,0 +1,73 @@
+"""
+Recálculo incremental dos valores derivados da simulação na página.
+
+O grafo (motor.NOS_SIMULACAO) declara de quais nós cada valor depende. Aqui,
+os valores e as versões de cada nó ficam em um dicionário guardado na sessão
+(st.session_state), e cada leitura só recalcula um nó se a versão de alguma
+dependência mudou desde o último cálculo. Assim, mexer na voluntária não
+recalcula salário anual nem Parcela B, e um nó recalculado com o mesmo valor
+(ex.: Parcela B zerada abaixo do total das UR) não invalida os de baixo.
+
+O mesmo vale para o HTML dos cards: `html` só remonta o texto quando algum
+dos nós exibidos mudou de versão. Sem Streamlit: o estado é um dicionário.
+
+Uso:
+    grafo = GrafoIncremental(st.session_state.setdefault("grafo_simulacao", {}))
+    grafo.definir("salario_mensal", salario_mensal)
+    grafo.valor("total_contribuicao_anual")
+    st.markdown(grafo.html("card_total", ("total_contribuicao_anual",), montar_card), unsafe_allow_html=True)
+"""
+from motor import NOS_SIMULACAO
+
+
+def sem_dependentes_de(entrada, nos=NOS_SIMULACAO):
+    """Nós que não dependem (nem indiretamente) de `entrada`, na mesma ordem topológica"""
+    dependentes = {entrada}
+    for nome, (dependencias, _) in nos.items():
+        if dependentes.intersection(dependencias):
+            dependentes.add(nome)
+    return {nome: no for nome, no in nos.items() if nome not in dependentes}
+
+
+class GrafoIncremental:
+    """Valores (escalares, em float) dos nós com recálculo sob demanda, guardados em `estado`"""
+
+    def __init__(self, estado, nos=NOS_SIMULACAO):
+        self.nos = nos
+        self.valores = estado.setdefault("valores", {})
+        self.versoes = estado.setdefault("versoes", {})  # Nó -> versão do valor atual
+        self.origens = estado.setdefault("origens", {})  # Nó -> versões das dependências usadas no cálculo
+        self.cards = estado.setdefault("cards", {})  # Card -> (versões dos nós exibidos, HTML)
+
+    def definir(self, nome, valor):
+        """Atualiza uma entrada; a versão só muda se o valor mudou"""
+        if nome not in self.valores or self.valores[nome] != valor:
+            self.valores[nome] = valor
+            self.versoes[nome] = self.versoes.get(nome, 0) + 1
+
+    def valor(self, nome):
+        """Valor atual do nó, recalculando-o (e as dependências) só se preciso"""
+        if nome in self.nos:
+            self._atualizar(nome)
+        return self.valores[nome]
+
+    def versao(self, nome):
+        """Versão atual do nó (muda sempre que o valor muda)"""
+        self.valor(nome)
+        return self.versoes[nome]
+
+    def html(self, chave, nomes, montar):
+        """HTML do card `chave`, remontado por montar(*valores) só quando algum nó de `nomes` muda"""
+        versoes = tuple(self.versao(nome) for nome in nomes)
+        guardado = self.cards.get(chave)
+        if guardado is None or guardado[0] != versoes:
+            guardado = self.cards[chave] = (versoes, montar(*(self.valores[nome] for nome in nomes)))
+        return guardado[1]
+
+    def _atualizar(self, nome):
+        dependencias, formula = self.nos[nome]
+        versoes = tuple(self.versao(dependencia) for dependencia in dependencias)
+        if self.origens.get(nome) == versoes:
+            return
+        self.origens[nome] = versoes
+        self.definir(nome, float(formula(*(self.valores[dependencia] for dependencia in dependencias))))
@@ -0,0 +1,241 @@
+"""
+Histórico das simulações concluídas, gravado em banco de dados (SQLAlchemy).
+
+Ativado pela variável de ambiente SIMULADOR_DB_URL, com a URL do banco (ex.:
+sqlite:///historico_simulador.db ou postgresql://usuario@servidor/simulador).
+Quando desligado, `registrar()` não faz nada.
+
+Quando ligado, `registrar()` só coloca as entradas da simulação em uma fila,
+sem esperar o banco. Uma thread em segundo plano junta o que chegou (até
+TAMANHO_LOTE registros ou INTERVALO_GRAVACAO segundos), recalcula os
+resultados do lote de uma vez, em centavos (motor.calcular_simulacao_centavos),
+e grava tudo em um único INSERT de vários registros. Se a fila encher (banco
+lento ou fora do ar), os registros novos são descartados e contados, em vez de
+travar a página.
+
+A tabela tem índices pelo dia e pela tupla de entradas, para os relatórios
+(`volume_diario`, `distribuicao_esporadica`) e para achar simulações repetidas.
+
+Uso:
+    historico.registrar("nova_simulacao", entradas_simulacao)
+    python historico.py [--dias 30] [--faixa 1000]   # relatórios
+"""
+import argparse
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from motor import calcular_simulacao_centavos, para_centavos
+from parametros import parametros_do_ano
+
+URL_BANCO = os.environ.get("SIMULADOR_DB_URL", "")
+ATIVO = bool(URL_BANCO)
+TAMANHO_LOTE = 500  # Registros por INSERT
+INTERVALO_GRAVACAO = 1.0  # segundos que um registro espera por outros antes de ser gravado
+TAMANHO_FILA = 10_000  # Registros pendentes; acima disso, os novos são descartados
+
+logger = logging.getLogger("simulador.historico")
+
+_fila = queue.Queue(maxsize=TAMANHO_FILA)
+_trava = threading.Lock()
+_thread = None
+_descartados = 0
+
+
+def _tabela():
+    """Tabela "simulacoes" (SQLAlchemy Core); valores em dinheiro em centavos, como no motor"""
+    from sqlalchemy import (BigInteger, Boolean, Column, Date, DateTime, Float, Index, Integer, MetaData,
+                            SmallInteger, String, Table)
+
+    simulacoes = Table(
+        "simulacoes", MetaData(),
+        Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+        Column("criado_em", DateTime(timezone=True), nullable=False),
+        Column("dia", Date, nullable=False),
+        Column("evento", String(32), nullable=False),  # nova_simulacao, exportar_excel, exportar_pdf
+        Column("ano", SmallInteger, nullable=False),
+        Column("salario_mensal_centavos", BigInteger, nullable=False),
+        Column("parcela_b_pct", Float, nullable=False),
+        Column("voluntaria_pct", Float, nullable=False),
+        Column("quantidade_contribuicoes", SmallInteger, nullable=False),
+        Column("incluir_esporadica", Boolean, nullable=False),
+        Column("valor_esporadica_centavos", BigInteger, nullable=False),
+        Column("total_contribuicao_anual_centavos", BigInteger, nullable=False),
+        Column("total_final_centavos", BigInteger, nullable=False),
+        Column("novo_percentual", Float, nullable=False),
+        Column("economia_irpf_centavos", BigInteger, nullable=False),
+    )
+    Index("ix_simulacoes_dia", simulacoes.c.dia)
+    Index("ix_simulacoes_entradas", simulacoes.c.ano, simulacoes.c.salario_mensal_centavos,
+          simulacoes.c.parcela_b_pct, simulacoes.c.voluntaria_pct, simulacoes.c.quantidade_contribuicoes,
+          simulacoes.c.valor_esporadica_centavos)
+    return simulacoes
+
+
+def conectar(url=None):
+    """(engine, tabela) do banco em `url` (padrão: SIMULADOR_DB_URL), criando a tabela se preciso"""
+    from sqlalchemy import create_engine
+
+    engine = create_engine(url or URL_BANCO)
+    simulacoes = _tabela()
+    simulacoes.metadata.create_all(engine)
+    return engine, simulacoes
+
+
+def registrar(evento, entradas):
+    """
+    Enfileira uma simulação concluída para gravação (sem esperar o banco).
+
+    `entradas` é a tupla da página: (ano, salário, Parcela B, voluntária,
+    quantidade, incluir esporádica, valor da esporádica).
+    """
+    global _descartados
+    if not ATIVO or entradas is None:
+        return
+    _iniciar()
+    try:
+        _fila.put_nowait((datetime.now().astimezone(), evento, entradas))
+    except queue.Full:
+        with _trava:
+            _descartados += 1
+            if _descartados == 1 or _descartados % 1000 == 0:
+                logger.warning("Fila do histórico cheia: %d registros descartados", _descartados)
+
+
+def descarregar(tempo_maximo=5.0):
+    """Espera (até `tempo_maximo` segundos) a gravação do que já está na fila"""
+    limite = time.monotonic() + tempo_maximo
+    while _fila.unfinished_tasks and time.monotonic() < limite:
+        time.sleep(0.05)
+
+
+def _iniciar():
+    global _thread
+    if _thread is not None:
+        return
+    with _trava:
+        if _thread is None:
+            _thread = threading.Thread(target=_gravar_continuamente, name="historico-simulacoes", daemon=True)
+            _thread.start()
+            atexit.register(descarregar)
+
+
+def _gravar_continuamente():
+    engine = simulacoes = None
+    while True:
+        lote = [_fila.get()]
+        prazo = time.monotonic() + INTERVALO_GRAVACAO
+        while len(lote) < TAMANHO_LOTE:
+            try:
+                lote.append(_fila.get(timeout=max(prazo - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        try:
+            if engine is None:
+                engine, simulacoes = conectar()
+            with engine.begin() as conexao:
+                conexao.execute(simulacoes.insert(), _linhas(lote))
+        except Exception:
+            # O histórico nunca derruba a página: o lote se perde e a thread continua
+            logger.exception("Falha ao gravar %d simulações no histórico", len(lote))
+        finally:
+            for _ in lote:
+                _fila.task_done()
+
+
+def _linhas(lote):
+    """Registros do INSERT, com os resultados do lote calculados de uma vez (por ano das regras)"""
+    momentos, eventos, entradas = zip(*lote)
+    ano, salario, parcela_b, voluntaria, quantidade, incluir, esporadica = (np.array(c) for c in zip(*entradas))
+    ano = ano.astype(np.int64)
+    salario = para_centavos(salario)
+    esporadica = np.where(incluir.astype(bool), para_centavos(esporadica), 0)
+    resultado = {}
+    for valor in np.unique(ano):
+        linhas = np.flatnonzero(ano == valor)
+        parcial = calcular_simulacao_centavos(
+            salario[linhas], parcela_b[linhas], voluntaria[linhas], quantidade[linhas],
+            valor_esporadica_centavos=esporadica[linhas], incluir_esporadica=incluir[linhas].astype(bool),
+            parametros=parametros_do_ano(int(valor)),
+        )
+        for coluna in ("total_contribuicao_anual", "total_final", "novo_percentual", "economia_irpf"):
+            resultado.setdefault(coluna, np.empty(len(lote), dtype=parcial[coluna].dtype))[linhas] = parcial[coluna]
+
+    colunas = {
+        "criado_em": list(momentos),
+        "dia": [momento.date() for momento in momentos],
+        "evento": list(eventos),
+        "ano": ano.tolist(),
+        "salario_mensal_centavos": salario.tolist(),
+        "parcela_b_pct": parcela_b.astype(np.float64).tolist(),
+        "voluntaria_pct": voluntaria.astype(np.float64).tolist(),
+        "quantidade_contribuicoes": quantidade.astype(np.int64).tolist(),
+        "incluir_esporadica": incluir.astype(bool).tolist(),
+        "valor_esporadica_centavos": esporadica.tolist(),
+        "total_contribuicao_anual_centavos": resultado["total_contribuicao_anual"].tolist(),
+        "total_final_centavos": resultado["total_final"].tolist(),
+        "novo_percentual": resultado["novo_percentual"].tolist(),
+        "economia_irpf_centavos": resultado["economia_irpf"].tolist(),
+    }
+    return [dict(zip(colunas, valores)) for valores in zip(*colunas.values())]
+
+
+# ===== RELATÓRIOS =====
+def volume_diario(engine, simulacoes, dias=30):
+    """[(dia, evento, simulações)] dos últimos `dias` dias (usa o índice por dia)"""
+    from sqlalchemy import func, select
+
+    consulta = (select(simulacoes.c.dia, simulacoes.c.evento, func.count().label("simulacoes"))
+                .where(simulacoes.c.dia >= date.today() - timedelta(days=dias - 1))
+                .group_by(simulacoes.c.dia, simulacoes.c.evento)
+                .order_by(simulacoes.c.dia, simulacoes.c.evento))
+    with engine.connect() as conexao:
+        return conexao.execute(consulta).all()
+
+
+def distribuicao_esporadica(engine, simulacoes, faixa=1000.0, dias=30):
+    """[(início da faixa em reais, simulações)] das esporádicas escolhidas nos últimos `dias` dias"""
+    from sqlalchemy import func, select
+
+    largura = int(para_centavos(faixa))
+    inicio_faixa = (simulacoes.c.valor_esporadica_centavos // largura * largura).label("inicio_faixa")
+    consulta = (select(inicio_faixa, func.count().label("simulacoes"))
+                .where(simulacoes.c.dia >= date.today() - timedelta(days=dias - 1),
+                       simulacoes.c.incluir_esporadica)
+                .group_by(inicio_faixa)
+                .order_by(inicio_faixa))
+    with engine.connect() as conexao:
+        return [(centavos / 100, quantidade) for centavos, quantidade in conexao.execute(consulta)]
+
+
+def main(argv=None):
+    from formatacao import formatar_reais
+
+    parser = argparse.ArgumentParser(description="Relatórios do histórico de simulações.")
+    parser.add_argument("--url", default=URL_BANCO, help="URL do banco (padrão: SIMULADOR_DB_URL)")
+    parser.add_argument("--dias", type=int, default=30, help="Dias considerados (padrão: 30)")
+    parser.add_argument("--faixa", type=float, default=1000.0,
+                        help="Largura das faixas de esporádica, em reais (padrão: 1000)")
+    args = parser.parse_args(argv)
+    if not args.url:
+        parser.exit(1, "Erro: informe --url ou defina SIMULADOR_DB_URL\n")
+
+    engine, simulacoes = conectar(args.url)
+    print(f"Simulações por dia (últimos {args.dias} dias):")
+    for dia, evento, quantidade in volume_diario(engine, simulacoes, args.dias):
+        print(f"  {dia:%d/%m/%Y}  {evento:<16}{quantidade:>8}")
+    print(f"Esporádicas escolhidas (faixas de {formatar_reais(args.faixa)}):")
+    for inicio, quantidade in distribuicao_esporadica(engine, simulacoes, args.faixa, args.dias):
+        print(f"  a partir de {formatar_reais(inicio):>14}{quantidade:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""
+Medição do tempo de cada etapa dos reruns da página.
+
+Ativada pela variável de ambiente SIMULADOR_METRICAS=1. Quando desligada,
+`etapa()` devolve sempre o mesmo contexto vazio e nada é medido.
+
+Quando ligada, ao fim de cada rerun:
+- uma linha JSON com a duração de cada etapa vai para o logger "simulador.metricas";
+- os histogramas acumulados no processo, os acertos/falhas dos caches
+  compartilhados e a memória dos objetos mantidos pelas sessões (ver
+  `registrar_objetos`) são gravados, no formato texto do Prometheus, em
+  SIMULADOR_METRICAS_ARQUIVO (padrão: metricas_simulador.prom), no máximo
+  uma vez por segundo.
+
+Os fragmentos da página (st.fragment) decorados com `medir_fragmento` são
+medidos como um rerun próprio quando rodam sozinhos.
+
+Uso:
+    instrumentacao.iniciar_rerun()
+    with instrumentacao.etapa("calculo"):
+        ...
+    instrumentacao.finalizar_rerun()
+    instrumentacao.registrar_objetos("sessao", st.session_state)
+
+    @st.fragment
+    @instrumentacao.medir_fragmento
+    def secao(...): ...
+"""
+import contextlib
+import functools
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from io import BytesIO
+
+ATIVO = os.environ.get("SIMULADOR_METRICAS", "").lower() in ("1", "true", "sim")
+CAMINHO_METRICAS = os.environ.get("SIMULADOR_METRICAS_ARQUIVO", "metricas_simulador.prom")
+INTERVALO_PUBLICACAO = 1.0  # segundos
+MAX_SESSOES_OBJETOS = 10_000  # Sessões acompanhadas em `registrar_objetos` (as mais antigas saem)
+
+# Limites (em segundos) dos buckets dos histogramas
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("simulador.metricas")
+
+_CONTEXTO_VAZIO = contextlib.nullcontext()
+_rerun_atual = threading.local()  # Cada sessão do Streamlit roda o script em sua própria thread
+_trava = threading.Lock()
+_histogramas = {}  # etapa -> [contagens por bucket..., soma, total]
+_caches = {}  # cache -> [consultas, falhas]
+_objetos = OrderedDict()  # sessão -> {origem: {objeto: (id, bytes)}}
+_ultima_publicacao = 0.0
+
+
+def etapa(nome):
+    """Contexto que mede a duração de uma etapa (sem custo quando desligado)"""
+    if not ATIVO:
+        return _CONTEXTO_VAZIO
+    return _Medicao(nome)
+
+
+class _Medicao:
+    __slots__ = ("nome", "inicio")
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duracao = time.perf_counter() - self.inicio
+        etapas = getattr(_rerun_atual, "etapas", None)
+        if etapas is not None:
+            # Dentro de um rerun: soma as ocorrências da etapa e registra no final
+            etapas[self.nome] += duracao
+        else:
+            _registrar({self.nome: duracao})
+        return False
+
+
+def iniciar_rerun():
+    """Marca o início de um rerun do script"""
+    if not ATIVO:
+        return
+    _rerun_atual.inicio = time.perf_counter()
+    _rerun_atual.etapas = defaultdict(float)
+
+
+def finalizar_rerun(fragmento=None):
+    """
+    Registra as etapas do rerun atual, grava o log estruturado e publica as métricas.
+
+    Com `fragmento` (o rerun foi só desse fragmento), o tempo total vai para
+    a etapa "total_<fragmento>", separado do total dos reruns da página.
+    """
+    if not ATIVO or getattr(_rerun_atual, "etapas", None) is None:
+        return
+    etapas = dict(_rerun_atual.etapas)
+    etapas["total" if fragmento is None else f"total_{fragmento}"] = time.perf_counter() - _rerun_atual.inicio
+    _rerun_atual.etapas = None
+
+    _registrar(etapas)
+    evento = {"evento": "rerun"} if fragmento is None else {"evento": "rerun_fragmento", "fragmento": fragmento}
+    logger.info(json.dumps({
+        **evento,
+        "etapas_ms": {nome: round(duracao * 1000, 3) for nome, duracao in etapas.items()},
+    }))
+    _publicar()
+
+
+def medir_fragmento(funcao):
+    """
+    Decorador dos fragmentos da página (abaixo do @st.fragment).
+
+    Quando só o fragmento roda (interação com um widget dele), a execução é
+    envolvida por iniciar_rerun/finalizar_rerun, como o script inteiro; no
+    rerun da página, as etapas do fragmento somam no rerun da página.
+    """
+    if not ATIVO:
+        return funcao
+
+    @functools.wraps(funcao)
+    def medido(*args, **kwargs):
+        if not _so_fragmentos():
+            return funcao(*args, **kwargs)
+        iniciar_rerun()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            finalizar_rerun(fragmento=funcao.__name__)
+
+    return medido
+
+
+def _so_fragmentos():
+    """Se a execução atual do script é só de fragmentos (e não da página inteira)"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    contexto = get_script_run_ctx()
+    return contexto is not None and bool(contexto.fragment_ids_this_run)
+
+
+def contar_consulta_cache(cache):
+    """Conta uma consulta ao cache (acertos = consultas - falhas)"""
+    if ATIVO:
+        with _trava:
+            _caches.setdefault(cache, [0, 0])[0] += 1
+
+
+def contar_falha_cache(cache):
+    """Conta uma consulta que não encontrou o valor no cache e precisou calcular"""
+    if ATIVO:
+        with _trava:
+            _caches.setdefault(cache, [0, 0])[1] += 1
+
+
+def registrar_objetos(origem, objetos):
+    """
+    Registra o tamanho dos objetos que a sessão atual mantém em `origem`
+    ("sessao" para o session_state, ou um trecho do script), substituindo o
+    registro anterior da mesma origem.
+
+    Objetos compartilhados entre sessões (como os do st.cache_resource) são
+    identificados pelo id e contados uma única vez no total da memória.
+    """
+    if not ATIVO:
+        return
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    contexto = get_script_run_ctx()
+    sessao = contexto.session_id if contexto is not None else ""
+    tamanhos = {str(nome): (id(objeto), tamanho_objeto(objeto)) for nome, objeto in dict(objetos).items()}
+    with _trava:
+        _objetos.setdefault(sessao, {})[origem] = tamanhos
+        _objetos.move_to_end(sessao)
+        while len(_objetos) > MAX_SESSOES_OBJETOS:
+            _objetos.popitem(last=False)
+    _publicar()
+
+
+def tamanho_objeto(objeto, _vistos=None):
+    """Estimativa dos bytes ocupados pelo objeto e pelo que ele contém"""
+    vistos = set() if _vistos is None else _vistos
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+    if hasattr(objeto, "memory_usage") and hasattr(objeto, "columns"):  # DataFrame
+        return int(objeto.memory_usage(index=True, deep=True).sum())
+    if hasattr(objeto, "nbytes") and hasattr(objeto, "dtype"):  # Array do NumPy
+        return sys.getsizeof(objeto) + (objeto.nbytes if objeto.base is None else 0)
+    if isinstance(objeto, BytesIO):
+        with objeto.getbuffer() as conteudo:
+            return sys.getsizeof(objeto) + conteudo.nbytes
+    if isinstance(objeto, dict):
+        return sys.getsizeof(objeto) + sum(
+            tamanho_objeto(chave, vistos) + tamanho_objeto(valor, vistos) for chave, valor in objeto.items()
+        )
+    if isinstance(objeto, (list, tuple, set, frozenset)):
+        return sys.getsizeof(objeto) + sum(tamanho_objeto(item, vistos) for item in objeto)
+    return sys.getsizeof(objeto)
+
+
+def _registrar(etapas):
+    with _trava:
+        for nome, duracao in etapas.items():
+            histograma = _histogramas.setdefault(nome, [0] * len(BUCKETS) + [0.0, 0])
+            for i, limite in enumerate(BUCKETS):
+                if duracao <= limite:
+                    histograma[i] += 1
+            histograma[-2] += duracao
+            histograma[-1] += 1
+
+
+def texto_prometheus():
+    """Histogramas acumulados no formato de exposição em texto do Prometheus"""
+    linhas = [
+        "# HELP simulador_etapa_duracao_segundos Duração de cada etapa do rerun da página",
+        "# TYPE simulador_etapa_duracao_segundos histogram",
+    ]
+    with _trava:
+        for nome, histograma in sorted(_histogramas.items()):
+            for limite, contagem in zip(BUCKETS, histograma):
+                linhas.append(f'simulador_etapa_duracao_segundos_bucket{{etapa="{nome}",le="{limite}"}} {contagem}')
+            linhas.append(f'simulador_etapa_duracao_segundos_bucket{{etapa="{nome}",le="+Inf"}} {histograma[-1]}')
+            linhas.append(f'simulador_etapa_duracao_segundos_sum{{etapa="{nome}"}} {histograma[-2]:.6f}')
+            linhas.append(f'simulador_etapa_duracao_segundos_count{{etapa="{nome}"}} {histograma[-1]}')
+        if _caches:
+            linhas += [
+                "# HELP simulador_cache_consultas_total Consultas aos caches compartilhados entre sessões",
+                "# TYPE simulador_cache_consultas_total counter",
+            ]
+            for cache, (consultas, falhas) in sorted(_caches.items()):
+                linhas.append(f'simulador_cache_consultas_total{{cache="{cache}",resultado="acerto"}} {consultas - falhas}')
+                linhas.append(f'simulador_cache_consultas_total{{cache="{cache}",resultado="falha"}} {falhas}')
+        if _objetos:
+            linhas += _linhas_objetos()
+    return "\n".join(linhas) + "\n"
+
+
+def _linhas_objetos():
+    """Memória por objeto somada entre as sessões (chamada com a trava)"""
+    unicos = defaultdict(dict)  # (origem, objeto) -> {id: bytes}
+    referenciados = defaultdict(int)
+    sessoes = defaultdict(int)
+    for registros in _objetos.values():
+        for origem, tamanhos in registros.items():
+            for nome, (identificador, tamanho) in tamanhos.items():
+                unicos[origem, nome][identificador] = tamanho
+                referenciados[origem, nome] += tamanho
+                sessoes[origem, nome] += 1
+    linhas = [
+        "# HELP simulador_memoria_objetos_bytes Memória dos objetos mantidos pelas sessões, "
+        "com cada objeto compartilhado contado uma vez",
+        "# TYPE simulador_memoria_objetos_bytes gauge",
+    ]
+    for (origem, nome), tamanhos in sorted(unicos.items()):
+        linhas.append(f'simulador_memoria_objetos_bytes{{origem="{origem}",objeto="{nome}"}} {sum(tamanhos.values())}')
+    linhas += [
+        "# HELP simulador_memoria_objetos_referenciados_bytes Soma, por sessão, da memória dos objetos que ela referencia",
+        "# TYPE simulador_memoria_objetos_referenciados_bytes gauge",
+    ]
+    for (origem, nome), tamanho in sorted(referenciados.items()):
+        linhas.append(f'simulador_memoria_objetos_referenciados_bytes{{origem="{origem}",objeto="{nome}"}} {tamanho}')
+    linhas += [
+        "# HELP simulador_memoria_objetos_sessoes Sessões que mantêm o objeto",
+        "# TYPE simulador_memoria_objetos_sessoes gauge",
+    ]
+    for (origem, nome), quantidade in sorted(sessoes.items()):
+        linhas.append(f'simulador_memoria_objetos_sessoes{{origem="{origem}",objeto="{nome}"}} {quantidade}')
+    return linhas
+
+
+def _publicar():
+    """Grava o arquivo de métricas (substituição atômica), no máximo uma vez por intervalo"""
+    global _ultima_publicacao
+    agora = time.monotonic()
+    if agora - _ultima_publicacao < INTERVALO_PUBLICACAO:
+        return
+    _ultima_publicacao = agora
+
+    diretorio = os.path.dirname(os.path.abspath(CAMINHO_METRICAS))
+    temporario = None
+    try:
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+        with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto_prometheus())
+        os.replace(temporario, CAMINHO_METRICAS)
+        temporario = None
+    except OSError:
+        logger.exception("Não foi possível gravar as métricas em %s", CAMINHO_METRICAS)
+    finally:
+        if temporario is not None:  # A gravação ou a substituição falhou: não deixa o .tmp para trás
+            with contextlib.suppress(OSError):
+                os.remove(temporario)
+
+
+if ATIVO and not logger.handlers:
+    # Sem configuração externa de logging, as linhas JSON vão para o stderr
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
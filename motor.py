@@ -0,0 +1,464 @@
+"""
+Motor de cálculo do Simulador de Contribuição Esporádica - FRG.
+
+Todas as fórmulas da simulação ficam aqui, sem dependência do Streamlit,
+para que a página e os processamentos em lote usem exatamente as mesmas contas.
+As entradas podem ser escalares, arrays NumPy ou Series do pandas. Os valores
+que mudam de um ano para outro (UR, limite fiscal...) vêm de `parametros`.
+"""
+import numpy as np
+
+from parametros import parametros_do_ano
+
+# Regras fixas do regulamento
+CONTRIBUICAO_BASICA_PCT = 2.0  # Parcela A
+MESES_SALARIO_ANUAL = 14  # 14× incluindo PLR
+
+
+def calcular_simulacao(salario_mensal, contribuicao_basica_outro_pct,
+                       contribuicao_voluntaria_pct, quantidade_contribuicoes,
+                       valor_esporadica=0.0, incluir_esporadica=True, parametros=None):
+    """
+    Calcula todas as colunas derivadas da simulação em uma única passada vetorizada.
+
+    Os percentuais são informados como na tela (ex.: 10.0 para 10%).
+    `parametros` é um ParametrosPlano; sem ele, valem os do ano mais recente.
+    Retorna um dicionário {nome_da_coluna: np.ndarray}; entradas escalares
+    geram arrays de dimensão zero (use float(...) para obter o valor).
+    """
+    (salario_mensal, contribuicao_basica_outro_pct, contribuicao_voluntaria_pct,
+     quantidade_contribuicoes, valor_esporadica, incluir_esporadica) = np.broadcast_arrays(
+        np.asarray(salario_mensal, dtype=np.float64),
+        np.asarray(contribuicao_basica_outro_pct, dtype=np.float64),
+        np.asarray(contribuicao_voluntaria_pct, dtype=np.float64),
+        _quantidades(quantidade_contribuicoes),
+        np.asarray(valor_esporadica, dtype=np.float64),
+        np.asarray(incluir_esporadica, dtype=bool),
+    )
+    parametros = parametros or parametros_do_ano()
+    valores = avaliar_grafo({
+        "parametros": parametros,
+        "salario_mensal": salario_mensal,
+        "contribuicao_basica_outro_pct": contribuicao_basica_outro_pct,
+        "contribuicao_voluntaria_pct": contribuicao_voluntaria_pct,
+        "quantidade_contribuicoes": quantidade_contribuicoes,
+        "valor_esporadica": np.where(incluir_esporadica, valor_esporadica, 0.0),
+    })
+    salario_anual = valores["salario_anual"]
+    total_final = valores["total_final"]
+
+    # Imposto de renda: estimativa com a tabela anual do IRPF sobre o salário anual,
+    # sem e com a dedução das contribuições (limitada ao percentual máximo)
+    limite_deducao = parametros.percentual_maximo * salario_anual
+    deducao_irpf = np.minimum(total_final, limite_deducao)
+    irpf_sem_deducao, _ = calcular_irpf(salario_anual, parametros)
+    irpf_com_deducao, aliquota_marginal = calcular_irpf(salario_anual - deducao_irpf, parametros)
+    # Cada real a mais de esporádica reduz a base na alíquota da faixa atual, até o limite
+    economia_marginal_irpf = np.where(total_final < limite_deducao, aliquota_marginal, 0.0)
+
+    return {
+        "salario_mensal": salario_mensal,
+        "salario_anual": salario_anual,
+        "contribuicao_basica_pct": np.full_like(salario_mensal, CONTRIBUICAO_BASICA_PCT),
+        "contribuicao_basica_outro_pct": contribuicao_basica_outro_pct,
+        "contribuicao_voluntaria_pct": contribuicao_voluntaria_pct,
+        "valor_basica": valores["valor_basica"],
+        "valor_outro": valores["valor_outro"],
+        "contribuicao_voluntaria_valor": valores["contribuicao_voluntaria_valor"],
+        "quantidade_ur": np.full_like(quantidade_contribuicoes, parametros.quantidade_ur),
+        "valor_ur": np.full_like(salario_mensal, parametros.valor_ur),
+        "total_ur": np.full_like(salario_mensal, parametros.total_ur),
+        "contribuicao_mensal_sem_voluntaria": valores["contribuicao_mensal_sem_voluntaria"],
+        "contribuicao_mensal_total": valores["contribuicao_mensal_total"],
+        "quantidade_contribuicoes": quantidade_contribuicoes,
+        "total_contribuicao_anual": valores["total_contribuicao_anual"],
+        "percentual_recolhido": valores["percentual_recolhido"],
+        "valor_minimo_esporadica": np.full_like(salario_mensal, parametros.valor_minimo_esporadica),
+        "valor_maximo_esporadica": valores["valor_maximo_esporadica"],
+        "valor_ideal_esporadica": valores["valor_ideal_esporadica"],
+        "valor_esporadica": valores["valor_esporadica"],
+        "total_final": total_final,
+        "novo_percentual": valores["novo_percentual"],
+        "progresso": valores["progresso"],
+        "deducao_irpf": deducao_irpf,
+        "irpf_sem_deducao": irpf_sem_deducao,
+        "irpf_com_deducao": irpf_com_deducao,
+        "economia_irpf": irpf_sem_deducao - irpf_com_deducao,
+        "economia_marginal_irpf": economia_marginal_irpf,
+    }
+
+
+def calcular_irpf(base_anual, parametros):
+    """
+    IRPF anual pela tabela progressiva do ano de `parametros`.
+
+    O imposto é o maior valor de base × alíquota − parcela a deduzir entre as
+    faixas (a tabela é contínua, então a faixa que dá o maior valor é a da
+    base), calculado para todas as bases de uma vez. Retorna (imposto,
+    alíquota marginal); no limite entre duas faixas vale a menor alíquota.
+    """
+    base_anual = np.asarray(base_anual, dtype=np.float64)
+    por_faixa = base_anual[..., np.newaxis] * parametros.aliquotas_irpf - parametros.deducoes_irpf
+    faixa = por_faixa.argmax(axis=-1)
+    imposto = np.maximum(np.take_along_axis(por_faixa, faixa[..., np.newaxis], axis=-1)[..., 0], 0.0)
+    return imposto, parametros.aliquotas_irpf[faixa]
+
+
+def _quantidades(quantidade_contribuicoes):
+    """
+    Quantidades de contribuições como int64.
+
+    Levanta ValueError se alguma não for um número inteiro, em vez de truncá-la
+    (12.7 viraria 12 contribuições).
+    """
+    valores = np.asarray(quantidade_contribuicoes)
+    if valores.dtype.kind == "f":
+        inteiras = np.isfinite(valores) & (valores == np.trunc(valores))
+        if not inteiras.all():
+            invalida = valores[~inteiras].flat[0]
+            raise ValueError(f"A quantidade de contribuições no ano deve ser um número inteiro: {invalida:g}")
+    return valores.astype(np.int64)
+
+
+def _dividir_ou_zero(numerador, denominador):
+    """Divide elemento a elemento, retornando 0 onde o denominador não é positivo"""
+    numerador, denominador = np.broadcast_arrays(numerador, denominador)
+    resultado = np.zeros(numerador.shape, dtype=np.float64)
+    np.divide(numerador, denominador, out=resultado, where=denominador > 0)
+    return resultado
+
+
+# ===== GRAFO DAS COLUNAS DERIVADAS =====
+# Cada coluna derivada é um nó: (nós de que depende, fórmula sobre os valores
+# desses nós). As fórmulas valem para escalares e arrays: calcular_simulacao
+# avalia o grafo inteiro de uma vez, vetorizado, e a página (grafo.py) reavalia
+# só os nós abaixo da entrada que mudou. Entradas do grafo: parametros,
+# salario_mensal, contribuicao_basica_outro_pct, contribuicao_voluntaria_pct,
+# quantidade_contribuicoes e valor_esporadica (zero se não incluída).
+# Declarados em ordem topológica: cada nó vem depois dos nós de que depende.
+NOS_SIMULACAO = {
+    "salario_anual": (("salario_mensal",), lambda salario: salario * MESES_SALARIO_ANUAL),
+
+    # Contribuição básica = Parcela A + Parcela B (Item 5.1.1 do Regulamento)
+    "valor_basica": (("salario_mensal",), lambda salario: salario * (CONTRIBUICAO_BASICA_PCT / 100)),
+    # Base da Parcela B: a parte do salário acima do total das UR
+    "valor_base": (
+        ("salario_mensal", "parametros"),
+        lambda salario, parametros: np.where(salario < parametros.total_ur, 0.0, salario - parametros.total_ur),
+    ),
+    "valor_outro": (("valor_base", "contribuicao_basica_outro_pct"), lambda base, pct: base * (pct / 100)),
+    "contribuicao_mensal_sem_voluntaria": (("valor_basica", "valor_outro"), lambda basica, outro: basica + outro),
+
+    # Contribuição voluntária (Item 5.1.2 do Regulamento)
+    "contribuicao_voluntaria_valor": (
+        ("salario_mensal", "contribuicao_voluntaria_pct"), lambda salario, pct: salario * pct / 100,
+    ),
+    "contribuicao_mensal_total": (
+        ("contribuicao_mensal_sem_voluntaria", "contribuicao_voluntaria_valor"),
+        lambda sem_voluntaria, voluntaria: sem_voluntaria + voluntaria,
+    ),
+
+    # Total anual e percentual
+    "total_contribuicao_anual": (
+        ("contribuicao_mensal_total", "quantidade_contribuicoes"), lambda mensal, quantidade: mensal * quantidade,
+    ),
+    "percentual_recolhido": (
+        ("total_contribuicao_anual", "salario_anual"),
+        lambda anual, salario_anual: _dividir_ou_zero(anual, salario_anual),
+    ),
+
+    # Contribuição esporádica
+    "valor_maximo_esporadica": (
+        ("salario_mensal", "parametros"),
+        lambda salario, parametros: salario * parametros.multiplicador_maximo_esporadica,
+    ),
+    "valor_ideal_esporadica": (
+        ("percentual_recolhido", "salario_anual", "parametros"),
+        lambda percentual, salario_anual, parametros: (parametros.percentual_maximo - percentual) * salario_anual,
+    ),
+
+    # Cálculos finais
+    "total_final": (("total_contribuicao_anual", "valor_esporadica"), lambda anual, esporadica: anual + esporadica),
+    "novo_percentual": (
+        ("total_final", "salario_anual"),
+        lambda total_final, salario_anual: _dividir_ou_zero(total_final, salario_anual),
+    ),
+    "progresso": (
+        ("novo_percentual", "parametros"),
+        lambda novo_percentual, parametros: np.minimum(novo_percentual / parametros.percentual_maximo, 1.0),
+    ),
+}
+
+
+def avaliar_grafo(entradas, nos=NOS_SIMULACAO):
+    """Valores de todos os nós a partir das entradas (dicionário com entradas e nós)"""
+    valores = dict(entradas)
+    for nome, (dependencias, formula) in nos.items():
+        valores[nome] = formula(*(valores[dependencia] for dependencia in dependencias))
+    return valores
+
+
+# ===== CAMINHO EM CENTAVOS =====
+# As mesmas fórmulas com dinheiro em centavos (int64) e percentuais em pontos-base
+# (centésimos de ponto percentual: 10,0% -> 1000), sem float nos valores monetários.
+# Regra de arredondamento: cada valor obtido por percentual ou multiplicador é
+# arredondado para o centavo mais próximo, com empate para longe do zero
+# (arredondamento comercial), no ponto em que a folha arredonda: a contribuição
+# mensal. Totais anuais são somas e produtos exatos desses centavos. Razões
+# (percentuais do salário, progresso, alíquota marginal) continuam em float.
+
+# Colunas do resultado de calcular_simulacao_centavos que estão em centavos
+CAMPOS_CENTAVOS = (
+    "salario_mensal", "salario_anual", "valor_basica", "valor_outro", "contribuicao_voluntaria_valor",
+    "valor_ur", "total_ur", "contribuicao_mensal_sem_voluntaria", "contribuicao_mensal_total",
+    "total_contribuicao_anual", "valor_minimo_esporadica", "valor_maximo_esporadica",
+    "valor_ideal_esporadica", "valor_esporadica", "total_final", "deducao_irpf",
+    "irpf_sem_deducao", "irpf_com_deducao", "economia_irpf",
+)
+_ESCALA_PONTOS_BASE = 10_000  # 100% em pontos-base
+
+
+def para_centavos(valor_em_reais):
+    """
+    Reais (float) -> centavos (int64), pelo centavo mais próximo.
+
+    Levanta ValueError para NaN, infinito ou valores fora do int64, que a
+    conversão transformaria silenciosamente em centavos sem sentido.
+    """
+    centavos = np.rint(np.asarray(valor_em_reais, dtype=np.float64) * 100)
+    if not np.all(np.abs(centavos) < 2.0 ** 63):
+        raise ValueError("Valor em reais vazio, infinito ou grande demais para centavos")
+    return centavos.astype(np.int64)
+
+
+def em_reais(resultado):
+    """Resultado de calcular_simulacao_centavos com os valores monetários em reais (float)"""
+    return {coluna: valores / 100 if coluna in CAMPOS_CENTAVOS else valores
+            for coluna, valores in resultado.items()}
+
+
+def _pontos_base(fracao):
+    """Fração (0.12) -> pontos-base inteiros (1200)"""
+    return np.rint(np.asarray(fracao, dtype=np.float64) * _ESCALA_PONTOS_BASE).astype(np.int64)
+
+
+def _aplicar_pontos_base(centavos, pontos_base):
+    """centavos × pontos-base / 10.000, arredondado para o centavo mais próximo (empate longe do zero)"""
+    produto = centavos * pontos_base
+    quociente = (2 * np.abs(produto) + _ESCALA_PONTOS_BASE) // (2 * _ESCALA_PONTOS_BASE)
+    return np.where(produto < 0, -quociente, quociente)
+
+
+def calcular_irpf_centavos(base_anual_centavos, parametros):
+    """calcular_irpf com a base e o imposto em centavos; retorna (imposto, alíquota marginal)"""
+    base = np.asarray(base_anual_centavos, dtype=np.int64)
+    aliquotas = _pontos_base(parametros.aliquotas_irpf)
+    por_faixa = (base[..., np.newaxis] * aliquotas
+                 - para_centavos(parametros.deducoes_irpf) * _ESCALA_PONTOS_BASE)  # Em centavos × pontos-base
+    faixa = por_faixa.argmax(axis=-1)
+    maior = np.take_along_axis(por_faixa, faixa[..., np.newaxis], axis=-1)[..., 0]
+    imposto = np.maximum(_aplicar_pontos_base(maior, 1), 0)
+    return imposto, parametros.aliquotas_irpf[faixa]
+
+
+def calcular_simulacao_centavos(salario_mensal_centavos, contribuicao_basica_outro_pct,
+                                contribuicao_voluntaria_pct, quantidade_contribuicoes,
+                                valor_esporadica_centavos=0, incluir_esporadica=True, parametros=None):
+    """
+    calcular_simulacao em aritmética inteira de centavos.
+
+    Salário e esporádica entram em centavos (ver `para_centavos`); os
+    percentuais, como na tela (10.0 para 10%), são convertidos para
+    pontos-base. Retorna as mesmas colunas de calcular_simulacao, com as de
+    CAMPOS_CENTAVOS em centavos int64 (ver `em_reais`).
+    """
+    (salario_mensal, contribuicao_basica_outro_pct, contribuicao_voluntaria_pct,
+     quantidade_contribuicoes, valor_esporadica, incluir_esporadica) = np.broadcast_arrays(
+        np.asarray(salario_mensal_centavos, dtype=np.int64),
+        np.asarray(contribuicao_basica_outro_pct, dtype=np.float64),
+        np.asarray(contribuicao_voluntaria_pct, dtype=np.float64),
+        _quantidades(quantidade_contribuicoes),
+        np.asarray(valor_esporadica_centavos, dtype=np.int64),
+        np.asarray(incluir_esporadica, dtype=bool),
+    )
+    parametros = parametros or parametros_do_ano()
+    percentual_maximo = _pontos_base(parametros.percentual_maximo)
+
+    valor_ur = para_centavos(parametros.valor_ur)
+    total_ur = parametros.quantidade_ur * valor_ur
+    salario_anual = salario_mensal * MESES_SALARIO_ANUAL
+
+    # Contribuição básica = Parcela A + Parcela B (Item 5.1.1 do Regulamento)
+    valor_basica = _aplicar_pontos_base(salario_mensal, _pontos_base(CONTRIBUICAO_BASICA_PCT / 100))
+    valor_outro = np.where(salario_mensal < total_ur, 0,
+                           _aplicar_pontos_base(salario_mensal - total_ur, _pontos_base(contribuicao_basica_outro_pct / 100)))
+    contribuicao_mensal_sem_voluntaria = valor_basica + valor_outro
+
+    # Contribuição voluntária (Item 5.1.2 do Regulamento)
+    contribuicao_voluntaria_valor = _aplicar_pontos_base(salario_mensal, _pontos_base(contribuicao_voluntaria_pct / 100))
+    contribuicao_mensal_total = contribuicao_mensal_sem_voluntaria + contribuicao_voluntaria_valor
+
+    # Total anual e percentual
+    total_contribuicao_anual = contribuicao_mensal_total * quantidade_contribuicoes
+    percentual_recolhido = _dividir_ou_zero(total_contribuicao_anual, salario_anual)
+
+    # Contribuição esporádica
+    limite_deducao = _aplicar_pontos_base(salario_anual, percentual_maximo)
+    valor_minimo_esporadica = np.full_like(salario_mensal, _aplicar_pontos_base(
+        valor_ur, _pontos_base(parametros.multiplicador_minimo_esporadica)))
+    valor_maximo_esporadica = _aplicar_pontos_base(
+        salario_mensal, _pontos_base(parametros.multiplicador_maximo_esporadica))
+    valor_ideal_esporadica = limite_deducao - total_contribuicao_anual
+    valor_esporadica = np.where(incluir_esporadica, valor_esporadica, 0)
+
+    # Cálculos finais
+    total_final = total_contribuicao_anual + valor_esporadica
+    novo_percentual = _dividir_ou_zero(total_final, salario_anual)
+    progresso = np.minimum(_dividir_ou_zero(total_final, limite_deducao), 1.0)
+
+    # Imposto de renda (mesma estimativa de calcular_simulacao)
+    deducao_irpf = np.minimum(total_final, limite_deducao)
+    irpf_sem_deducao, _ = calcular_irpf_centavos(salario_anual, parametros)
+    irpf_com_deducao, aliquota_marginal = calcular_irpf_centavos(salario_anual - deducao_irpf, parametros)
+    economia_marginal_irpf = np.where(total_final < limite_deducao, aliquota_marginal, 0.0)
+
+    return {
+        "salario_mensal": salario_mensal,
+        "salario_anual": salario_anual,
+        "contribuicao_basica_pct": np.full(salario_mensal.shape, CONTRIBUICAO_BASICA_PCT),
+        "contribuicao_basica_outro_pct": contribuicao_basica_outro_pct,
+        "contribuicao_voluntaria_pct": contribuicao_voluntaria_pct,
+        "valor_basica": valor_basica,
+        "valor_outro": valor_outro,
+        "contribuicao_voluntaria_valor": contribuicao_voluntaria_valor,
+        "quantidade_ur": np.full_like(quantidade_contribuicoes, parametros.quantidade_ur),
+        "valor_ur": np.full_like(salario_mensal, valor_ur),
+        "total_ur": np.full_like(salario_mensal, total_ur),
+        "contribuicao_mensal_sem_voluntaria": contribuicao_mensal_sem_voluntaria,
+        "contribuicao_mensal_total": contribuicao_mensal_total,
+        "quantidade_contribuicoes": quantidade_contribuicoes,
+        "total_contribuicao_anual": total_contribuicao_anual,
+        "percentual_recolhido": percentual_recolhido,
+        "valor_minimo_esporadica": valor_minimo_esporadica,
+        "valor_maximo_esporadica": valor_maximo_esporadica,
+        "valor_ideal_esporadica": valor_ideal_esporadica,
+        "valor_esporadica": valor_esporadica,
+        "total_final": total_final,
+        "novo_percentual": novo_percentual,
+        "progresso": progresso,
+        "deducao_irpf": deducao_irpf,
+        "irpf_sem_deducao": irpf_sem_deducao,
+        "irpf_com_deducao": irpf_com_deducao,
+        "economia_irpf": irpf_sem_deducao - irpf_com_deducao,
+        "economia_marginal_irpf": economia_marginal_irpf,
+    }
+
+
+# ===== COMBINAÇÃO DE MENOR CUSTO PARA O LIMITE FISCAL =====
+# Dado o salário e a quantidade de contribuições no ano, escolhe Parcela B e
+# voluntária (nos passos dos sliders) e a esporádica (zero ou entre o mínimo e o
+# máximo do regulamento) que chegam ao limite fiscal pagando o menor total no ano.
+# Em centavos, com os mesmos arredondamentos de calcular_simulacao_centavos.
+#
+# Para cada voluntária, o total anual só cresce com a Parcela B, e o custo de
+# cada Parcela B é: o próprio total anual, se já atinge o limite; o limite
+# exato, se a diferença cabe na faixa da esporádica; o total mais a esporádica
+# mínima, se a diferença é menor que o mínimo. Por isso bastam três candidatas
+# por voluntária, achadas invertendo o arredondamento (sem percorrer a grade):
+# a maior Parcela B que ainda deixa espaço para a esporádica mínima, a seguinte
+# e a menor que atinge o limite sem esporádica.
+PARCELA_B_MINIMA = 4.5
+PARCELA_B_MAXIMA = 10.0
+PASSO_PARCELA_B = 0.5
+VOLUNTARIA_MAXIMA = 10.0
+PASSO_VOLUNTARIA = 1.0
+
+
+def otimizar_limite_centavos(salario_mensal_centavos, quantidade_contribuicoes, parametros=None):
+    """
+    Combinação de Parcela B, voluntária e esporádica que atinge o limite fiscal com o menor custo.
+
+    O custo é o total pago no ano (contribuição mensal × quantidade de
+    contribuições + esporádica). Empates vão para a menor esporádica, depois
+    para a menor voluntária e a menor Parcela B. Quem não alcança o limite nem
+    com tudo no máximo recebe o máximo. Retorna as colunas de
+    calcular_simulacao_centavos para a combinação escolhida, mais
+    "atinge_limite" (bool).
+    """
+    salario_mensal, quantidade_contribuicoes = np.broadcast_arrays(
+        np.asarray(salario_mensal_centavos, dtype=np.int64),
+        _quantidades(quantidade_contribuicoes),
+    )
+    parametros = parametros or parametros_do_ano()
+    minimo = calcular_simulacao_centavos(salario_mensal, PARCELA_B_MINIMA, 0.0, quantidade_contribuicoes,
+                                         incluir_esporadica=False, parametros=parametros)
+    limite_deducao = minimo["valor_ideal_esporadica"] + minimo["total_contribuicao_anual"]
+
+    # Eixos: (participantes..., voluntária, candidata)
+    def por_participante(valores):
+        return valores[..., np.newaxis, np.newaxis]
+
+    quantidade = por_participante(quantidade_contribuicoes)
+    limite = por_participante(limite_deducao)
+    esporadica_minima = por_participante(minimo["valor_minimo_esporadica"])
+    esporadica_maxima = por_participante(minimo["valor_maximo_esporadica"])
+    base_outro = por_participante(np.maximum(salario_mensal - minimo["total_ur"], 0))
+    voluntarias = np.arange(0.0, VOLUNTARIA_MAXIMA + PASSO_VOLUNTARIA / 2, PASSO_VOLUNTARIA)
+    # Contribuição mensal sem a Parcela B, uma por voluntária
+    sem_outro = (por_participante(minimo["valor_basica"])
+                 + _aplicar_pontos_base(por_participante(salario_mensal), _pontos_base(voluntarias / 100)[:, np.newaxis]))
+
+    ultimo_passo = round((PARCELA_B_MAXIMA - PARCELA_B_MINIMA) / PASSO_PARCELA_B)
+    pontos_minimos = _pontos_base(PARCELA_B_MINIMA / 100)
+    pontos_passo = _pontos_base(PASSO_PARCELA_B / 100)
+
+    def total_anual(passo):
+        return quantidade * (sem_outro + _aplicar_pontos_base(base_outro, pontos_minimos + passo * pontos_passo))
+
+    def maior_passo_ate(alvo):
+        """Maior passo da Parcela B com total anual <= alvo (-1 se nenhum)"""
+        folga = np.floor_divide(alvo, np.maximum(quantidade, 1)) - sem_outro  # Parcela B mensal <= folga
+        # round(base × pontos / 10⁴) <= folga  <=>  2 × base × pontos <= 2 × 10⁴ × folga + 9.999
+        pontos = (2 * _ESCALA_PONTOS_BASE * folga + _ESCALA_PONTOS_BASE - 1) // np.maximum(2 * base_outro, 1)
+        passo = np.where(base_outro > 0, np.clip((pontos - pontos_minimos) // pontos_passo, -1, ultimo_passo),
+                         ultimo_passo)
+        passo = np.where(folga < 0, -1, passo)
+        return np.where(quantidade > 0, passo, np.where(alvo >= 0, ultimo_passo, -1))
+
+    abaixo_do_minimo = maior_passo_ate(limite - esporadica_minima)
+    # Menor passo com o mesmo total (a Parcela B pode não mudar o valor, como abaixo das UR)
+    com_esporadica = maior_passo_ate(total_anual(np.maximum(abaixo_do_minimo, 0)) - 1) + 1
+    com_esporadica = np.where(abaixo_do_minimo >= 0, com_esporadica, -1)
+    passos = np.concatenate([com_esporadica, abaixo_do_minimo + 1, maior_passo_ate(limite - 1) + 1], axis=-1)
+
+    valido = (passos >= 0) & (passos <= ultimo_passo)
+    passos = np.clip(passos, 0, ultimo_passo)
+    anual = total_anual(passos)
+    falta = limite - anual
+    esporadica = np.where(falta > 0, np.maximum(falta, esporadica_minima), 0)
+    possivel = valido & ((falta <= 0) | ((esporadica_minima <= esporadica_maxima) & (falta <= esporadica_maxima)))
+
+    # Menor custo; nos empates, menor esporádica; nos demais, a primeira (menor voluntária e Parcela B)
+    formato = salario_mensal.shape + (-1,)
+    sem_custo = np.iinfo(np.int64).max
+    custo = np.where(possivel, anual + esporadica, sem_custo).reshape(formato)
+    esporadica = esporadica.reshape(formato)
+    empate = np.where(custo == custo.min(axis=-1, keepdims=True), esporadica, sem_custo)
+    escolha = (empate == empate.min(axis=-1, keepdims=True)).argmax(axis=-1)[..., np.newaxis]
+    alcancavel = possivel.reshape(formato).any(axis=-1)
+
+    candidatas = passos.shape[-1]
+    passo = np.where(alcancavel, np.take_along_axis(passos.reshape(formato), escolha, axis=-1)[..., 0], ultimo_passo)
+    voluntaria = np.where(alcancavel, voluntarias[escolha[..., 0] // candidatas], voluntarias[-1])
+    valor_esporadica = np.where(
+        alcancavel, np.take_along_axis(esporadica, escolha, axis=-1)[..., 0],
+        np.where(minimo["valor_minimo_esporadica"] <= minimo["valor_maximo_esporadica"],
+                 minimo["valor_maximo_esporadica"], 0),
+    )
+
+    resultado = calcular_simulacao_centavos(
+        salario_mensal, PARCELA_B_MINIMA + passo * PASSO_PARCELA_B, voluntaria, quantidade_contribuicoes,
+        valor_esporadica_centavos=valor_esporadica, incluir_esporadica=valor_esporadica > 0, parametros=parametros,
+    )
+    resultado["atinge_limite"] = resultado["total_final"] >= limite_deducao
+    return resultado
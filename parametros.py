@@ -0,0 +1,173 @@
+"""
+Parâmetros do plano por ano: valor e quantidade de UR, limite fiscal,
+limites da contribuição esporádica, prazo e tabela progressiva anual do IRPF.
+
+A tabela fica em parametros_plano.json (ou no arquivo indicado pela variável
+de ambiente SIMULADOR_PARAMETROS) e é lida e validada uma única vez por
+processo; a página, o processamento em lote e os processos filhos usam a
+mesma tabela. Para incluir as regras de um novo ano basta acrescentar uma
+entrada em "anos", sem alterar o código.
+"""
+import datetime
+import json
+import math
+import os
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+import numpy as np
+
+CAMINHO_PARAMETROS = os.environ.get(
+    "SIMULADOR_PARAMETROS", str(Path(__file__).resolve().with_name("parametros_plano.json"))
+)
+VERSAO_FORMATO = 2  # Versão do formato do arquivo, não das regras do plano
+
+
+class ErroParametros(ValueError):
+    """Arquivo de parâmetros ausente, mal formado ou com valores inválidos"""
+
+
+@dataclass(frozen=True)
+class ParametrosPlano:
+    ano: int
+    valor_ur: float
+    quantidade_ur: int
+    percentual_maximo: float  # Limite para benefício fiscal (fração do salário anual)
+    multiplicador_minimo_esporadica: float  # Mínimo da esporádica = multiplicador × valor da UR
+    multiplicador_maximo_esporadica: float  # Máximo da esporádica = multiplicador × salário mensal
+    prazo: datetime.date  # Último dia para a contribuição contar no ano
+    faixas_irpf: tuple  # Tabela anual do IRPF: ((limite superior, alíquota, parcela a deduzir), ...)
+
+    @property
+    def total_ur(self):
+        return self.quantidade_ur * self.valor_ur
+
+    @property
+    def valor_minimo_esporadica(self):
+        return self.multiplicador_minimo_esporadica * self.valor_ur
+
+    # Alíquotas e parcelas a deduzir em arrays, montados uma vez por ano da tabela
+    @cached_property
+    def aliquotas_irpf(self):
+        return _somente_leitura(np.array([aliquota for _, aliquota, _ in self.faixas_irpf]))
+
+    @cached_property
+    def deducoes_irpf(self):
+        return _somente_leitura(np.array([deducao for _, _, deducao in self.faixas_irpf]))
+
+
+def _somente_leitura(array):
+    array.setflags(write=False)
+    return array
+
+
+def _converter_faixas_irpf(faixas):
+    """[{"ate": limite ou null, "aliquota": ..., "deducao": ...}, ...] -> tupla de (limite, alíquota, dedução)"""
+    if not isinstance(faixas, list):
+        raise TypeError("esperada uma lista de faixas")
+    convertidas = []
+    for faixa in faixas:
+        if not isinstance(faixa, dict) or set(faixa) != {"ate", "aliquota", "deducao"}:
+            raise ValueError("cada faixa deve ter exatamente ate, aliquota e deducao")
+        if any(isinstance(valor, bool) for valor in faixa.values()):
+            raise TypeError("valor booleano na faixa")
+        limite = math.inf if faixa["ate"] is None else float(faixa["ate"])
+        convertidas.append((limite, float(faixa["aliquota"]), float(faixa["deducao"])))
+    return tuple(convertidas)
+
+
+def _faixas_irpf_validas(faixas):
+    """
+    Limites crescentes (a última faixa sem limite), alíquotas crescentes entre
+    0 e 1 e parcelas a deduzir que mantêm o imposto contínuo em cada limite
+    (tolerância de 1 centavo): só assim o imposto é o maior entre
+    base × alíquota − dedução das faixas, como o motor calcula.
+    """
+    if not faixas or faixas[-1][0] != math.inf:
+        return False
+    for (limite, aliquota, deducao), (proximo_limite, proxima_aliquota, proxima_deducao) in zip(faixas, faixas[1:]):
+        if not (limite < proximo_limite and aliquota < proxima_aliquota):
+            return False
+        if abs((limite * aliquota - deducao) - (limite * proxima_aliquota - proxima_deducao)) > 0.01:
+            return False
+    return all(0 <= aliquota < 1 and deducao >= 0 for _, aliquota, deducao in faixas)
+
+
+# Campo do JSON -> conversão e validação
+_CAMPOS = {
+    "valor_ur": (float, lambda v: v > 0),
+    "quantidade_ur": (int, lambda v: v >= 0),
+    "percentual_maximo": (float, lambda v: 0 < v < 1),
+    "multiplicador_minimo_esporadica": (float, lambda v: v >= 0),
+    "multiplicador_maximo_esporadica": (float, lambda v: v > 0),
+    "prazo": (datetime.date.fromisoformat, lambda v: True),
+    "faixas_irpf": (_converter_faixas_irpf, _faixas_irpf_validas),
+}
+
+
+def _validar_ano(ano, dados):
+    if not isinstance(dados, dict):
+        raise ErroParametros(f"Parâmetros de {ano}: esperado um objeto")
+    faltando = sorted(set(_CAMPOS) - set(dados))
+    sobrando = sorted(set(dados) - set(_CAMPOS))
+    if faltando or sobrando:
+        raise ErroParametros(f"Parâmetros de {ano}: campos ausentes {faltando}, desconhecidos {sobrando}")
+
+    valores = {}
+    for campo, (converter, valido) in _CAMPOS.items():
+        bruto = dados[campo]
+        if isinstance(bruto, bool) or (converter is int and isinstance(bruto, float) and not bruto.is_integer()):
+            raise ErroParametros(f"Parâmetros de {ano}: {campo} inválido: {bruto!r}")
+        try:
+            valor = converter(bruto)
+        except (TypeError, ValueError):
+            raise ErroParametros(f"Parâmetros de {ano}: {campo} inválido: {bruto!r}") from None
+        if not valido(valor):
+            raise ErroParametros(f"Parâmetros de {ano}: {campo} fora do intervalo permitido: {bruto!r}")
+        valores[campo] = valor
+
+    if valores["prazo"].year != ano:
+        raise ErroParametros(f"Parâmetros de {ano}: prazo {valores['prazo']} fora do ano")
+    return ParametrosPlano(ano=ano, **valores)
+
+
+@lru_cache(maxsize=None)
+def carregar_tabela(caminho=CAMINHO_PARAMETROS):
+    """Lê e valida o arquivo de parâmetros: {ano: ParametrosPlano}, em ordem crescente de ano"""
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            conteudo = json.load(arquivo)
+    except (OSError, json.JSONDecodeError) as erro:
+        raise ErroParametros(f"Não foi possível ler os parâmetros do plano em {caminho}: {erro}") from erro
+
+    if not isinstance(conteudo, dict) or conteudo.get("versao") != VERSAO_FORMATO:
+        raise ErroParametros(f"{caminho}: versão do formato não suportada (esperada {VERSAO_FORMATO})")
+    anos = conteudo.get("anos")
+    if not isinstance(anos, dict) or not anos:
+        raise ErroParametros(f"{caminho}: nenhum ano definido")
+
+    tabela = {}
+    for ano, dados in anos.items():
+        if not str(ano).isdigit():
+            raise ErroParametros(f"{caminho}: ano inválido: {ano!r}")
+        tabela[int(ano)] = _validar_ano(int(ano), dados)
+    return dict(sorted(tabela.items()))
+
+
+def anos_disponiveis():
+    """Anos com parâmetros definidos, em ordem crescente"""
+    return list(carregar_tabela())
+
+
+def parametros_do_ano(ano=None):
+    """Parâmetros de `ano`; sem ano, os do ano mais recente da tabela"""
+    tabela = carregar_tabela()
+    if ano is None:
+        return tabela[max(tabela)]
+    try:
+        return tabela[int(ano)]
+    except KeyError:
+        raise ErroParametros(
+            f"Sem parâmetros do plano para {ano} (disponíveis: {', '.join(map(str, tabela))})"
+        ) from None
@@ -0,0 +1,249 @@
+"""
+Gravação de planilhas .xlsx em fluxo, com memória constante.
+
+O openpyxl (usado pela página para o resumo de 18 linhas) monta a planilha
+inteira em memória e, mesmo no modo write_only, guarda todos os textos
+distintos na tabela de strings compartilhadas. Aqui cada aba é gravada
+direto em um arquivo temporário, com os textos inline na própria célula, e
+o .xlsx (um ZIP de XMLs) só é montado no fechamento, copiando esses arquivos
+em blocos. O XML das células é gerado por coluna, de forma vetorizada.
+
+Colunas numéricas viram células numéricas; `formatos` indica o formato
+numérico do Excel de cada coluna (como formatacao.FORMATO_EXCEL), gravado
+como estilo em styles.xml.
+
+Uso:
+    escritor = EscritorExcel("resumo.xlsx")
+    escritor.escrever(df_lote, aba="Operação")   # pode ser chamado várias vezes
+    escritor.escrever(df_lote, formatos={"Salário Mensal": '"R$" #,##0.00'})
+    escritor.fechar()
+"""
+import re
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+LINHAS_POR_ABA = 1_048_576  # Limite do Excel, com o cabeçalho; o restante segue em outra aba
+CARACTERES_INVALIDOS_ABA = "[]:*?/\\"
+# Caracteres que não podem aparecer em XML 1.0 (controles como \x01, substitutos, \uFFFE);
+# o Excel recusa o arquivo inteiro se algum deles chegar ao XML, então são removidos
+_INVALIDOS_XML = re.compile("[^\x09\x0A\x0D\x20-\uD7FF\uE000-\uFFFD\U00010000-\U0010FFFF]")
+
+_NS_PLANILHA = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_RELACOES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PACOTE = "http://schemas.openxmlformats.org/package/2006/relationships"
+_TIPO_PLANILHA = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+_INICIO_ABA = (
+    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<worksheet xmlns="{_NS_PLANILHA}"><sheetData>'
+).encode("utf-8")
+_FIM_ABA = b"</sheetData></worksheet>"
+
+
+def _tem_invalidos_xml(texto):
+    """Se algum texto do array tem caractere de _INVALIDOS_XML, pelos códigos UCS-4 do NumPy"""
+    codigos = texto.reshape(-1).view(np.uint32)
+    # Em uint32, "c - 1 < 0x1F" é 1 a 31 (o 0 dá a volta); tab, \n e \r são permitidos
+    controle = ((codigos - 1) < 0x1F) & ((codigos - 9) > 1) & (codigos != 13)
+    if (controle | ((codigos - 0xD800) < 0x800) | ((codigos - 0xFFFE) < 2)).any():
+        return True
+    # NUL no meio do texto: mais zeros que o preenchimento do tamanho fixo
+    return np.count_nonzero(codigos == 0) != codigos.size - int(np.strings.str_len(texto).sum())
+
+
+def _celulas_texto(valores):
+    """Array de textos -> lista com o XML de cada célula (texto inline)"""
+    texto = np.asarray(valores, dtype=str)
+    # Só os (raros) textos com &, <, > ou caracteres inválidos em XML passam pelo escape em Python
+    especiais = np.zeros(texto.shape, dtype=bool)
+    for caractere in "&<>":
+        especiais |= np.strings.find(texto, caractere) >= 0
+    if _tem_invalidos_xml(texto):
+        especiais |= np.array([_INVALIDOS_XML.search(valor) is not None for valor in texto.ravel().tolist()],
+                              dtype=bool).reshape(texto.shape)
+    if especiais.any():
+        texto = texto.astype(object)
+        texto[especiais] = [escape(_INVALIDOS_XML.sub("", valor)) for valor in texto[especiais]]
+        texto = texto.astype(str)
+    celulas = np.strings.add('<c t="inlineStr"><is><t xml:space="preserve">', texto)
+    return np.strings.add(celulas, "</t></is></c>").tolist()
+
+
+def _celulas_numero(valores, estilo=0):
+    """Array numérico -> lista com o XML de cada célula (com o estilo, se não for o padrão); NaN vira célula vazia"""
+    valores = np.asarray(valores)
+    texto = valores.astype(str)  # Representação mais curta que volta ao mesmo número
+    inicio = f'<c s="{estilo}"><v>' if estilo else "<c><v>"
+    celulas = np.strings.add(np.strings.add(inicio, texto), "</v></c>")
+    if valores.dtype.kind == "f":
+        celulas = np.where(np.isfinite(valores), celulas, "<c/>")
+    return celulas.tolist()
+
+
+def _xml_linhas(df, estilos=()):
+    """XML (<row>...</row>) de todas as linhas do DataFrame; `estilos`: coluna -> índice do estilo"""
+    estilos = dict(estilos)
+    colunas = []
+    for nome in df.columns:
+        serie = df[nome]
+        if serie.dtype.kind in "iuf":
+            colunas.append(_celulas_numero(serie.to_numpy(), estilos.get(nome, 0)))
+        elif serie.dtype.kind == "b":
+            colunas.append(_celulas_numero(serie.to_numpy().astype(np.int8)))
+        else:
+            colunas.append(_celulas_texto(serie.fillna("").astype(str).to_numpy()))
+    return "".join(f"<row>{''.join(celulas)}</row>" for celulas in zip(*colunas))
+
+
+class _Aba:
+    __slots__ = ("titulo", "arquivo", "linhas")
+
+    def __init__(self, titulo):
+        self.titulo = titulo
+        self.arquivo = tempfile.TemporaryFile()
+        self.linhas = 0
+
+
+class EscritorExcel:
+    """Grava um .xlsx lote a lote; cada aba recebe o cabeçalho no primeiro lote"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._abas = []  # Na ordem de criação
+        self._atual = {}  # nome pedido -> (aba em uso, número da parte)
+        self._formatos = []  # Formatos numéricos em uso; o estilo do i-ésimo é o índice i + 1
+
+    def escrever(self, df, aba="Resumo", formatos=None):
+        """
+        Acrescenta as linhas de `df` à aba; passa para "Aba (2)" ao atingir o limite do Excel.
+
+        `formatos`: coluna -> formato numérico do Excel ('"R$" #,##0.00', "0.0%"...).
+        """
+        estilos = {nome: self._estilo(formato) for nome, formato in (formatos or {}).items()}
+        inicio = 0
+        while inicio < len(df):
+            destino, parte = self._atual.get(aba) or self._nova_aba(aba, df.columns, parte=1)
+            if destino.linhas >= LINHAS_POR_ABA:
+                destino, parte = self._nova_aba(aba, df.columns, parte=parte + 1)
+            fim = inicio + min(len(df) - inicio, LINHAS_POR_ABA - destino.linhas)
+            destino.arquivo.write(_xml_linhas(df.iloc[inicio:fim], estilos).encode("utf-8"))
+            destino.linhas += fim - inicio
+            inicio = fim
+
+    def _estilo(self, formato):
+        """Índice em cellXfs do estilo com o formato numérico (0, o padrão, é o "Geral")"""
+        if formato not in self._formatos:
+            self._formatos.append(formato)
+        return self._formatos.index(formato) + 1
+
+    def _nova_aba(self, pedido, cabecalho, parte):
+        nome = "".join("_" if c in CARACTERES_INVALIDOS_ABA else c for c in _INVALIDOS_XML.sub("", str(pedido)))
+        nome = nome.strip("'") or "Sem nome"
+        sufixo = f" ({parte})" if parte > 1 else ""
+        titulo = nome[:31 - len(sufixo)] + sufixo  # O Excel limita o nome da aba a 31 caracteres
+        existentes = {aba.titulo.lower() for aba in self._abas}
+        contador = 2
+        while titulo.lower() in existentes:
+            extra = f"~{contador}"
+            titulo = nome[:31 - len(sufixo) - len(extra)] + extra + sufixo
+            contador += 1
+
+        aba = _Aba(titulo)
+        aba.arquivo.write(f"<row>{''.join(_celulas_texto(list(map(str, cabecalho))))}</row>".encode("utf-8"))
+        aba.linhas = 1
+        self._abas.append(aba)
+        self._atual[pedido] = (aba, parte)
+        return aba, parte
+
+    def fechar(self):
+        """Monta o .xlsx a partir das abas gravadas e remove os arquivos temporários"""
+        if not self._abas:
+            self._nova_aba("Resumo", [], parte=1)
+        try:
+            with zipfile.ZipFile(self.caminho, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as pacote:
+                pacote.writestr("[Content_Types].xml", self._tipos_conteudo())
+                pacote.writestr("_rels/.rels", (
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f'<Relationships xmlns="{_NS_PACOTE}">'
+                    f'<Relationship Id="rId1" Type="{_NS_RELACOES}/officeDocument" Target="xl/workbook.xml"/>'
+                    f'</Relationships>'
+                ))
+                pacote.writestr("xl/workbook.xml", self._pasta_de_trabalho())
+                pacote.writestr("xl/_rels/workbook.xml.rels", self._relacoes_pasta())
+                pacote.writestr("xl/styles.xml", self._estilos())
+                for numero, aba in enumerate(self._abas, start=1):
+                    aba.arquivo.seek(0)
+                    with pacote.open(f"xl/worksheets/sheet{numero}.xml", "w", force_zip64=True) as destino:
+                        destino.write(_INICIO_ABA)
+                        shutil.copyfileobj(aba.arquivo, destino, 1024 * 1024)
+                        destino.write(_FIM_ABA)
+        finally:
+            for aba in self._abas:
+                aba.arquivo.close()
+
+    def _estilos(self):
+        # Formatos personalizados começam no id 164 (os anteriores são os embutidos do Excel)
+        formatos = "".join(
+            f'<numFmt numFmtId="{164 + i}" formatCode="{escape(formato, {chr(34): "&quot;"})}"/>'
+            for i, formato in enumerate(self._formatos)
+        )
+        xfs = "".join(
+            f'<xf numFmtId="{164 + i}" xfId="0" applyNumberFormat="1"/>' for i in range(len(self._formatos))
+        )
+        return (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<styleSheet xmlns="{_NS_PLANILHA}">'
+            + (f'<numFmts count="{len(self._formatos)}">{formatos}</numFmts>' if self._formatos else "")
+            + f'<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+            f'<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            f'<fill><patternFill patternType="gray125"/></fill></fills>'
+            f'<borders count="1"><border/></borders>'
+            f'<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+            f'<cellXfs count="{len(self._formatos) + 1}"><xf xfId="0"/>{xfs}</cellXfs>'
+            f'<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            f'</styleSheet>'
+        )
+
+    def _tipos_conteudo(self):
+        abas = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="{_TIPO_PLANILHA}"/>'
+            for n in range(1, len(self._abas) + 1)
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{abas}</Types>'
+        )
+
+    def _pasta_de_trabalho(self):
+        abas = "".join(
+            f'<sheet name="{escape(aba.titulo, {chr(34): "&quot;"})}" sheetId="{n}" r:id="rId{n}"/>'
+            for n, aba in enumerate(self._abas, start=1)
+        )
+        return (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{_NS_PLANILHA}" xmlns:r="{_NS_RELACOES}"><sheets>{abas}</sheets></workbook>'
+        )
+
+    def _relacoes_pasta(self):
+        abas = "".join(
+            f'<Relationship Id="rId{n}" Type="{_NS_RELACOES}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+            for n in range(1, len(self._abas) + 1)
+        )
+        estilos = len(self._abas) + 1
+        return (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{_NS_PACOTE}">{abas}'
+            f'<Relationship Id="rId{estilos}" Type="{_NS_RELACOES}/styles" Target="styles.xml"/>'
+            f'</Relationships>'
+        )
@@ -0,0 +1,243 @@
+"""
+Geração do recibo em PDF da simulação.
+
+O logo do recibo é carregado uma única vez por processo (arquivo local em
+assets/ ou download com validade, recarregado em segundo plano) e entregue ao FPDF direto da memória. O layout fixo do recibo é desenhado uma
+única vez (o modelo); cada recibo é uma cópia do modelo com a data e os seis
+valores da simulação escritos por cima.
+"""
+import copy
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+from fpdf import FPDF
+
+from formatacao import formatar_reais
+from instrumentacao import etapa
+
+URL_LOGO = "https://oucamelhor.com.br/contents/images/convenio040.png"
+CAMINHO_LOGO_LOCAL = Path(__file__).resolve().parent / "assets" / "convenio040.png"
+TTL_LOGO = 24 * 60 * 60  # Logo baixado vale por 1 dia
+TTL_LOGO_FALHA = 10 * 60  # Após uma falha, só tenta baixar de novo em 10 minutos
+TIMEOUT_DOWNLOAD_LOGO = 5
+FORMATO_DATA = "%d/%m/%Y %H:%M"  # Data da simulação impressa no recibo
+
+# Cache do logo compartilhado por todas as sessões do processo
+_cache_logo = {"imagem": None, "expira_em": 0.0}
+_trava_logo = threading.Lock()
+
+
+def _decodificar_png(conteudo):
+    """Decodifica o PNG uma única vez no formato interno de imagens do FPDF"""
+    # O FPDF 1.7 só lê imagens a partir de arquivo; o arquivo temporário é
+    # exclusivo desta chamada e removido logo em seguida.
+    descritor, caminho = tempfile.mkstemp(suffix=".png")
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            arquivo.write(conteudo)
+        return FPDF()._parsepng(caminho)
+    finally:
+        os.remove(caminho)
+
+
+def _carregar_logo():
+    """Lê o logo do arquivo local ou, na falta dele, baixa da internet"""
+    if CAMINHO_LOGO_LOCAL.exists():
+        return CAMINHO_LOGO_LOCAL.read_bytes(), float("inf")
+    import requests  # Só é necessário (e carregado) quando não há logo local
+    response = requests.get(URL_LOGO, timeout=TIMEOUT_DOWNLOAD_LOGO)
+    response.raise_for_status()
+    return response.content, TTL_LOGO
+
+
+def _atualizar_logo():
+    """Carrega o logo para o cache; se falhar, mantém o logo anterior e só adia a próxima tentativa"""
+    try:
+        with etapa("pdf_logo"):
+            conteudo, ttl = _carregar_logo()
+            imagem = _decodificar_png(conteudo)
+    except Exception:
+        _cache_logo["expira_em"] = time.monotonic() + TTL_LOGO_FALHA
+        return
+    _cache_logo["imagem"] = imagem
+    _cache_logo["expira_em"] = time.monotonic() + ttl
+
+
+def obter_logo():
+    """
+    Retorna o logo já decodificado para o FPDF, ou None se indisponível.
+
+    Só a primeira carga do processo é esperada. As seguintes (o logo baixado
+    vencido após TTL_LOGO, ou uma nova tentativa TTL_LOGO_FALHA após uma
+    falha) rodam em segundo plano: o recibo sai na hora com o logo em cache,
+    ou sem logo, e não espera o timeout do download quando estiver offline.
+    """
+    if time.monotonic() < _cache_logo["expira_em"]:
+        return _cache_logo["imagem"]
+
+    with _trava_logo:
+        # Outra sessão pode ter recarregado (ou iniciado a recarga) enquanto esperávamos a trava
+        if time.monotonic() < _cache_logo["expira_em"]:
+            return _cache_logo["imagem"]
+        if _cache_logo["expira_em"] == 0.0:
+            _atualizar_logo()
+        else:
+            # Até a recarga terminar, as demais chamadas também usam o logo em cache
+            _cache_logo["expira_em"] = time.monotonic() + TTL_LOGO_FALHA
+            threading.Thread(target=_atualizar_logo, name="recarga-logo", daemon=True).start()
+        return _cache_logo["imagem"]
+
+
+def _inserir_logo(pdf, logo, x, y, w):
+    """Registra o logo já decodificado no documento e o desenha, sem acessar disco"""
+    if "logo_frg" not in pdf.images:
+        # Cópia rasa: o FPDF altera o dicionário da imagem ao gerar o documento
+        imagem = dict(logo)
+        imagem["i"] = len(pdf.images) + 1
+        pdf.images["logo_frg"] = imagem
+    pdf.image("logo_frg", x=x, y=y, w=w)
+
+
+# Linhas da tabela do recibo: (descrição, detalhe); só o valor muda a cada recibo
+LINHAS_TABELA = [
+    ("Salário Mensal", "Base de cálculo"),
+    ("Salário Anual", "14x (inclui PLR)"),
+    ("Contribuição Mensal", "Total mensal"),
+    ("Contribuição Anual", "Acumulado anual"),
+    ("Contribuição Esporádica", "Valor escolhido"),
+    ("TOTAL FINAL", "Anual com esporádica"),
+]
+
+# Modelo do recibo (layout fixo já desenhado), refeito só quando o logo muda
+_cache_modelo = {"logo": None, "modelo": None}
+_trava_modelo = threading.Lock()
+
+
+def _montar_modelo(logo):
+    """
+    Desenha uma única vez tudo o que é igual em todos os recibos: cabeçalho,
+    logo, título, linha decorativa e a tabela com as bordas e os textos fixos.
+    Retorna o FPDF e as posições (x, y) onde entram a data e cada valor.
+    """
+    pdf = FPDF(orientation='P', unit='mm', format='A4')
+    pdf.set_auto_page_break(auto=True, margin=15)
+    
+    # Adicionar página
+    pdf.add_page()
+    
+    
+    # ===== CABEÇALHO DO PDF =====
+    if logo is not None:
+        _inserir_logo(pdf, logo, x=20, y=10, w=40)
+    else:
+        pdf.set_font('Helvetica', 'B', 16)
+        pdf.set_text_color(139, 4, 59)
+        pdf.cell(0, 10, "FRG - Fundacao Real Grandeza", ln=True, align="C")
+    
+    # Título do documento
+    pdf.set_font('Helvetica', 'B', 14)
+    pdf.set_text_color(0, 0, 0)
+    pdf.ln(20)
+    pdf.cell(0, 10, "RECIBO DE SIMULAÇÃO - CONTRIBUIÇÃO ESPORÁDICA", ln=True, align="C")
+    
+    # Linha decorativa
+    pdf.set_draw_color(139, 4, 59)
+    pdf.set_line_width(0.5)
+    pdf.line(20, pdf.get_y(), 190, pdf.get_y())
+    pdf.ln(5)
+    
+    # ===== INFORMAÇÕES DA SIMULAÇÃO =====
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(0, 10, "DADOS DA SIMULAÇÃO", ln=True)
+    
+    # Data e hora: preenchida a cada recibo
+    posicao_data = (pdf.get_x(), pdf.get_y())
+    pdf.ln(7)
+    pdf.ln(3)
+    
+    # Dados principais em tabela
+    pdf.set_font('Helvetica', 'B', 11)
+    pdf.cell(60, 8, "Descrição", border=1, align="C")
+    pdf.cell(40, 8, "Valor", border=1, align="C")
+    pdf.cell(40, 8, "Detalhe", border=1, align="C", ln=True)
+    
+    pdf.set_font('Helvetica', '', 10)
+    
+    posicoes_valores = []
+    for desc, detalhe in LINHAS_TABELA:
+        pdf.cell(60, 8, desc, border=1)
+        posicoes_valores.append((pdf.get_x(), pdf.get_y()))
+        pdf.cell(40, 8, "", border=1)
+        pdf.cell(40, 8, detalhe, border=1, ln=True)
+    
+    return pdf, posicao_data, posicoes_valores
+
+
+def _obter_modelo():
+    logo = obter_logo()
+    if _cache_modelo["modelo"] is not None and _cache_modelo["logo"] is logo:
+        return _cache_modelo["modelo"]
+    with _trava_modelo:
+        if _cache_modelo["modelo"] is None or _cache_modelo["logo"] is not logo:
+            with etapa("pdf_modelo"):
+                _cache_modelo["modelo"] = _montar_modelo(logo)
+            _cache_modelo["logo"] = logo
+        return _cache_modelo["modelo"]
+
+
+def _copiar_modelo(modelo):
+    """
+    Cópia do FPDF do modelo pronta para receber os valores de um recibo.
+
+    Cópia rasa, mais cópias dos dicionários que o FPDF altera ao adicionar
+    conteúdo e ao gerar o documento (página, offsets, fontes e imagens); o
+    restante (textos, dados do logo) é imutável e fica compartilhado.
+    """
+    pdf = copy.copy(modelo)
+    pdf.pages = dict(modelo.pages)
+    pdf.offsets = dict(modelo.offsets)
+    pdf.fonts = {nome: dict(fonte) for nome, fonte in modelo.fonts.items()}
+    pdf.images = {nome: dict(imagem) for nome, imagem in modelo.images.items()}
+    return pdf
+
+
+def gerar_pdf_recibo(resumo_df, salario_mensal, salario_anual, contribuicao_mensal_total, 
+                     total_contribuicao_anual, valor_esporadica_personalizado, total_final,
+                     data_simulacao=None):
+    """
+    Gera um PDF formatado como recibo oficial da simulação.
+
+    `data_simulacao` é o texto impresso como data ("dd/mm/aaaa hh:mm"); padrão: agora.
+    """
+    modelo, posicao_data, posicoes_valores = _obter_modelo()
+    pdf = _copiar_modelo(modelo)
+    
+    # Data e hora
+    pdf.set_font('Helvetica', '', 11)
+    pdf.set_xy(*posicao_data)
+    data_simulacao = data_simulacao or datetime.now().strftime(FORMATO_DATA)
+    pdf.cell(0, 7, f"Data da simulacao: {data_simulacao}")
+    
+    # Valores da tabela, sobre as células já desenhadas no modelo
+    pdf.set_font('Helvetica', '', 10)
+    valores = [salario_mensal, salario_anual, contribuicao_mensal_total,
+               total_contribuicao_anual, valor_esporadica_personalizado, total_final]
+    for (x, y), valor in zip(posicoes_valores, valores):
+        pdf.set_xy(x, y)
+        pdf.cell(40, 8, formatar_reais(valor), align="R")
+    
+    # ===== GERAR PDF EM MEMÓRIA =====
+    output = BytesIO()
+    
+    # Usar latin-1 para evitar problemas de codificação
+    pdf_output = pdf.output(dest='S').encode('latin-1', 'ignore')
+    
+    output.write(pdf_output)
+    output.seek(0)
+    
+    return output
@@ -1,126 +1,224 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import locale
 from io import BytesIO
 
-# Função para formatar valores em reais no formato brasileiro (Versão Universal)
-def formatar_reais(valor):
-    """
-    Formata valor monetário no padrão brasileiro (R$ 1.234,56)
-    Funciona em Windows e Linux (Streamlit Cloud) sem depender de locale.
-    """
-    if valor is None:
-        return "R$ 0,00"
-    
-    # 1. Formata com padrão americano: 1,234.56
-    valor_formatado = f"{valor:,.2f}"
-    
-    # 2. Inverte os separadores usando um caractere temporário (X)
-    # Vírgula (milhar) vira Ponto
-    # Ponto (decimal) vira Vírgula
-    valor_formatado = valor_formatado.replace(",", "X").replace(".", ",").replace("X", ".")
-    
-    return f"R$ {valor_formatado}"
+from motor import calcular_simulacao, otimizar_limite_centavos, para_centavos, CONTRIBUICAO_BASICA_PCT
+from parametros import anos_disponiveis, parametros_do_ano
+from projecao import PERFIL_PADRAO, PERFIS_INVESTIMENTO, projetar_saldo, total_aportado
+from grafo import GrafoIncremental, sem_dependentes_de
+from formatacao import formatar_reais, formatar_numero, resumo_tipado, CAMPOS_RESUMO, FORMATO_EXCEL
+import historico
+import instrumentacao
+from instrumentacao import etapa
 
-# Função para formatar números (não moedas) caso precise
-def formatar_numero(valor, casas_decimais=2):
-    format_str = f"{{:,.{casas_decimais}f}}"
-    v = format_str.format(valor)
-    return v.replace(",", "X").replace(".", ",").replace("X", ".")
+# Função para converter o resumo tipado para Excel em memória
+def converter_para_excel(resumo_df):
+    """
+    Converte o resumo tipado (formatacao.resumo_tipado) para um arquivo Excel em memória.
 
-# Função para converter DataFrame para Excel em memória
-def converter_para_excel(df):
-    """Converte um DataFrame para um arquivo Excel em memória"""
+    Os valores vão como números, com o formato nativo do Excel de cada linha
+    (R$, percentual ou inteiro), prontos para somas e tabelas dinâmicas.
+    """
+    tipos = [tipo for _, _, tipo in CAMPOS_RESUMO]
+    valores = [
+        resumo_df["Centavos"].iat[linha] / 100 if tipo == "reais"
+        else resumo_df["Quantidade"].iat[linha] if tipo == "inteiro"
+        else resumo_df["Razão"].iat[linha]
+        for linha, tipo in enumerate(tipos)
+    ]
     output = BytesIO()
     with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Resumo')
+        pd.DataFrame({"Descrição": resumo_df["Descrição"], "Valor": pd.Series(valores, dtype=object)}).to_excel(
+            writer, index=False, sheet_name='Resumo'
+        )
+        planilha = writer.sheets['Resumo']
+        for linha, tipo in enumerate(tipos, start=2):
+            planilha.cell(row=linha, column=2).number_format = FORMATO_EXCEL[tipo]
+        planilha.column_dimensions["A"].width = 48
+        planilha.column_dimensions["B"].width = 18
     output.seek(0)
     return output
 
-from fpdf import FPDF
-from datetime import datetime
-import requests
-
-def gerar_pdf_recibo(resumo_df, salario_mensal, salario_anual, contribuicao_mensal_total, 
-                     total_contribuicao_anual, valor_esporadica_personalizado, total_final):
-    """Gera um PDF formatado como recibo oficial da simulação"""
-    
-    pdf = FPDF(orientation='P', unit='mm', format='A4')
-    pdf.set_auto_page_break(auto=True, margin=15)
-    
-    # Adicionar página
-    pdf.add_page()
-    
-    
-    # ===== CABEÇALHO DO PDF =====
-    try:
-        response = requests.get("https://oucamelhor.com.br/contents/images/convenio040.png", timeout=5)
-        if response.status_code == 200:
-            with open("temp_logo.png", "wb") as f:
-                f.write(response.content)
-            pdf.image("temp_logo.png", x=20, y=10, w=40)
-    except:
-        pdf.set_font('Helvetica', 'B', 16)
-        pdf.set_text_color(139, 4, 59)
-        pdf.cell(0, 10, "FRG - Fundacao Real Grandeza", ln=True, align="C")
-    
-    # Título do documento
-    pdf.set_font('Helvetica', 'B', 14)
-    pdf.set_text_color(0, 0, 0)
-    pdf.ln(20)
-    pdf.cell(0, 10, "RECIBO DE SIMULAÇÃO - CONTRIBUIÇÃO ESPORÁDICA", ln=True, align="C")
-    
-    # Linha decorativa
-    pdf.set_draw_color(139, 4, 59)
-    pdf.set_line_width(0.5)
-    pdf.line(20, pdf.get_y(), 190, pdf.get_y())
-    pdf.ln(5)
-    
-    # ===== INFORMAÇÕES DA SIMULAÇÃO =====
-    pdf.set_font('Helvetica', 'B', 12)
-    pdf.cell(0, 10, "DADOS DA SIMULAÇÃO", ln=True)
-    pdf.set_font('Helvetica', '', 11)
-    
-    # Data e hora
-    from datetime import datetime
-    data_atual = datetime.now().strftime("%d/%m/%Y %H:%M")
-    pdf.cell(0, 7, f"Data da simulacao: {data_atual}", ln=True)
-    pdf.ln(3)
-    
-    # Dados principais em tabela
-    pdf.set_font('Helvetica', 'B', 11)
-    pdf.cell(60, 8, "Descrição", border=1, align="C")
-    pdf.cell(40, 8, "Valor", border=1, align="C")
-    pdf.cell(40, 8, "Detalhe", border=1, align="C", ln=True)
-    
-    pdf.set_font('Helvetica', '', 10)
-    
-    dados_principais = [
-        ["Salário Mensal", formatar_reais(salario_mensal), "Base de cálculo"],
-        ["Salário Anual", formatar_reais(salario_anual), "14x (inclui PLR)"],
-        ["Contribuição Mensal", formatar_reais(contribuicao_mensal_total), "Total mensal"],
-        ["Contribuição Anual", formatar_reais(total_contribuicao_anual), "Acumulado anual"],
-        ["Contribuição Esporádica", formatar_reais(valor_esporadica_personalizado), "Valor escolhido"],
-        ["TOTAL FINAL", formatar_reais(total_final), "Anual com esporádica"]
-    ]
-    
-    for desc, valor, detalhe in dados_principais:
-        pdf.cell(60, 8, desc, border=1)
-        pdf.cell(40, 8, valor, border=1, align="R")
-        pdf.cell(40, 8, detalhe, border=1, ln=True)
-    
-    pdf.ln(10)
-    
-    # ===== GERAR PDF EM MEMÓRIA =====
-    output = BytesIO()
-    
-    # Usar latin-1 para evitar problemas de codificação
-    pdf_output = pdf.output(dest='S').encode('latin-1', 'ignore')
-    
-    output.write(pdf_output)
-    output.seek(0)
-    
-    return output
+def tabela_resumo(resumo_df):
+    """Resumo tipado para o st.dataframe: centavos em reais; a formatação fica com o column_config"""
+    return pd.DataFrame({
+        "Descrição": resumo_df["Descrição"],
+        "Valor (R$)": resumo_df["Centavos"] / 100,
+        "Percentual": resumo_df["Razão"],
+        "Quantidade": resumo_df["Quantidade"],
+    })
+
+# Exportações memoizadas pelas entradas da simulação (compartilhadas entre sessões).
+# Os argumentos com "_" não entram no hash: são derivados de `entradas`.
+MAX_EXPORTACOES_EM_CACHE = 256
+
+@st.cache_data(max_entries=MAX_EXPORTACOES_EM_CACHE, show_spinner=False)
+def gerar_excel_em_cache(entradas, _resumo_df):
+    """Gera o Excel da simulação uma única vez para cada conjunto de entradas"""
+    with etapa("excel"):
+        return converter_para_excel(_resumo_df).getvalue()
+
+# O recibo traz a data e a hora da simulação: o minuto impresso faz parte da chave, para
+# que um recibo em cache nunca saia com a data de outro momento (e expira logo depois)
+TTL_RECIBOS = 120
+
+@st.cache_data(max_entries=MAX_EXPORTACOES_EM_CACHE, ttl=TTL_RECIBOS, show_spinner=False)
+def gerar_pdf_em_cache(entradas, data_simulacao, _valores_recibo):
+    """Gera o recibo em PDF uma única vez para cada conjunto de entradas e data impressa"""
+    # fpdf (e requests, para o logo) só são carregados quando um recibo é pedido
+    from recibo import gerar_pdf_recibo
+    with etapa("pdf"):
+        return gerar_pdf_recibo(**_valores_recibo, data_simulacao=data_simulacao).getvalue()
+
+def solicitar_exportacao(chave, entradas, evento):
+    """Marca a exportação como solicitada para as entradas atuais e a registra no histórico"""
+    st.session_state[chave] = entradas
+    historico.registrar(evento, entradas)
+
+# Resultado da simulação e resumo memoizados pelas entradas (compartilhados entre sessões).
+# Cenários repetidos (salários redondos, sliders no padrão) não recalculam nem remontam
+# o resumo. O cache_resource devolve o mesmo objeto a todas as sessões, sem cópia:
+# por isso os arrays do resultado ficam somente leitura e o resumo_df não é alterado.
+MAX_SIMULACOES_EM_CACHE = 4096
+TTL_SIMULACOES = "6h"
+
+def simular_em_cache(entradas):
+    """
+    (resultado, resumo_df) para as entradas
+    (ano, salário, Parcela B, voluntária, quantidade, incluir esporádica, valor da esporádica)
+    """
+    instrumentacao.contar_consulta_cache("simulacao")
+    return _simular_em_cache(entradas)
+
+@st.cache_resource(max_entries=MAX_SIMULACOES_EM_CACHE, ttl=TTL_SIMULACOES, show_spinner=False)
+def _simular_em_cache(entradas):
+    instrumentacao.contar_falha_cache("simulacao")
+    (ano, salario_mensal, contribuicao_basica_outro_pct, contribuicao_voluntaria_pct,
+     quantidade_contribuicoes, incluir_esporadica, valor_esporadica) = entradas
+    with etapa("calculo"):
+        resultado = calcular_simulacao(
+            salario_mensal,
+            contribuicao_basica_outro_pct,
+            contribuicao_voluntaria_pct,
+            quantidade_contribuicoes,
+            valor_esporadica=valor_esporadica,
+            incluir_esporadica=incluir_esporadica,
+            parametros=parametros_do_ano(ano),
+        )
+        for valores in resultado.values():
+            valores.setflags(write=False)
+
+    # Resumo tipado (mesmas linhas do processamento em lote), formatado só na exibição
+    with etapa("resumo"):
+        resumo_df = resumo_tipado(resultado)
+    return resultado, resumo_df
+
+# Faixas da projeção até a aposentadoria, memoizadas pelo cenário (compartilhadas entre sessões)
+MAX_PROJECOES_EM_CACHE = 4096
+
+def projetar_em_cache(cenario):
+    """
+    Percentis do saldo ano a ano para o cenário (contribuição mensal, quantidade
+    de contribuições, esporádica, anos até a aposentadoria, perfil, saldo atual)
+    """
+    instrumentacao.contar_consulta_cache("projecao")
+    return _projetar_em_cache(cenario)
+
+@st.cache_resource(max_entries=MAX_PROJECOES_EM_CACHE, ttl=TTL_SIMULACOES, show_spinner=False)
+def _projetar_em_cache(cenario):
+    instrumentacao.contar_falha_cache("projecao")
+    contribuicao_mensal, quantidade_contribuicoes, valor_esporadica, anos, perfil, saldo_atual = cenario
+    retorno_real, volatilidade = PERFIS_INVESTIMENTO[perfil]
+    with etapa("projecao"):
+        faixas = projetar_saldo(contribuicao_mensal, quantidade_contribuicoes, valor_esporadica, anos,
+                                retorno_real, volatilidade, saldo_inicial=saldo_atual)
+    faixas.setflags(write=False)
+    return faixas
+
+# Valores derivados da simulação guardados na sessão (ver grafo.py). O grafo só tem os nós
+# que não dependem da esporádica, exibidos antes dela; os que dependem (total final,
+# percentual, progresso) saem prontos do cache da simulação, sem serem calculados de novo
+NOS_ANTES_DA_ESPORADICA = sem_dependentes_de("valor_esporadica")
+
+def grafo_da_sessao():
+    """Grafo incremental desta sessão"""
+    return GrafoIncremental(st.session_state.setdefault("grafo_simulacao", {}), nos=NOS_ANTES_DA_ESPORADICA)
+
+def legenda_valor_mensal(valor):
+    """Legenda com o valor mensal, abaixo de cada percentual"""
+    return f"**Valor mensal:** {formatar_reais(valor)}"
+
+# Mapa de combinações: a grade inteira de Parcela B × voluntária × quantidade de
+# contribuições (os mesmos passos dos sliders), calculada de uma vez pelo motor e
+# memoizada por (ano, salário), compartilhada entre sessões como as simulações
+GRADE_PARCELA_B = np.arange(4.5, 10.0 + 0.25, 0.5)  # 12 valores
+GRADE_VOLUNTARIA = np.arange(0.0, 10.0 + 0.5, 1.0)  # 11 valores
+GRADE_QUANTIDADE = np.arange(0, 14)  # 14 valores
+MAX_GRADES_EM_CACHE = 1024
+
+def varrer_em_cache(entradas):
+    """
+    DataFrame com uma linha por combinação (sem esporádica) para as entradas
+    (ano, salário): percentual recolhido, esporádica necessária para o limite
+    fiscal e se a combinação já atinge o limite
+    """
+    instrumentacao.contar_consulta_cache("varredura")
+    return _varrer_em_cache(entradas)
+
+@st.cache_resource(max_entries=MAX_GRADES_EM_CACHE, ttl=TTL_SIMULACOES, show_spinner=False)
+def _varrer_em_cache(entradas):
+    instrumentacao.contar_falha_cache("varredura")
+    ano, salario_mensal = entradas
+    parametros = parametros_do_ano(ano)
+    parcela_b, voluntaria, quantidade = np.meshgrid(GRADE_PARCELA_B, GRADE_VOLUNTARIA, GRADE_QUANTIDADE,
+                                                    indexing="ij")
+    with etapa("varredura"):
+        resultado = calcular_simulacao(salario_mensal, parcela_b, voluntaria, quantidade,
+                                       incluir_esporadica=False, parametros=parametros)
+        return pd.DataFrame({
+            "parcela_b": parcela_b.ravel(),
+            "voluntaria": voluntaria.ravel(),
+            "quantidade": quantidade.ravel(),
+            "contribuicao_mensal": resultado["contribuicao_mensal_total"].ravel(),
+            "percentual": resultado["percentual_recolhido"].ravel(),
+            "esporadica_necessaria": np.maximum(resultado["valor_ideal_esporadica"], 0.0).ravel(),
+            "atinge_limite": (resultado["percentual_recolhido"] >= parametros.percentual_maximo).ravel(),
+        })
+
+def aplicar_combinacao():
+    """Leva a combinação clicada no mapa para os sliders (a página reexecuta em seguida)"""
+    selecao = st.session_state["mapa_combinacoes"].selection.get("combinacao") or []
+    if selecao:
+        combinacao = selecao[0]
+        st.session_state["parcela_b"] = float(combinacao["parcela_b"])
+        st.session_state["voluntaria"] = float(combinacao["voluntaria"])
+        st.session_state["quantidade_contribuicoes"] = int(combinacao["quantidade"])
+
+# Passo do slider da esporádica personalizada: os valores vão do mínimo em múltiplos do passo
+PASSO_ESPORADICA = 50.0
+
+def esporadica_no_passo(valor, minimo, maximo):
+    """
+    Leva a esporádica para a grade do slider (mínimo + múltiplos de PASSO_ESPORADICA).
+
+    Arredonda para cima, para não ficar aquém do limite fiscal; se passar do
+    máximo permitido, arredonda para baixo.
+    """
+    passos = round((valor - minimo) / PASSO_ESPORADICA, 6)  # Sem o ruído do float (2.0000000001 passos)
+    acima = minimo + np.ceil(passos) * PASSO_ESPORADICA
+    return round(float(acima if acima <= maximo else minimo + np.floor(passos) * PASSO_ESPORADICA), 2)
+
+def aplicar_recomendacao(parcela_b, voluntaria, esporadica):
+    """Leva a combinação de menor custo para os sliders (a página reexecuta em seguida)"""
+    st.session_state["parcela_b"] = parcela_b
+    st.session_state["voluntaria"] = voluntaria
+    st.session_state["incluir_esporadica"] = esporadica > 0
+    if esporadica > 0:
+        st.session_state["esporadica_aplicada"] = esporadica
+
+# Medição das etapas do rerun (sem efeito se SIMULADOR_METRICAS não estiver ativo)
+instrumentacao.iniciar_rerun()
 
 # Configurar página com CSS personalizado
 st.set_page_config(
@@ -129,179 +227,192 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# CSS personalizado para estilo FRG - CORRIGIDO (cores verdes alteradas para vermelho/bordô)
-st.markdown("""
-<style>
-    /* Estilos gerais inspirados no site da FRG */
-    .main {
-        background-color: #f8f9fa;
-    }
-    
-    .stApp {
-        background-color: #f8f9fa;
-    }
-    
-    /* Cabeçalho estilo FRG */
-    .header-frg {
-        background: linear-gradient(135deg, #8b043b 0%, #69042a 100%);
-        color: white;
-        padding: 2rem 1rem;
-        border-radius: 0 0 10px 10px;
-        margin-bottom: 2rem;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
-    }
-    
-    /* Cards estilo FRG */
-    .card-frg {
-        background: white;
-        border-radius: 10px;
-        padding: 0.8rem 1.2rem !important;;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
-        border-left: 4px solid #69042a;
-        margin-bottom: 1.5rem;
-    }
-    
-    .card-title {
-        color: #8b043b;
-        font-weight: 600;
-        font-size: 1.2rem;
-        margin-bottom: 1rem;
-        border-bottom: 2px solid #e9ecef;
-        padding-bottom: 0.5rem;
-    }
-    
-    /* Botões estilo FRG */
-    .stButton > button {
-        background: linear-gradient(135deg, #8b043b 0%, #69042a 100%);
-        color: white;
-        border: none;
-        border-radius: 6px;
-        padding: 0.75rem 1.5rem;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        background: linear-gradient(135deg, #6a032d 0%, #4d031f 100%); /* Corrigido: vermelho mais escuro */
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(139, 4, 59, 0.2); /* Corrigido: vermelho no box-shadow */
-    }
-    
-    /* Sliders estilo FRG */
-    .stSlider > div > div > div {
-        background-color: #69042a !important;
-    }
-    
-    /* Métricas estilo FRG */
-    .stMetric {
-        background: white;
-        border-radius: 8px;
-        padding: 1rem;
-        box-shadow: 0 2px 6px rgba(0, 0, 0, 0.05);
-    }
-    
-    .stMetric > div > div {
-        color: #8b043b !important;
-        font-weight: 700 !important;
-    }
-    
-    .stMetric label {
-        color: #495057 !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Divisores */
-    .stDivider {
-        margin: 2rem 0 !important;
-    }
-    
-    /* Tabela estilo FRG */
-    .dataframe {
-        border-radius: 8px;
-        overflow: hidden;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
-    }
-    
-    .dataframe thead {
-        background-color: #8b043b !important;
-        color: white !important;
-    }
-    
-    /* Avisos e informações */
-    .stAlert {
-        border-radius: 8px;
-    }
-    
-    /* Progress bar estilo FRG */
-    .stProgress > div > div > div {
-        background-color: #69042a !important;
-    }
-    
-    /* Inputs estilo FRG */
-    .stNumberInput input {
-        border: 2px solid #e9ecef;
-        border-radius: 6px;
-    }
-    
-    .stNumberInput input:focus {
-        border-color: #69042a;
-        box-shadow: 0 0 0 0.2rem rgba(139, 4, 59, 0.25); /* Corrigido: vermelho no box-shadow */
-    }
-    
-    /* Badges para valores fixos*/
-    .badge-frg {
-        background-color: #f9e9ef;  /* Vermelho claro */
-        color: #8b043b;
-        padding: 0.5rem 1rem;
-        border-radius: 20px;
-        font-weight: 600;
-        border: 1px solid #e6b8c6;  /* Borda vermelha clara */
-    }
-    
-    /* Classes para backgrounds vermelhos */
-    .bg-frg-light {
-        background-color: #f9e9ef !important;  /* Vermelho muito claro */
-    }
-    
-    .bg-frg-lighter {
-        background-color: #fcf2f6 !important;  /* Vermelho super claro */
-    }
-    
-    .bg-frg-soft {
-        background-color: #f5d8e2 !important;  /* Vermelho suave */
-    }
-</style>
-""", unsafe_allow_html=True)
+# Regras do plano (lidas e validadas uma única vez por processo). Com mais de
+# um ano na tabela, o participante escolhe as regras de qual ano simular.
+anos_plano = anos_disponiveis()
+if len(anos_plano) > 1:
+    with etapa("entrada"):
+        ano_simulacao = st.selectbox("**Ano das regras do plano**", anos_plano, index=len(anos_plano) - 1)
+else:
+    ano_simulacao = anos_plano[0]
+parametros = parametros_do_ano(ano_simulacao)
+limite_fiscal = f"{parametros.percentual_maximo * 100:g}%".replace(".", ",")  # "12%"
+prazo_contribuicao = parametros.prazo.strftime("%d/%m/%Y")
 
-# Logo FRG centralizado
-st.markdown("""
-<div style="display: flex; justify-content: center; margin: 2rem 0 1rem 0;">
-    <img src="https://imeb.com.br/wp-content/uploads/2023/03/Real-Grandeza.jpg" 
-         alt="FRG Logo" 
-         style="max-height: 120px; width: auto;">
-</div>
-""", unsafe_allow_html=True)
+with etapa("html"):
+    # CSS personalizado para estilo FRG - CORRIGIDO (cores verdes alteradas para vermelho/bordô)
+    st.markdown("""
+    <style>
+        /* Estilos gerais inspirados no site da FRG */
+        .main {
+            background-color: #f8f9fa;
+        }
+    
+        .stApp {
+            background-color: #f8f9fa;
+        }
+    
+        /* Cabeçalho estilo FRG */
+        .header-frg {
+            background: linear-gradient(135deg, #8b043b 0%, #69042a 100%);
+            color: white;
+            padding: 2rem 1rem;
+            border-radius: 0 0 10px 10px;
+            margin-bottom: 2rem;
+            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
+        }
+    
+        /* Cards estilo FRG */
+        .card-frg {
+            background: white;
+            border-radius: 10px;
+            padding: 0.8rem 1.2rem !important;;
+            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
+            border-left: 4px solid #69042a;
+            margin-bottom: 1.5rem;
+        }
+    
+        .card-title {
+            color: #8b043b;
+            font-weight: 600;
+            font-size: 1.2rem;
+            margin-bottom: 1rem;
+            border-bottom: 2px solid #e9ecef;
+            padding-bottom: 0.5rem;
+        }
+    
+        /* Botões estilo FRG */
+        .stButton > button {
+            background: linear-gradient(135deg, #8b043b 0%, #69042a 100%);
+            color: white;
+            border: none;
+            border-radius: 6px;
+            padding: 0.75rem 1.5rem;
+            font-weight: 600;
+            transition: all 0.3s ease;
+        }
+    
+        .stButton > button:hover {
+            background: linear-gradient(135deg, #6a032d 0%, #4d031f 100%); /* Corrigido: vermelho mais escuro */
+            transform: translateY(-2px);
+            box-shadow: 0 4px 12px rgba(139, 4, 59, 0.2); /* Corrigido: vermelho no box-shadow */
+        }
+    
+        /* Sliders estilo FRG */
+        .stSlider > div > div > div {
+            background-color: #69042a !important;
+        }
+    
+        /* Métricas estilo FRG */
+        .stMetric {
+            background: white;
+            border-radius: 8px;
+            padding: 1rem;
+            box-shadow: 0 2px 6px rgba(0, 0, 0, 0.05);
+        }
+    
+        .stMetric > div > div {
+            color: #8b043b !important;
+            font-weight: 700 !important;
+        }
+    
+        .stMetric label {
+            color: #495057 !important;
+            font-weight: 600 !important;
+        }
+    
+        /* Divisores */
+        .stDivider {
+            margin: 2rem 0 !important;
+        }
+    
+        /* Tabela estilo FRG */
+        .dataframe {
+            border-radius: 8px;
+            overflow: hidden;
+            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
+        }
+    
+        .dataframe thead {
+            background-color: #8b043b !important;
+            color: white !important;
+        }
+    
+        /* Avisos e informações */
+        .stAlert {
+            border-radius: 8px;
+        }
+    
+        /* Progress bar estilo FRG */
+        .stProgress > div > div > div {
+            background-color: #69042a !important;
+        }
+    
+        /* Inputs estilo FRG */
+        .stNumberInput input {
+            border: 2px solid #e9ecef;
+            border-radius: 6px;
+        }
+    
+        .stNumberInput input:focus {
+            border-color: #69042a;
+            box-shadow: 0 0 0 0.2rem rgba(139, 4, 59, 0.25); /* Corrigido: vermelho no box-shadow */
+        }
+    
+        /* Badges para valores fixos*/
+        .badge-frg {
+            background-color: #f9e9ef;  /* Vermelho claro */
+            color: #8b043b;
+            padding: 0.5rem 1rem;
+            border-radius: 20px;
+            font-weight: 600;
+            border: 1px solid #e6b8c6;  /* Borda vermelha clara */
+        }
+    
+        /* Classes para backgrounds vermelhos */
+        .bg-frg-light {
+            background-color: #f9e9ef !important;  /* Vermelho muito claro */
+        }
+    
+        .bg-frg-lighter {
+            background-color: #fcf2f6 !important;  /* Vermelho super claro */
+        }
+    
+        .bg-frg-soft {
+            background-color: #f5d8e2 !important;  /* Vermelho suave */
+        }
+    </style>
+    """, unsafe_allow_html=True)
 
-# Cabeçalho estilo FRG
-st.markdown("""
-<div class="header-frg">
-    <div style="display: flex; align-items: center; margin-bottom: 1rem;">
-        <div style="flex: 1;">
-            <h1 style="margin: 0; font-size: 2rem; font-weight: 700;">Simulador de Contribuição Esporádica</h1>
-            <p style="margin: 0.5rem 0 0 0; opacity: 0.9; font-size: 1.1rem;">
-                Fundação de Previdência Real Grandeza
-            </p>
-        </div>
-        <div style="font-size: 0.9rem; text-align: right; opacity: 0.8;">
-            <div>Incentivo Fiscal 2025</div>
-            <div>Prazo: até 31/12/2025</div>
+    # Logo FRG centralizado
+    st.markdown("""
+    <div style="display: flex; justify-content: center; margin: 2rem 0 1rem 0;">
+        <img src="https://imeb.com.br/wp-content/uploads/2023/03/Real-Grandeza.jpg" 
+             alt="FRG Logo" 
+             style="max-height: 120px; width: auto;">
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Cabeçalho estilo FRG
+    st.markdown(f"""
+    <div class="header-frg">
+        <div style="display: flex; align-items: center; margin-bottom: 1rem;">
+            <div style="flex: 1;">
+                <h1 style="margin: 0; font-size: 2rem; font-weight: 700;">Simulador de Contribuição Esporádica</h1>
+                <p style="margin: 0.5rem 0 0 0; opacity: 0.9; font-size: 1.1rem;">
+                    Fundação de Previdência Real Grandeza
+                </p>
+            </div>
+            <div style="font-size: 0.9rem; text-align: right; opacity: 0.8;">
+                <div>Incentivo Fiscal {ano_simulacao}</div>
+                <div>Prazo: até {prazo_contribuicao}</div>
+            </div>
         </div>
+        <p style="margin: 0; font-size: 1rem; opacity: 0.9;">
+            Simule sua contribuição esporádica e maximize seu benefício fiscal
+        </p>
     </div>
-    <p style="margin: 0; font-size: 1rem; opacity: 0.9;">
-        Simule sua contribuição esporádica e maximize seu benefício fiscal
-    </p>
-</div>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 st.markdown('<div class="card-frg">', unsafe_allow_html=True)
 st.markdown('<div class="card-title">📋 Informações para Simulação</div>', unsafe_allow_html=True)
@@ -313,6 +424,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
+# Valores iniciais dos campos que o mapa de combinações e a recomendação também ajustam.
+# Eles vêm da sessão, e não de `value=`, porque o clique altera as suas chaves.
+for chave, inicial in (("parcela_b", 10.0), ("voluntaria", 0.0), ("quantidade_contribuicoes", 13),
+                       ("incluir_esporadica", True)):
+    st.session_state.setdefault(chave, inicial)
+
 # Layout principal com colunas
 col1, col2 = st.columns([1, 1])
 
@@ -321,23 +438,18 @@ with col1:
     st.markdown('<div class="card-title">💰 Dados de Entrada</div>', unsafe_allow_html=True)
     
     # Informações básicas
-    salario_mensal = st.number_input(
-        "**Salário Mensal (R$)**",
-        min_value=0.0,
-        value=10000.0,
-        step=100.0,
-        format="%.2f",
-        help="Informe seu salário mensal bruto"
-    )
+    with etapa("entrada"):
+        salario_mensal = st.number_input(
+            "**Salário Mensal (R$)**",
+            min_value=0.0,
+            value=10000.0,
+            step=100.0,
+            format="%.2f",
+            help="Informe seu salário mensal bruto"
+        )
     
-    salario_anual = salario_mensal * 14
-    
-    st.markdown(f"""
-    <div style="background: #f8f9fa; padding: 1rem; border-radius: 6px; margin: 1rem 0;">
-        <div style="font-size: 0.9rem; color: #6c757d;">Salário Anual estimado (14× incluindo PLR)</div>
-        <div style="font-size: 1.5rem; font-weight: 700; color: #8b043b;">{formatar_reais(salario_anual)}</div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Os valores derivados são preenchidos depois que todas as entradas forem lidas
+    espaco_salario_anual = st.empty()
     
     # CORRIGIDO: #f0f9f4 (verde) para #fcf2f6 (vermelho super claro)
     st.markdown("""
@@ -352,7 +464,7 @@ with col1:
     
     with col1a:
         # Valor FIXO de 2% - não é mais um slider editável pelo usuário
-        contribuicao_basica_pct = 2.0  # Valor fixo
+        contribuicao_basica_pct = CONTRIBUICAO_BASICA_PCT  # Valor fixo
         
         # Exibir o valor fixo de forma elegante
         st.markdown("""
@@ -363,45 +475,22 @@ with col1:
         </div>
         """, unsafe_allow_html=True)
         
-        # Cálculo do valor (mantido igual)
-        contribuicao_basica = contribuicao_basica_pct / 100
-        valor_basica = salario_mensal * contribuicao_basica
-        st.caption(f"**Valor mensal:** {formatar_reais(valor_basica)}")
+        espaco_valor_basica = st.empty()
 
     with col1b:
-        contribuicao_basica_outro_pct = st.slider(
-            "**Contribuição Básica B (%)**",
-            min_value=4.5,
-            max_value=10.0,
-            value=10.0,
-            step=0.5,
-            format="%.1f%%",
-            help="Parcela B da contribuição básica"
-        )
-        contribuicao_basica_outro = contribuicao_basica_outro_pct / 100
-        
-        # Valores fixos para UR
-        VALOR_UR_FIXO = 795.68
-        QUANTIDADE_UR_FIXA = 7
-        
-        valor_outro = 0 if salario_mensal < (QUANTIDADE_UR_FIXA * VALOR_UR_FIXO) else (salario_mensal - (QUANTIDADE_UR_FIXA * VALOR_UR_FIXO)) * contribuicao_basica_outro
-        st.caption(f"**Valor mensal:** {formatar_reais(valor_outro)}")
-    
-    # Cálculo da contribuição básica mensal
-    if (salario_mensal - (QUANTIDADE_UR_FIXA * VALOR_UR_FIXO)) < 0:
-        valor_base = 0
-    else:
-        valor_base = (salario_mensal - (QUANTIDADE_UR_FIXA * VALOR_UR_FIXO)) * contribuicao_basica_outro
-    
-    contribuicao_mensal_sem_voluntaria = (salario_mensal * contribuicao_basica) + valor_base
-    
-    # CORRIGIDO: #e9f7ef (verde) para #f9e9ef (vermelho claro) e #b8e6cb para #e6b8c6
-    st.markdown(f"""
-    <div style="background: #f9e9ef; padding: 1rem; border-radius: 6px; margin: 1.5rem 0; border: 1px solid #e6b8c6;">
-        <div style="font-size: 0.9rem; color: #8b043b;">Contribuição Básica Mensal</div>
-        <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b; text-align: center;">{formatar_reais(contribuicao_mensal_sem_voluntaria)}</div>
-    </div>
-    """, unsafe_allow_html=True)
+        with etapa("entrada"):
+            contribuicao_basica_outro_pct = st.slider(
+                "**Contribuição Básica B (%)**",
+                min_value=4.5,
+                max_value=10.0,
+                key="parcela_b",
+                step=0.5,
+                format="%.1f%%",
+                help="Parcela B da contribuição básica"
+            )
+        espaco_valor_outro = st.empty()
+    
+    espaco_mensal_sem_voluntaria = st.empty()
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -417,19 +506,19 @@ with col2:
         <div style="display: flex; gap: 1rem;">
             <div style="flex: 1; text-align: center; background: #f8f9fa; padding: 1rem; border-radius: 6px;">
                 <div style="font-size: 0.8rem; color: #6c757d;">Quantidade</div>
-                <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">7</div>
+                <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">{parametros.quantidade_ur}</div>
                 <div class="badge-frg" style="margin-top: 0.5rem; font-size: 0.7rem;">FIXO</div>
             </div>
             <div style="flex: 1; text-align: center; background: #f8f9fa; padding: 1rem; border-radius: 6px;">
                 <div style="font-size: 0.8rem; color: #6c757d;">Valor da UR</div>
-                <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">{formatar_reais(VALOR_UR_FIXO)}</div>
+                <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">{formatar_reais(parametros.valor_ur)}</div>
                 <div class="badge-frg" style="margin-top: 0.5rem; font-size: 0.7rem;">FIXO</div>
             </div>
         </div>
     </div>
     """, unsafe_allow_html=True)
     
-    total_ur = QUANTIDADE_UR_FIXA * VALOR_UR_FIXO
+    total_ur = parametros.total_ur
     
     # CORRIGIDO: #f0f9f4 (verde) para #fcf2f6 (vermelho super claro)
     st.markdown(f"""
@@ -449,45 +538,71 @@ with col2:
     </div>
     """, unsafe_allow_html=True)
     
-    contribuicao_voluntaria_pct = st.slider(
-        "**Contribuição Voluntária (%)**",
-        min_value=0.0,
-        max_value=10.0,
-        value=0.0,
-        step=1.0,
-        format="%.1f%%",
-        help="Percentual de contribuição voluntária sobre o salário"
-    )
-    contribuicao_voluntaria_valor = salario_mensal * contribuicao_voluntaria_pct / 100
+    with etapa("entrada"):
+        contribuicao_voluntaria_pct = st.slider(
+            "**Contribuição Voluntária (%)**",
+            min_value=0.0,
+            max_value=10.0,
+            key="voluntaria",
+            step=1.0,
+            format="%.1f%%",
+            help="Percentual de contribuição voluntária sobre o salário"
+        )
+    espaco_valor_voluntaria = st.empty()
     
-    st.caption(f"**Valor mensal:** {formatar_reais(contribuicao_voluntaria_valor)}")
+    espaco_mensal_total = st.empty()
     
-    # Contribuição mensal total
-    contribuicao_mensal_total = contribuicao_mensal_sem_voluntaria + contribuicao_voluntaria_valor
+    # Quantidade de contribuições no ano
+    with etapa("entrada"):
+        quantidade_contribuicoes = st.slider(
+            "**Quantidade de contribuições realizadas no ano**",
+            min_value=0,
+            max_value=13,
+            key="quantidade_contribuicoes",
+            step=1,
+            help="Número de vezes que contribuiu ao longo do ano"
+        )
     
-    # CORRIGIDO: #e9f7ef (verde) para #f9e9ef (vermelho claro) e #b8e6cb para #e6b8c6
-    st.markdown(f"""
+    # Valores derivados pelo grafo do motor (mesmas fórmulas do processamento em lote):
+    # só os nós abaixo da entrada que mudou são recalculados, e só os cards com algum
+    # valor novo têm o HTML remontado
+    grafo = grafo_da_sessao()
+    grafo.definir("parametros", parametros)
+    grafo.definir("salario_mensal", salario_mensal)
+    grafo.definir("contribuicao_basica_outro_pct", contribuicao_basica_outro_pct)
+    grafo.definir("contribuicao_voluntaria_pct", contribuicao_voluntaria_pct)
+    grafo.definir("quantidade_contribuicoes", quantidade_contribuicoes)
+
+    with etapa("calculo"):
+        html_salario_anual = grafo.html("salario_anual", ("salario_anual",), lambda salario_anual: f"""
+    <div style="background: #f8f9fa; padding: 1rem; border-radius: 6px; margin: 1rem 0;">
+        <div style="font-size: 0.9rem; color: #6c757d;">Salário Anual estimado (14× incluindo PLR)</div>
+        <div style="font-size: 1.5rem; font-weight: 700; color: #8b043b;">{formatar_reais(salario_anual)}</div>
+    </div>
+    """)
+        legenda_valor_basica = grafo.html("valor_basica", ("valor_basica",), legenda_valor_mensal)
+        legenda_valor_outro = grafo.html("valor_outro", ("valor_outro",), legenda_valor_mensal)
+        # CORRIGIDO: #e9f7ef (verde) para #f9e9ef (vermelho claro) e #b8e6cb para #e6b8c6
+        html_mensal_sem_voluntaria = grafo.html(
+            "contribuicao_mensal_sem_voluntaria", ("contribuicao_mensal_sem_voluntaria",), lambda valor: f"""
+    <div style="background: #f9e9ef; padding: 1rem; border-radius: 6px; margin: 1.5rem 0; border: 1px solid #e6b8c6;">
+        <div style="font-size: 0.9rem; color: #8b043b;">Contribuição Básica Mensal</div>
+        <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b; text-align: center;">{formatar_reais(valor)}</div>
+    </div>
+    """)
+        legenda_valor_voluntaria = grafo.html(
+            "contribuicao_voluntaria_valor", ("contribuicao_voluntaria_valor",), legenda_valor_mensal
+        )
+        # CORRIGIDO: #e9f7ef (verde) para #f9e9ef (vermelho claro) e #b8e6cb para #e6b8c6
+        html_mensal_total = grafo.html("contribuicao_mensal_total", ("contribuicao_mensal_total",), lambda valor: f"""
     <div style="background: #f9e9ef; padding: 1rem; border-radius: 6px; margin: 1.5rem 0; border: 1px solid #e6b8c6;">
         <div style="font-size: 0.9rem; color: #8b043b;">Contribuição Mensal Total</div>
-        <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b; text-align: center;">{formatar_reais(contribuicao_mensal_total)}</div>
+        <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b; text-align: center;">{formatar_reais(valor)}</div>
     </div>
-    """, unsafe_allow_html=True)
-    
-    # Quantidade de contribuições no ano
-    quantidade_contribuicoes = st.slider(
-        "**Quantidade de contribuições realizadas no ano**",
-        min_value=0,
-        max_value=13,
-        value=13,
-        step=1,
-        help="Número de vezes que contribuiu ao longo do ano"
-    )
-    
-    # Total anual e percentual
-    total_contribuicao_anual = contribuicao_mensal_total * quantidade_contribuicoes
-    percentual_recolhido = total_contribuicao_anual / salario_anual if salario_anual > 0 else 0
-    
-    st.markdown(f"""
+    """)
+        html_total_anual = grafo.html(
+            "total_anual", ("total_contribuicao_anual", "percentual_recolhido"),
+            lambda total_contribuicao_anual, percentual_recolhido: f"""
     <div style="display: flex; gap: 1rem; margin: 1.5rem 0;">
         <div style="flex: 1; background: #f8f9fa; padding: 1rem; border-radius: 6px;">
             <div style="font-size: 0.8rem; color: #6c757d;">Total Anual</div>
@@ -498,17 +613,83 @@ with col2:
             <div style="font-size: 1.4rem; font-weight: 700; color: #8b043b;">{percentual_recolhido:.2%}</div>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
+
+    espaco_salario_anual.markdown(html_salario_anual, unsafe_allow_html=True)
+    espaco_valor_basica.caption(legenda_valor_basica)
+    espaco_valor_outro.caption(legenda_valor_outro)
+    espaco_mensal_sem_voluntaria.markdown(html_mensal_sem_voluntaria, unsafe_allow_html=True)
+    espaco_valor_voluntaria.caption(legenda_valor_voluntaria)
+    espaco_mensal_total.markdown(html_mensal_total, unsafe_allow_html=True)
+    st.markdown(html_total_anual, unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Mapa de combinações (modo de varredura)
+# A grade vem do cache por salário; clicar em uma célula só ajusta os sliders.
+st.markdown('<div class="card-frg">', unsafe_allow_html=True)
+if st.toggle("🧮 Explorar todas as combinações de Parcela B, voluntária e contribuições no ano",
+             key="modo_varredura",
+             help="Mostra, para o seu salário, o percentual e a esporádica necessária em cada combinação"):
+    grade = varrer_em_cache((parametros.ano, salario_mensal))
+    metrica = st.radio(
+        "**Cor das células**",
+        ["percentual", "esporadica_necessaria"],
+        format_func={"percentual": "Percentual sem esporádica",
+                     "esporadica_necessaria": "Esporádica necessária para o limite"}.get,
+        horizontal=True,
+        key="metrica_varredura",
+    )
+    st.caption(f"Cada quadro é uma quantidade de contribuições no ano. Em verde, as combinações que já atingem "
+               f"{limite_fiscal} sem esporádica; com contorno preto, a combinação atual. Clique em uma célula para "
+               f"usá-la nos sliders.")
+    with etapa("grafico"):
+        combinacao_atual = (f"datum.parcela_b == {contribuicao_basica_outro_pct} && "
+                            f"datum.voluntaria == {contribuicao_voluntaria_pct} && "
+                            f"datum.quantidade == {quantidade_contribuicoes}")
+        # Especificação Vega-Lite direta (sem altair, como na projeção), em uma única visão: o Streamlit
+        # só aceita seleção sem camadas, então destaques vêm de condições na cor e no contorno
+        st.vega_lite_chart(grade, {
+            "config": {"locale": {"number": {"decimal": ",", "thousands": ".", "grouping": [3],
+                                             "currency": ["R$ ", ""]}},
+                       "view": {"stroke": None}},
+            "width": 120,
+            "height": 120,
+            "params": [{"name": "combinacao",
+                        "select": {"type": "point", "on": "click", "clear": False,
+                                   "fields": ["parcela_b", "voluntaria", "quantidade"]}}],
+            "mark": {"type": "rect", "cursor": "pointer"},
+            "encoding": {
+                "facet": {"field": "quantidade", "type": "ordinal", "title": "Contribuições no ano", "columns": 7},
+                "x": {"field": "parcela_b", "type": "ordinal", "title": "Parcela B (%)", "axis": {"labelAngle": 0}},
+                "y": {"field": "voluntaria", "type": "ordinal", "title": "Voluntária (%)", "sort": "descending"},
+                "color": {"condition": {"test": "datum.atinge_limite", "value": "#2e7d32"},
+                          "field": metrica, "type": "quantitative",
+                          "scale": {"scheme": "reds", "reverse": metrica == "esporadica_necessaria"},
+                          "legend": {"format": ".0%" if metrica == "percentual" else "$,.0f", "title": None}},
+                "stroke": {"condition": {"test": combinacao_atual, "value": "black"}, "value": None},
+                "strokeWidth": {"condition": {"test": combinacao_atual, "value": 3}, "value": 0},
+                "tooltip": [
+                    {"field": "parcela_b", "type": "quantitative", "title": "Parcela B (%)"},
+                    {"field": "voluntaria", "type": "quantitative", "title": "Voluntária (%)"},
+                    {"field": "quantidade", "type": "quantitative", "title": "Contribuições"},
+                    {"field": "contribuicao_mensal", "type": "quantitative",
+                     "title": "Contribuição mensal", "format": "$,.2f"},
+                    {"field": "percentual", "type": "quantitative",
+                     "title": "Percentual sem esporádica", "format": ".2%"},
+                    {"field": "esporadica_necessaria", "type": "quantitative",
+                     "title": "Esporádica necessária", "format": "$,.2f"},
+                ],
+            },
+        }, key="mapa_combinacoes", on_select=aplicar_combinacao, selection_mode="combinacao")
+st.markdown('</div>', unsafe_allow_html=True)
+
 # Seção de contribuição esporádica
 st.markdown('<div class="card-frg">', unsafe_allow_html=True)
 st.markdown('<div class="card-title">🎯 Contribuição Esporádica para Benefício Fiscal</div>', unsafe_allow_html=True)
 
-percentual_maximo = 0.12
-valor_minimo_esporadica = 3 * VALOR_UR_FIXO
-valor_maximo_esporadica = salario_mensal * 5
+valor_minimo_esporadica = parametros.valor_minimo_esporadica
+valor_maximo_esporadica = grafo.valor("valor_maximo_esporadica")
 
 col3, col4 = st.columns(2)
 
@@ -522,20 +703,20 @@ with col3:
     st.markdown(f"""
     <div style="background: #f8f9fa; padding: 1rem; border-radius: 6px; margin: 0.5rem 0;">
         <div style="font-size: 0.85rem; color: #6c757d;">Percentual Máximo para Benefício Fiscal</div>
-        <div style="font-size: 1.2rem; font-weight: 700; color: #8b043b;">12%</div>
+        <div style="font-size: 1.2rem; font-weight: 700; color: #8b043b;">{limite_fiscal}</div>
     </div>
     """, unsafe_allow_html=True)
     
     st.markdown(f"""
     <div style="background: #f8f9fa; padding: 1rem; border-radius: 6px; margin: 0.5rem 0;">
-        <div style="font-size: 0.85rem; color: #6c757d;">Valor Mínimo (3 × UR)</div>
+        <div style="font-size: 0.85rem; color: #6c757d;">Valor Mínimo ({parametros.multiplicador_minimo_esporadica:g} × UR)</div>
         <div style="font-size: 1.2rem; font-weight: 700; color: #8b043b;">{formatar_reais(valor_minimo_esporadica)}</div>
     </div>
     """, unsafe_allow_html=True)
     
     st.markdown(f"""
     <div style="background: #f8f9fa; padding: 1rem; border-radius: 6px; margin: 0.5rem 0;">
-        <div style="font-size: 0.85rem; color: #6c757d;">Valor Máximo (5 × Salário)</div>
+        <div style="font-size: 0.85rem; color: #6c757d;">Valor Máximo ({parametros.multiplicador_maximo_esporadica:g} × Salário)</div>
         <div style="font-size: 1.2rem; font-weight: 700; color: #8b043b;">{formatar_reais(valor_maximo_esporadica)}</div>
     </div>
     """, unsafe_allow_html=True)
@@ -547,13 +728,13 @@ with col4:
     </div>
     """, unsafe_allow_html=True)
     
-    valor_ideal_esporadica = (percentual_maximo - percentual_recolhido) * salario_anual
+    valor_ideal_esporadica = grafo.valor("valor_ideal_esporadica")
     
     if valor_ideal_esporadica > 0:
         # CORRIGIDO: #e9f7ef (verde) para #f9e9ef (vermelho claro)
         st.markdown(f"""
         <div style="background: #f9e9ef; padding: 1.5rem; border-radius: 8px; margin: 0.5rem 0; border: 2px solid #69042a;">
-            <div style="font-size: 0.9rem; color: #8b043b; margin-bottom: 0.5rem;">Valor para atingir 12% do limite fiscal</div>
+            <div style="font-size: 0.9rem; color: #8b043b; margin-bottom: 0.5rem;">Valor para atingir {limite_fiscal} do limite fiscal</div>
             <div style="font-size: 2rem; font-weight: 700; color: #8b043b; text-align: center;">{formatar_reais(valor_ideal_esporadica)}</div>
             <div style="font-size: 0.8rem; color: #6c757d; text-align: center; margin-top: 0.5rem;">
                 Aplicando este valor, você aproveitará 100% do benefício fiscal
@@ -565,6 +746,27 @@ with col4:
             st.warning(f"**Atenção:** O valor ideal está abaixo do mínimo permitido de {formatar_reais(valor_minimo_esporadica)}")
         elif valor_ideal_esporadica > valor_maximo_esporadica:
             st.warning(f"**Atenção:** O valor ideal está acima do máximo permitido de {formatar_reais(valor_maximo_esporadica)}")
+        if not valor_minimo_esporadica <= valor_ideal_esporadica <= valor_maximo_esporadica:
+            # Fora da faixa, a esporádica sozinha não fecha o limite: sugere a combinação de menor custo
+            recomendacao = otimizar_limite_centavos(para_centavos(salario_mensal), quantidade_contribuicoes,
+                                                    parametros=parametros)
+            if recomendacao["atinge_limite"]:
+                esporadica_recomendada = recomendacao["valor_esporadica"] / 100
+                if esporadica_recomendada:
+                    # No passo do slider, para que "Aplicar" leve exatamente o valor mostrado
+                    esporadica_recomendada = esporadica_no_passo(
+                        esporadica_recomendada, round(valor_minimo_esporadica, 2), valor_maximo_esporadica)
+                total_recomendado = ((recomendacao["total_final"] - recomendacao["valor_esporadica"]) / 100
+                                     + esporadica_recomendada)
+                st.info(f"💡 **Menor custo para atingir {limite_fiscal}:** Parcela B de "
+                        f"{formatar_numero(float(recomendacao['contribuicao_basica_outro_pct']), 1)}%, voluntária de "
+                        f"{formatar_numero(float(recomendacao['contribuicao_voluntaria_pct']), 1)}%"
+                        + (f" e esporádica de {formatar_reais(esporadica_recomendada)}"
+                           if esporadica_recomendada else " e nenhuma esporádica")
+                        + f", total de {formatar_reais(total_recomendado)} no ano.")
+                st.button("Aplicar esta combinação", key="aplicar_recomendacao", on_click=aplicar_recomendacao,
+                          args=(float(recomendacao["contribuicao_basica_outro_pct"]),
+                                float(recomendacao["contribuicao_voluntaria_pct"]), esporadica_recomendada))
     else:
         # CORRIGIDO: #d4edda (verde) para #e6d4da (vermelho suave) e #c3e6cb para #d4c3c6
         st.markdown("""
@@ -580,325 +782,499 @@ with col4:
 
 st.markdown('</div>', unsafe_allow_html=True)
 
-# Seção para contribuição personalizada
-st.markdown('<div class="card-frg">', unsafe_allow_html=True)
-st.markdown('<div class="card-title">💡 Contribuição Esporádica Personalizada</div>', unsafe_allow_html=True)
+# ===== EXPORTAÇÕES =====
+# Fragmento: preparar ou baixar um documento reexecuta só esta seção.
+# As exportações só são geradas depois que o usuário pede, e somente para as
+# entradas atuais; se algum valor mudar, o botão de preparo volta a aparecer.
+@st.fragment
+@instrumentacao.medir_fragmento
+def secao_exportacao(entradas_simulacao, resumo_df, valores_recibo):
+    """Botões de Excel e PDF da simulação atual"""
+    # Botões de ação
+    st.markdown("""
+    <div style="margin-top: 2rem;">
+        <div style="display: flex; gap: 1rem; justify-content: center;">
+    """, unsafe_allow_html=True)
 
-st.markdown("""
-<p style="color: #6c757d; margin-bottom: 1.5rem;">
-    Caso deseje realizar um valor de contribuição diferente do sugerido, ajuste o valor abaixo:
-</p>
-""", unsafe_allow_html=True)
+    col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
 
-# --- ADICIONE ESTE CHECKBOX ---
-incluir_esporadica = st.checkbox(
-    "Incluir contribuição esporádica no cálculo",
-    value=True,  # Por padrão já está marcado
-    help="Desmarque esta opção se não quiser incluir uma contribuição esporádica"
-)
+    exportacoes = {}  # Documentos gerados nesta execução (medidos pela instrumentação)
+    with col_btn2:
+        # Botão para download da tabela em Excel
+        if st.session_state.get("excel_solicitado") == entradas_simulacao:
+            excel_data = exportacoes["excel_data"] = gerar_excel_em_cache(entradas_simulacao, resumo_df)
+            st.download_button(
+                label="📥 Baixar Relatório em Excel",
+                data=excel_data,
+                file_name=f"FRG_Simulacao_Contribuicao_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore",
+                use_container_width=True,
+                help="Baixe um relatório completo da simulação em formato Excel"
+            )
+        else:
+            st.button(
+                "📥 Preparar Relatório em Excel",
+                on_click=solicitar_exportacao,
+                args=("excel_solicitado", entradas_simulacao, "exportar_excel"),
+                use_container_width=True,
+                help="Gera o relatório completo da simulação em formato Excel"
+            )
 
-# AGORA, o slider só aparece se o checkbox estiver marcado
-if incluir_esporadica:
-    valor_esporadica_personalizado = st.slider(
-        "**Valor da Contribuição Esporádica (R$)**",
-        min_value=2387.04,
-        max_value=float(valor_maximo_esporadica * 1.1),
-        value=5000.0,
-        step=50.0,
-        format="%.0f",
-        help="Ajuste o valor conforme sua necessidade"
-    )
-else:
-    # Se o checkbox NÃO estiver marcado, o valor é ZERO
-    valor_esporadica_personalizado = 0.0
-    st.info("⚠️ A contribuição esporádica não será incluída no cálculo total.")
+    # NOVO BOTÃO PARA PDF
+    col_pdf1, col_pdf2, col_pdf3 = st.columns([1, 2, 1])
 
-# Cálculos finais
-if valor_esporadica_personalizado != 0:
-    total_final = valor_esporadica_personalizado + total_contribuicao_anual
-else:
-    total_final = total_contribuicao_anual
+    with col_pdf2:
+        # Gerar PDF somente depois que o botão for clicado
+        if st.session_state.get("pdf_solicitado") == entradas_simulacao:
+            pdf_data = exportacoes["pdf_data"] = gerar_pdf_em_cache(
+                entradas_simulacao, pd.Timestamp.now().strftime("%d/%m/%Y %H:%M"), valores_recibo
+            )
 
-novo_percentual = total_final / salario_anual if salario_anual > 0 else 0
-progresso = min(novo_percentual / percentual_maximo, 1.0)
+            st.download_button(
+                label="📄 Baixar Recibo em PDF",
+                data=pdf_data,
+                file_name=f"FRG_Recibo_Simulacao_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                mime="application/pdf",
+                on_click="ignore",
+                use_container_width=True,
+                help="Baixe o recibo oficial da simulação em formato PDF"
+            )
+        else:
+            st.button(
+                "📄 Gerar Recibo em PDF",
+                on_click=solicitar_exportacao,
+                args=("pdf_solicitado", entradas_simulacao, "exportar_pdf"),
+                use_container_width=True,
+                help="Gere um recibo oficial da simulação em formato PDF"
+            )
 
-st.markdown(f"""
-<div style="display: flex; gap: 1rem; margin: 2rem 0;">
-    <div style="flex: 1; background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
-        <div style="font-size: 0.9rem; color: #6c757d;">Total Final Anual</div>
-        <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">{formatar_reais(total_final)}</div>
+    st.markdown("""
+        </div>
     </div>
-    <div style="flex: 1; background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
-        <div style="font-size: 0.9rem; color: #6c757d;">Novo Percentual</div>
-        <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">{novo_percentual:.2%}</div>
+    """, unsafe_allow_html=True)
+
+    instrumentacao.registrar_objetos("exportacoes", exportacoes)
+    instrumentacao.registrar_objetos("sessao", st.session_state)
+
+
+# Projeção até a aposentadoria
+# Fragmento: idade, perfil e saldo atual só reexecutam a projeção. As faixas
+# vêm do cache por cenário; só o gráfico é montado a cada execução.
+@st.fragment
+@instrumentacao.medir_fragmento
+def secao_projecao(contribuicao_mensal_total, quantidade_contribuicoes, valor_esporadica):
+    """Faixas de percentis do saldo projetado até a aposentadoria"""
+    st.markdown('<div class="card-frg">', unsafe_allow_html=True)
+    st.markdown('<div class="card-title">📈 Projeção até a Aposentadoria</div>', unsafe_allow_html=True)
+
+    st.markdown("""
+    <p style="color: #6c757d; margin-bottom: 1.5rem;">
+        Repetindo a cada ano as contribuições desta simulação, veja quanto você pode acumular até se aposentar
+        em milhares de cenários de rentabilidade. Valores em reais de hoje (rentabilidade acima da inflação).
+    </p>
+    """, unsafe_allow_html=True)
+
+    with etapa("entrada"):
+        col_idade, col_aposentadoria, col_perfil, col_saldo = st.columns(4)
+        with col_idade:
+            idade_atual = st.number_input("**Idade atual**", min_value=18, max_value=80, value=35, step=1)
+        with col_aposentadoria:
+            idade_aposentadoria = st.number_input(
+                "**Idade de aposentadoria**", min_value=19, max_value=90, value=60, step=1
+            )
+        with col_perfil:
+            perfil = st.selectbox(
+                "**Perfil de investimento**",
+                list(PERFIS_INVESTIMENTO),
+                index=list(PERFIS_INVESTIMENTO).index(PERFIL_PADRAO),
+                help="; ".join(
+                    f"{nome}: {retorno:.0%} a.a. acima da inflação, volatilidade de {volatilidade:.0%}"
+                    for nome, (retorno, volatilidade) in PERFIS_INVESTIMENTO.items()
+                ),
+            )
+        with col_saldo:
+            saldo_atual = st.number_input(
+                "**Saldo atual no plano (R$)**", min_value=0.0, value=0.0, step=1000.0, format="%.2f"
+            )
+
+    anos = max(int(idade_aposentadoria) - int(idade_atual), 0)
+    faixas = projetar_em_cache((
+        round(contribuicao_mensal_total, 2), quantidade_contribuicoes, round(valor_esporadica, 2),
+        anos, perfil, round(saldo_atual, 2),
+    ))
+    aportado = total_aportado(contribuicao_mensal_total, quantidade_contribuicoes, valor_esporadica,
+                              anos, saldo_atual)
+
+    pessimista, _, mediana, _, otimista = faixas[:, -1]
+    st.markdown(f"""
+    <div style="display: flex; gap: 1rem; margin: 1rem 0 2rem 0;">
+        <div style="flex: 1; background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
+            <div style="font-size: 0.9rem; color: #6c757d;">Cenário pessimista (10%)</div>
+            <div style="font-size: 1.5rem; font-weight: 700; color: #69042a;">{formatar_reais(pessimista)}</div>
+        </div>
+        <div style="flex: 1; background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
+            <div style="font-size: 0.9rem; color: #6c757d;">Saldo mediano aos {int(idade_atual) + anos} anos</div>
+            <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">{formatar_reais(mediana)}</div>
+        </div>
+        <div style="flex: 1; background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
+            <div style="font-size: 0.9rem; color: #6c757d;">Cenário otimista (90%)</div>
+            <div style="font-size: 1.5rem; font-weight: 700; color: #69042a;">{formatar_reais(otimista)}</div>
+        </div>
     </div>
-</div>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
+
+    if anos > 0:
+        with etapa("grafico"):
+            dados = pd.DataFrame({
+                "Idade": np.arange(int(idade_atual), int(idade_atual) + anos + 1),
+                "p10": faixas[0], "p25": faixas[1], "p50": faixas[2], "p75": faixas[3], "p90": faixas[4],
+                "Aportado": aportado,
+            })
+            # Especificação Vega-Lite direta: o st.altair_chart carregaria o altair (~0,3 s) na primeira sessão
+            st.vega_lite_chart(dados, {
+                "encoding": {"x": {"field": "Idade", "type": "quantitative", "title": "Idade"}},
+                "layer": [
+                    {"mark": {"type": "area", "opacity": 0.2, "color": "#8b043b"},
+                     "encoding": {"y": {"field": "p10", "type": "quantitative", "title": "Saldo projetado (R$)"},
+                                  "y2": {"field": "p90"},
+                                  "tooltip": [
+                                      {"field": "Idade", "type": "quantitative"},
+                                      {"field": "p10", "type": "quantitative", "title": "10%", "format": ",.0f"},
+                                      {"field": "p50", "type": "quantitative", "title": "Mediana", "format": ",.0f"},
+                                      {"field": "p90", "type": "quantitative", "title": "90%", "format": ",.0f"},
+                                      {"field": "Aportado", "type": "quantitative", "format": ",.0f"},
+                                  ]}},
+                    {"mark": {"type": "area", "opacity": 0.35, "color": "#8b043b"},
+                     "encoding": {"y": {"field": "p25", "type": "quantitative"}, "y2": {"field": "p75"}}},
+                    {"mark": {"type": "line", "color": "#69042a", "strokeWidth": 3},
+                     "encoding": {"y": {"field": "p50", "type": "quantitative"}}},
+                    {"mark": {"type": "line", "color": "#6c757d", "strokeDash": [6, 4]},
+                     "encoding": {"y": {"field": "Aportado", "type": "quantitative"}}},
+                ],
+            }, use_container_width=True)
+        st.caption("Faixa clara: 10% a 90% dos cenários; faixa escura: 25% a 75%; linha: mediana; "
+                   "tracejado: total aportado, sem rentabilidade. Projeção ilustrativa, sem garantia de rentabilidade.")
+    else:
+        st.info("ℹ️ Informe uma idade de aposentadoria maior que a idade atual para ver a projeção.")
+
+    st.markdown('</div>', unsafe_allow_html=True)
 
-# Barra de progresso
 
-st.markdown(f"""
-<div style="margin: 1.5rem 0;">
-    <div style="display: flex; justify-content: space-between; margin-bottom: 0.5rem;">
-        <span style="font-size: 0.9rem; color: #8B043B;">Progresso do limite fiscal</span>
-        <span style="font-size: 0.9rem; font-weight: 600; color: #8b043b;">{progresso:.0%}</span>
+# Seção para contribuição personalizada
+# Fragmento: mexer no checkbox ou no slider da esporádica reexecuta só esta seção,
+# o resumo e as exportações, sem reenviar cabeçalho, estilos e cards de entrada.
+@st.fragment
+@instrumentacao.medir_fragmento
+def secao_esporadica_personalizada(parametros, salario_mensal, contribuicao_basica_outro_pct,
+                                   contribuicao_voluntaria_pct, quantidade_contribuicoes,
+                                   valor_maximo_esporadica):
+    """Esporádica personalizada, progresso do limite fiscal, resumo e exportações"""
+    st.markdown('<div class="card-frg">', unsafe_allow_html=True)
+    st.markdown('<div class="card-title">💡 Contribuição Esporádica Personalizada</div>', unsafe_allow_html=True)
+
+    st.markdown("""
+    <p style="color: #6c757d; margin-bottom: 1.5rem;">
+        Caso deseje realizar um valor de contribuição diferente do sugerido, ajuste o valor abaixo:
+    </p>
+    """, unsafe_allow_html=True)
+
+    # --- ADICIONE ESTE CHECKBOX ---
+    with etapa("entrada"):
+        incluir_esporadica = st.checkbox(
+            "Incluir contribuição esporádica no cálculo",
+            key="incluir_esporadica",  # Por padrão já está marcado
+            help="Desmarque esta opção se não quiser incluir uma contribuição esporádica"
+        )
+
+        # AGORA, o slider só aparece se o checkbox estiver marcado
+        if incluir_esporadica:
+            # Sem chave: a esporádica aplicada pela recomendação entra como `value=`, e o
+            # slider volta a ela (e não ao mínimo) quando a faixa muda com o salário
+            minimo_slider = round(parametros.valor_minimo_esporadica, 2)
+            maximo_slider = float(valor_maximo_esporadica * 1.1)
+            valor_esporadica_personalizado = st.slider(
+                "**Valor da Contribuição Esporádica (R$)**",
+                min_value=minimo_slider,
+                max_value=maximo_slider,
+                value=min(max(st.session_state.get("esporadica_aplicada", 5000.0), minimo_slider), maximo_slider),
+                step=PASSO_ESPORADICA,
+                format="%.0f",
+                help="Ajuste o valor conforme sua necessidade"
+            )
+        else:
+            # Se o checkbox NÃO estiver marcado, o valor é ZERO
+            valor_esporadica_personalizado = 0.0
+            st.info("⚠️ A contribuição esporádica não será incluída no cálculo total.")
+
+    # Cálculos finais (o resumo sai pronto do mesmo cache)
+    entradas_simulacao = (
+        parametros.ano,
+        salario_mensal,
+        contribuicao_basica_outro_pct,
+        contribuicao_voluntaria_pct,
+        quantidade_contribuicoes,
+        incluir_esporadica,
+        valor_esporadica_personalizado,
+    )
+    resultado, resumo_df = simular_em_cache(entradas_simulacao)
+    st.session_state["entradas_simulacao"] = entradas_simulacao  # Para o histórico ao clicar em "Nova Simulação"
+    instrumentacao.registrar_objetos("script", {"resultado": resultado, "resumo_df": resumo_df})
+    # Valores finais do resultado em cache; no grafo são só entradas, para os cards
+    # serem remontados apenas quando mudam
+    grafo = grafo_da_sessao()
+    for nome in ("total_final", "novo_percentual", "progresso"):
+        grafo.definir(nome, float(resultado[nome]))
+    total_final = grafo.valor("total_final")
+    novo_percentual = grafo.valor("novo_percentual")
+
+    st.markdown(grafo.html("total_final", ("total_final", "novo_percentual"), lambda total_final, novo_percentual: f"""
+    <div style="display: flex; gap: 1rem; margin: 2rem 0;">
+        <div style="flex: 1; background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
+            <div style="font-size: 0.9rem; color: #6c757d;">Total Final Anual</div>
+            <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">{formatar_reais(total_final)}</div>
+        </div>
+        <div style="flex: 1; background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
+            <div style="font-size: 0.9rem; color: #6c757d;">Novo Percentual</div>
+            <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">{novo_percentual:.2%}</div>
+        </div>
     </div>
-    <div style="width: 100%; background-color: #b4869c; border-radius: 10px; overflow: hidden; height: 12px;">
-        <div style="width: {progresso*100}%; background: linear-gradient(90deg, #8b043b 0%, #69042a 100%); height: 100%; border-radius: 10px; transition: width 0.5s ease;"></div>
+    """), unsafe_allow_html=True)
+
+    # Barra de progresso
+
+    st.markdown(grafo.html("progresso", ("progresso",), lambda progresso: f"""
+    <div style="margin: 1.5rem 0;">
+        <div style="display: flex; justify-content: space-between; margin-bottom: 0.5rem;">
+            <span style="font-size: 0.9rem; color: #8B043B;">Progresso do limite fiscal</span>
+            <span style="font-size: 0.9rem; font-weight: 600; color: #8b043b;">{progresso:.0%}</span>
+        </div>
+        <div style="width: 100%; background-color: #b4869c; border-radius: 10px; overflow: hidden; height: 12px;">
+            <div style="width: {progresso*100}%; background: linear-gradient(90deg, #8b043b 0%, #69042a 100%); height: 100%; border-radius: 10px; transition: width 0.5s ease;"></div>
+        </div>
     </div>
-</div>
-""", unsafe_allow_html=True)
+    """), unsafe_allow_html=True)
 
-if novo_percentual < percentual_maximo:
-    st.success(f"✅ Você ainda pode economizar mais! Seu aporte atual é de {novo_percentual:.2%} Você pode contribuir com mais {percentual_maximo - novo_percentual:.2%} para atingir o teto de 12% e garantir o desconto máximo no seu Imposto de Renda.")
-else:
-    st.warning(f"🚀 Investimento nota dez! Você atingiu o limite de 12% para dedução fiscal. Seu aporte atual é de {novo_percentual:.2%}, o que demonstra foco no futuro. A partir de agora, o valor excedente não gera desconto extra no IR, mas continua rendendo para você!")
+    limite_fiscal = f"{parametros.percentual_maximo * 100:g}%".replace(".", ",")
+    if novo_percentual < parametros.percentual_maximo:
+        st.success(f"✅ Você ainda pode economizar mais! Seu aporte atual é de {novo_percentual:.2%} Você pode contribuir com mais {parametros.percentual_maximo - novo_percentual:.2%} para atingir o teto de {limite_fiscal} e garantir o desconto máximo no seu Imposto de Renda.")
+    else:
+        st.warning(f"🚀 Investimento nota dez! Você atingiu o limite de {limite_fiscal} para dedução fiscal. Seu aporte atual é de {novo_percentual:.2%}, o que demonstra foco no futuro. A partir de agora, o valor excedente não gera desconto extra no IR, mas continua rendendo para você!")
 
-st.markdown("""
-</div>
-""", unsafe_allow_html=True)
+    # Economia no Imposto de Renda (tabela progressiva anual do IRPF do ano das regras)
+    economia_irpf = float(resultado["economia_irpf"])
+    economia_marginal_irpf = float(resultado["economia_marginal_irpf"])
+    if economia_marginal_irpf > 0:
+        texto_marginal = (f"Cada R$ 100,00 a mais de esporádica reduz seu imposto em "
+                          f"<strong>{formatar_reais(100 * economia_marginal_irpf)}</strong> "
+                          f"(alíquota de {formatar_numero(economia_marginal_irpf * 100, 1)}%).")
+    else:
+        texto_marginal = "Acima do limite fiscal, aportes extras não reduzem mais o imposto deste ano."
+    st.markdown(f"""
+    <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 8px; margin: 1.5rem 0; border-left: 3px solid #8b043b;">
+        <div style="font-size: 0.9rem; color: #6c757d;">🧾 Economia estimada no Imposto de Renda</div>
+        <div style="font-size: 1.8rem; font-weight: 700; color: #8b043b;">{formatar_reais(economia_irpf)}</div>
+        <div style="font-size: 0.9rem; color: #495057; margin-top: 0.5rem;">
+            Deduzindo {formatar_reais(float(resultado["deducao_irpf"]))}, o IRPF anual estimado passa de
+            {formatar_reais(float(resultado["irpf_sem_deducao"]))} para {formatar_reais(float(resultado["irpf_com_deducao"]))}.
+            {texto_marginal}
+        </div>
+        <div style="font-size: 0.75rem; color: #6c757d; margin-top: 0.5rem;">
+            Estimativa pela tabela progressiva anual de {parametros.ano} sobre o salário anual, sem INSS, dependentes
+            ou outras deduções, considerando a declaração completa.
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
 
-st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown("""
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)
 
-# Continuação do código anterior...
+    # Continuação do código anterior...
 
-st.markdown("""
-<div style="background: #d1ecf1; padding: 1.5rem; border-radius: 8px; margin: 2rem 0; border: 1px solid #bee5eb;">
-    <div style="display: flex; align-items: start; gap: 1rem;">
-        <div style="font-size: 1.5rem;">💰</div>
-        <div style="flex: 1;">
-            <h4 style="margin: 0 0 0.5rem 0; color: #0c5460;">Benefício Fiscal Disponível</h4>
-            <p style="margin: 0; color: #0c5460;">
-                Se você aplicar até 12% da sua renda bruta anual tributável em um plano de Previdência Privada, 
-                esse valor pode ser <strong>deduzido na sua declaração de Imposto de Renda</strong>, fazendo com 
-                que você pague menos impostos no ano em que fizer o investimento.
-            </p>
-            <div style="margin-top: 1rem; padding: 0.75rem; background: white; border-radius: 6px; border-left: 3px solid #0c5460;">
-                <div style="font-size: 0.9rem; color: #0c5460; font-weight: 600;">
-                    ⏰ Prazo para Contribuição: <span style="color: #8b043b;">31/12/2025</span>
+    st.markdown(f"""
+    <div style="background: #d1ecf1; padding: 1.5rem; border-radius: 8px; margin: 2rem 0; border: 1px solid #bee5eb;">
+        <div style="display: flex; align-items: start; gap: 1rem;">
+            <div style="font-size: 1.5rem;">💰</div>
+            <div style="flex: 1;">
+                <h4 style="margin: 0 0 0.5rem 0; color: #0c5460;">Benefício Fiscal Disponível</h4>
+                <p style="margin: 0; color: #0c5460;">
+                    Se você aplicar até {limite_fiscal} da sua renda bruta anual tributável em um plano de Previdência Privada, 
+                    esse valor pode ser <strong>deduzido na sua declaração de Imposto de Renda</strong>, fazendo com 
+                    que você pague menos impostos no ano em que fizer o investimento.
+                </p>
+                <div style="margin-top: 1rem; padding: 0.75rem; background: white; border-radius: 6px; border-left: 3px solid #0c5460;">
+                    <div style="font-size: 0.9rem; color: #0c5460; font-weight: 600;">
+                        ⏰ Prazo para Contribuição: <span style="color: #8b043b;">{parametros.prazo.strftime("%d/%m/%Y")}</span>
+                    </div>
                 </div>
             </div>
         </div>
     </div>
-</div>
-""", unsafe_allow_html=True)
-
-# Resumo em formato de tabela
-st.markdown('<div class="card-frg">', unsafe_allow_html=True)
-st.markdown('<div class="card-title">📊 Resumo Completo da Simulação</div>', unsafe_allow_html=True)
-
-# Criando DataFrame com estilo
-resumo_data = {
-    "Descrição": [
-        "Salário Mensal",
-        "Salário Anual estimado (14× incluindo PLR)",
-        "Contribuição Básica A (%)",
-        "Contribuição Básica B (%)",
-        "Contribuição Voluntária (%)",
-        "Contribuição Voluntária (R$)",
-        "Quantidade de UR (fixo)",
-        "Valor da UR (fixo)",
-        "Valor total das UR",
-        "Contribuição Básica Mensal",
-        "Contribuição Mensal Total",
-        "Contribuições no Ano",
-        "Total Contribuído no Ano",
-        "Percentual Atual",
-        "Valor Esporádica Sugerido",
-        "Valor Esporádica Personalizado",
-        "Total Final Anual",
-        "Percentual Final"
-    ],
-    "Valor": [
-        formatar_reais(salario_mensal),
-        formatar_reais(salario_anual),
-        f"{contribuicao_basica_pct:.1f}%".replace(".", ","),
-        f"{contribuicao_basica_outro_pct:.1f}%".replace(".", ","),
-        f"{contribuicao_voluntaria_pct:.1f}%".replace(".", ","),
-        formatar_reais(contribuicao_voluntaria_valor),
-        f"{QUANTIDADE_UR_FIXA}",
-        formatar_reais(VALOR_UR_FIXO),
-        formatar_reais(total_ur),
-        formatar_reais(contribuicao_mensal_sem_voluntaria),
-        formatar_reais(contribuicao_mensal_total),
-        f"{quantidade_contribuicoes}",
-        formatar_reais(total_contribuicao_anual),
-        f"{percentual_recolhido:.2%}".replace(".", ","),
-        formatar_reais(valor_ideal_esporadica),
-        formatar_reais(valor_esporadica_personalizado),
-        formatar_reais(total_final),
-        f"{novo_percentual:.2%}".replace(".", ",")
-    ]
-}
-
-resumo_df = pd.DataFrame(resumo_data)
-
-# Estilizar a tabela com cores FRG
-st.dataframe(
-    resumo_df,
-    use_container_width=True,
-    hide_index=True,
-    column_config={
-        "Descrição": st.column_config.Column(
-            width="medium",
-            help="Descrição dos itens da simulação"
-        ),
-        "Valor": st.column_config.Column(
-            width="medium",
-            help="Valores calculados na simulação"
-        )
-    }
-)
-
-# Botões de ação
-# Botões de ação
-st.markdown("""
-<div style="margin-top: 2rem;">
-    <div style="display: flex; gap: 1rem; justify-content: center;">
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
-col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
+    # Resumo em formato de tabela
+    st.markdown('<div class="card-frg">', unsafe_allow_html=True)
+    st.markdown('<div class="card-title">📊 Resumo Completo da Simulação</div>', unsafe_allow_html=True)
 
-with col_btn2:
-    # Botão para download da tabela em Excel
-    st.download_button(
-        label="📥 Baixar Relatório em Excel",
-        data=converter_para_excel(resumo_df),
-        file_name=f"FRG_Simulacao_Contribuicao_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    # Estilizar a tabela com cores FRG. Os números são formatados pelo navegador,
+    # no idioma do participante (R$ 1.234,56 em pt-BR), com 2 casas fixas pelo `step`
+    st.dataframe(
+        tabela_resumo(resumo_df),
         use_container_width=True,
-        help="Baixe um relatório completo da simulação em formato Excel"
+        hide_index=True,
+        column_config={
+            "Descrição": st.column_config.Column(
+                width="medium",
+                help="Descrição dos itens da simulação"
+            ),
+            "Valor (R$)": st.column_config.NumberColumn(
+                format="localized",
+                step=0.01,
+                help="Valores em reais calculados na simulação"
+            ),
+            "Percentual": st.column_config.NumberColumn(
+                format="percent",
+                step=0.0001,
+                help="Percentuais do salário"
+            ),
+            "Quantidade": st.column_config.NumberColumn(
+                format="%d",
+                help="Quantidades"
+            ),
+        }
     )
 
-# NOVO BOTÃO PARA PDF
-col_pdf1, col_pdf2, col_pdf3 = st.columns([1, 2, 1])
-
-with col_pdf2:
-    # Gerar PDF quando o botão for clicado
-    pdf_data = gerar_pdf_recibo(
-        resumo_df=resumo_df,
-        salario_mensal=salario_mensal,
-        salario_anual=salario_anual,
-        contribuicao_mensal_total=contribuicao_mensal_total,
-        total_contribuicao_anual=total_contribuicao_anual,
-        valor_esporadica_personalizado=valor_esporadica_personalizado,
-        total_final=total_final
-    )
-    
-    st.download_button(
-        label="📄 Gerar Recibo em PDF",
-        data=pdf_data,
-        file_name=f"FRG_Recibo_Simulacao_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-        mime="application/pdf",
-        use_container_width=True,
-        help="Gere um recibo oficial da simulação em formato PDF"
-    )
+    secao_exportacao(entradas_simulacao, resumo_df, {
+        "resumo_df": resumo_df,
+        "salario_mensal": salario_mensal,
+        "salario_anual": float(resultado["salario_anual"]),
+        "contribuicao_mensal_total": float(resultado["contribuicao_mensal_total"]),
+        "total_contribuicao_anual": float(resultado["total_contribuicao_anual"]),
+        "valor_esporadica_personalizado": valor_esporadica_personalizado,
+        "total_final": total_final,
+    })
 
-st.markdown("""
-    </div>
-</div>
-""", unsafe_allow_html=True)
+    secao_projecao(float(resultado["contribuicao_mensal_total"]), quantidade_contribuicoes,
+                   float(resultado["valor_esporadica"]))
+
+
+secao_esporadica_personalizada(
+    parametros,
+    salario_mensal,
+    contribuicao_basica_outro_pct,
+    contribuicao_voluntaria_pct,
+    quantidade_contribuicoes,
+    valor_maximo_esporadica,
+)
 
 # Rodapé estilo FRG
-st.markdown('<div style="margin-top: 3rem; padding: 2rem 1rem; background: linear-gradient(135deg, #8b043b 0%, #69042a 100%); color: white; border-radius: 10px; text-align: center;"><div style="margin-bottom: 1rem;"><div style="font-size: 1.2rem; font-weight: 600; margin-bottom: 0.5rem;">Fundação de Previdência Real Grandeza</div><div style="font-size: 0.9rem; opacity: 0.9;">Simulador de Contribuição Esporádica - Versão 2025</div></div><div style="display: flex; justify-content: center; gap: 2rem; margin-top: 1.5rem; flex-wrap: wrap;"><div style="text-align: center;"><div style="font-size: 0.8rem; opacity: 0.8;">Informações</div><div style="font-size: 0.9rem; font-weight: 600;">0800 282 6800</div></div><div style="text-align: center;"><div style="font-size: 0.8rem; opacity: 0.8;">Site Oficial</div><div style="font-size: 0.9rem; font-weight: 600;">www.frg.com.br</div></div><div style="text-align: center;"><div style="font-size: 0.8rem; opacity: 0.8;">E-mail</div><div style="font-size: 0.9rem; font-weight: 600;">grp@frg.com.br</div></div></div><div style="margin-top: 1.5rem; padding-top: 1rem; border-top: 1px solid rgba(255, 255, 255, 0.2);"><div style="font-size: 0.8rem; opacity: 0.8;">Este simulador tem caráter informativo. Consulte o regulamento vigente para informações completas.</div></div></div>', unsafe_allow_html=True)
+with etapa("html"):
+    st.markdown(f'<div style="margin-top: 3rem; padding: 2rem 1rem; background: linear-gradient(135deg, #8b043b 0%, #69042a 100%); color: white; border-radius: 10px; text-align: center;"><div style="margin-bottom: 1rem;"><div style="font-size: 1.2rem; font-weight: 600; margin-bottom: 0.5rem;">Fundação de Previdência Real Grandeza</div><div style="font-size: 0.9rem; opacity: 0.9;">Simulador de Contribuição Esporádica - Versão {ano_simulacao}</div></div><div style="display: flex; justify-content: center; gap: 2rem; margin-top: 1.5rem; flex-wrap: wrap;"><div style="text-align: center;"><div style="font-size: 0.8rem; opacity: 0.8;">Informações</div><div style="font-size: 0.9rem; font-weight: 600;">0800 282 6800</div></div><div style="text-align: center;"><div style="font-size: 0.8rem; opacity: 0.8;">Site Oficial</div><div style="font-size: 0.9rem; font-weight: 600;">www.frg.com.br</div></div><div style="text-align: center;"><div style="font-size: 0.8rem; opacity: 0.8;">E-mail</div><div style="font-size: 0.9rem; font-weight: 600;">grp@frg.com.br</div></div></div><div style="margin-top: 1.5rem; padding-top: 1rem; border-top: 1px solid rgba(255, 255, 255, 0.2);"><div style="font-size: 0.8rem; opacity: 0.8;">Este simulador tem caráter informativo. Consulte o regulamento vigente para informações completas.</div></div></div>', unsafe_allow_html=True)
 # Botão flutuante para nova simulação
 st.markdown("""
 <div style="position: fixed; bottom: 20px; right: 20px; z-index: 1000;">
 """, unsafe_allow_html=True)
 
 if st.button("🔄 Nova Simulação", key="nova_simulacao_flutuante"):
+    historico.registrar("nova_simulacao", st.session_state.get("entradas_simulacao"))
     st.rerun()
 
 st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# CSS adicional para melhorias finais - CORRIGIDO (cores verdes)
-st.markdown("""
-<style>
-    /* Ajustes finais */
-    .stDataFrame {
-        border: 1px solid #dee2e6;
-    }
-    
-    .stDataFrame tbody tr:nth-child(even) {
-        background-color: #f8f9fa;
-    }
-    
-    .stDataFrame tbody tr:hover {
-        background-color: #f9e9ef;  /* Corrigido: vermelho claro */
-    }
-    
-    /* Botão flutuante */
-    div[data-testid="stButton"] button[kind="secondary"] {
-        background: white !important;
-        color: #8b043b !important;
-        border: 2px solid #8b043b !important;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15) !important;
-    }
-    
-    div[data-testid="stButton"] button[kind="secondary"]:hover {
-        background: #8b043b !important;
-        color: white !important;
-    }
-    
-    /* Ajuste de espaçamento */
-    .block-container {
-        padding-top: 2rem;
-        padding-bottom: 4rem;
-    }
-    
-    /* Melhorias na responsividade */
-    @media (max-width: 768px) {
-        .header-frg {
-            padding: 1.5rem 1rem;
+with etapa("html"):
+    # CSS adicional para melhorias finais - CORRIGIDO (cores verdes)
+    st.markdown("""
+    <style>
+        /* Ajustes finais */
+        .stDataFrame {
+            border: 1px solid #dee2e6;
         }
-        
-        .header-frg h1 {
-            font-size: 1.5rem;
+    
+        .stDataFrame tbody tr:nth-child(even) {
+            background-color: #f8f9fa;
+        }
+    
+        .stDataFrame tbody tr:hover {
+            background-color: #f9e9ef;  /* Corrigido: vermelho claro */
+        }
+    
+        /* Botão flutuante */
+        div[data-testid="stButton"] button[kind="secondary"] {
+            background: white !important;
+            color: #8b043b !important;
+            border: 2px solid #8b043b !important;
+            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15) !important;
+        }
+    
+        div[data-testid="stButton"] button[kind="secondary"]:hover {
+            background: #8b043b !important;
+            color: white !important;
+        }
+    
+        /* Ajuste de espaçamento */
+        .block-container {
+            padding-top: 2rem;
+            padding-bottom: 4rem;
         }
+    
+        /* Melhorias na responsividade */
+        @media (max-width: 768px) {
+            .header-frg {
+                padding: 1.5rem 1rem;
+            }
         
-        .card-frg {
-            padding: 1rem;
+            .header-frg h1 {
+                font-size: 1.5rem;
+            }
+        
+            .card-frg {
+                padding: 1rem;
+            }
         }
-    }
-</style>
-""", unsafe_allow_html=True)
+    </style>
+    """, unsafe_allow_html=True)
 
-# Adicionar JavaScript para melhorar a experiência
-st.markdown("""
-<script>
-    // Rolar suavemente para as seções
-    document.addEventListener('DOMContentLoaded', function() {
-        // Adicionar tooltips informativos
-        const inputs = document.querySelectorAll('.stNumberInput input, .stSlider input');
-        inputs.forEach(input => {
-            input.addEventListener('focus', function() {
-                this.parentElement.style.boxShadow = '0 0 0 3px rgba(139, 4, 59, 0.25)';  /* Corrigido: vermelho */
-            });
-            input.addEventListener('blur', function() {
-                this.parentElement.style.boxShadow = 'none';
+    # Adicionar JavaScript para melhorar a experiência
+    st.markdown("""
+    <script>
+        // Rolar suavemente para as seções
+        document.addEventListener('DOMContentLoaded', function() {
+            // Adicionar tooltips informativos
+            const inputs = document.querySelectorAll('.stNumberInput input, .stSlider input');
+            inputs.forEach(input => {
+                input.addEventListener('focus', function() {
+                    this.parentElement.style.boxShadow = '0 0 0 3px rgba(139, 4, 59, 0.25)';  /* Corrigido: vermelho */
+                });
+                input.addEventListener('blur', function() {
+                    this.parentElement.style.boxShadow = 'none';
+                });
             });
-        });
         
-        // Destacar valores importantes
-        const highlightValues = () => {
-            const importantValues = document.querySelectorAll('[class*="valor-importante"]');
-            importantValues.forEach(value => {
-                value.style.animation = 'pulse 2s infinite';
-            });
-        };
+            // Destacar valores importantes
+            const highlightValues = () => {
+                const importantValues = document.querySelectorAll('[class*="valor-importante"]');
+                importantValues.forEach(value => {
+                    value.style.animation = 'pulse 2s infinite';
+                });
+            };
         
-        // Adicionar animação de pulso
-        const style = document.createElement('style');
-        style.textContent = `
-            @keyframes pulse {
-                0% { transform: scale(1); }
-                50% { transform: scale(1.02); }
-                100% { transform: scale(1); }
-            }
-        `;
-        document.head.appendChild(style);
-    });
-</script>
-""", unsafe_allow_html=True)
\ No newline at end of file
+            // Adicionar animação de pulso
+            const style = document.createElement('style');
+            style.textContent = `
+                @keyframes pulse {
+                    0% { transform: scale(1); }
+                    50% { transform: scale(1.02); }
+                    100% { transform: scale(1); }
+                }
+            `;
+            document.head.appendChild(style);
+        });
+    </script>
+    """, unsafe_allow_html=True)
+
+instrumentacao.finalizar_rerun()
@@ -0,0 +1,640 @@
+"""
+Simulação em lote de uma folha de participantes.
+
+Lê um arquivo CSV, XLSX, Parquet ou Arrow (IPC/Feather) com uma linha por
+participante e grava, para cada um, todas as linhas do "Resumo Completo da
+Simulação" (em CSV, XLSX, Parquet ou Arrow). Se a saída for um arquivo .zip,
+grava um "RECIBO DE SIMULAÇÃO" em PDF por participante.
+A entrada é lida em lotes de tamanho fixo, que são distribuídos entre
+processos, para que o uso de memória não cresça com o tamanho do arquivo.
+Parquet e Arrow são lidos por mapeamento em memória, só com as colunas usadas;
+na simulação, cada processo mapeia o arquivo e lê as suas fatias (fatias_colunares).
+No CSV o resumo sai formatado (R$ 1.234,56); no XLSX sai em células
+numéricas, com o formato do Excel de cada coluna (FORMATO_EXCEL); no Parquet
+e no Arrow sai tipado, uma coluna por linha do resumo, sem formatação (ver
+processar_lote_colunar): valores em reais como decimal exato de 2 casas,
+percentuais e razões em float e contagens em inteiros.
+Os valores são calculados em centavos inteiros (calcular_simulacao_centavos),
+com as contribuições mensais arredondadas ao centavo como na folha, para que
+resumos e recibos possam ser conciliados centavo a centavo.
+Com --recomendacao, cada linha ganha também a combinação de Parcela B,
+voluntária e esporádica que atinge o limite fiscal com o menor custo
+(motor.otimizar_limite_centavos), nas colunas de CAMPOS_RECOMENDACAO.
+
+Colunas esperadas na entrada (acentos e maiúsculas são ignorados):
+    matricula, salario_mensal, parcela_b_pct, voluntaria_pct,
+    contribuicoes_no_ano e, opcionalmente, esporadica, departamento e ano
+    (regras do plano de cada linha; sem a coluna, vale --ano)
+
+Uso:
+    python simulador_lote.py folha.csv resumo.csv
+    python simulador_lote.py folha.xlsx resumo.parquet --tamanho-lote 20000 --processos 4
+    python simulador_lote.py folha.parquet resumo.arrow
+    python simulador_lote.py folha.csv recibos.zip
+    python simulador_lote.py folha.csv resumo.csv --ano 2025   # regras de um ano específico
+    python simulador_lote.py folha.csv resumo.xlsx --planilhas-por departamento
+    python simulador_lote.py folha.parquet resumo.parquet --recomendacao
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import signal
+import sys
+import time
+import unicodedata
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from formatacao import CAMPOS_RECOMENDACAO, CAMPOS_RESUMO, FORMATO_EXCEL, formatar_campo_vetor
+from motor import calcular_simulacao_centavos, em_reais, otimizar_limite_centavos, para_centavos
+from parametros import parametros_do_ano
+from planilha_excel import EscritorExcel
+from recibo import gerar_pdf_recibo
+
+TAMANHO_LOTE_PADRAO = 50_000
+TAMANHO_LOTE_RECIBOS = 500  # Lotes menores: cada recibo é bem mais caro que uma linha de resumo
+EXTENSOES_ARROW = (".arrow", ".feather", ".ipc")  # Arquivo Arrow IPC (formato de arquivo, não stream)
+EXTENSOES_COLUNARES = (".parquet", *EXTENSOES_ARROW)
+# Formato numérico do Excel de cada coluna do resumo numérico (processar_lote com numerico=True)
+FORMATOS_EXCEL_RESUMO = {descricao: FORMATO_EXCEL[tipo] for descricao, _, tipo in CAMPOS_RESUMO + CAMPOS_RECOMENDACAO}
+
+# Nome normalizado do cabeçalho -> coluna interna
+ALIASES_COLUNAS = {
+    "matricula": "matricula",
+    "salario_mensal": "salario_mensal",
+    "salario": "salario_mensal",
+    "parcela_b_pct": "parcela_b_pct",
+    "parcela_b": "parcela_b_pct",
+    "contribuicao_basica_b": "parcela_b_pct",
+    "voluntaria_pct": "voluntaria_pct",
+    "voluntaria": "voluntaria_pct",
+    "contribuicao_voluntaria": "voluntaria_pct",
+    "contribuicoes_no_ano": "contribuicoes_no_ano",
+    "quantidade_contribuicoes": "contribuicoes_no_ano",
+    "contribuicoes": "contribuicoes_no_ano",
+    "esporadica": "esporadica",
+    "valor_esporadica": "esporadica",
+    "contribuicao_esporadica": "esporadica",
+    "departamento": "departamento",
+    "lotacao": "departamento",
+    "ano": "ano",
+    "ano_plano": "ano",
+}
+COLUNAS_OBRIGATORIAS = ["matricula", "salario_mensal", "parcela_b_pct", "voluntaria_pct", "contribuicoes_no_ano"]
+
+
+def _normalizar_cabecalho(nome):
+    """'Salário Mensal' -> 'salario_mensal'; 'Parcela B %' -> 'parcela_b'"""
+    sem_acentos = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode("ascii")
+    partes = "".join(c if c.isalnum() else " " for c in sem_acentos.lower()).split()
+    return "_".join(partes)
+
+
+def _colunas_usadas(nomes):
+    """Colunas da entrada que o simulador usa (nas entradas colunares, as demais nem são lidas)"""
+    return [nome for nome in nomes if _normalizar_cabecalho(nome) in ALIASES_COLUNAS]
+
+
+def _padronizar_colunas(df):
+    """Renomeia as colunas da entrada para os nomes internos e valida as obrigatórias"""
+    if not isinstance(df, pd.DataFrame):
+        # Lote Arrow (entrada .parquet/.arrow): colunas numéricas sem nulos viram
+        # arrays do pandas sem cópia adicional
+        df = df.to_pandas(split_blocks=True)
+    renomear = {}
+    for coluna in df.columns:
+        normalizado = _normalizar_cabecalho(coluna)
+        if normalizado in ALIASES_COLUNAS:
+            renomear[coluna] = ALIASES_COLUNAS[normalizado]
+    df = df.rename(columns=renomear)
+
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes na entrada: {', '.join(faltando)}")
+    df["matricula"] = _matriculas(df["matricula"])
+    if "esporadica" not in df.columns:
+        df["esporadica"] = 0.0
+    return df
+
+
+def _matriculas(coluna):
+    """Matrículas como texto, sem perder zeros à esquerda; levanta ValueError se alguma estiver vazia"""
+    vazias = coluna.isna() | (coluna.astype(str).str.strip() == "")
+    if vazias.any():
+        raise ValueError(f"Matrícula vazia em {int(vazias.sum())} linha(s) da entrada")
+    if coluna.dtype.kind == "f" and (coluna == np.trunc(coluna)).all():
+        coluna = coluna.astype(np.int64)  # Matrícula numérica guardada como float (123.0 -> "123")
+    return coluna.astype(str)
+
+
+def _anos_do_lote(df, ano=None):
+    """Ano das regras de cada linha: a coluna "ano" da entrada ou, na falta dela, `ano`"""
+    padrao = parametros_do_ano(ano).ano
+    if "ano" not in df.columns:
+        return np.full(len(df), padrao)
+    return pd.to_numeric(df["ano"]).fillna(padrao).astype(np.int64).to_numpy()
+
+
+def _simular_lote(df, ano=None, calcular=None):
+    """
+    Roda o motor de cálculo sobre um lote já com as colunas padronizadas.
+
+    Os valores monetários do resultado ficam em centavos (ver motor.em_reais).
+    Com a coluna "ano" na entrada, cada ano presente no lote é calculado com
+    os seus próprios parâmetros e os resultados voltam na ordem original.
+    `calcular(df, ano)` troca a simulação (padrão: _calcular_lote), como em
+    _otimizar_lote.
+    """
+    calcular = calcular or _calcular_lote
+    if "ano" not in df.columns:
+        return calcular(df, ano)
+
+    anos = _anos_do_lote(df, ano)
+    resultado = None
+    for valor in np.unique(anos):
+        linhas = np.flatnonzero(anos == valor)
+        parcial = calcular(df.iloc[linhas], int(valor))
+        if resultado is None:
+            resultado = {coluna: np.empty(len(df), dtype=v.dtype) for coluna, v in parcial.items()}
+        for coluna, valores in parcial.items():
+            resultado[coluna][linhas] = valores
+    return resultado
+
+
+def _numerico(df, coluna):
+    """Coluna numérica da entrada, com células vazias como zero (como no resumo: "R$ 0,00")"""
+    return pd.to_numeric(df[coluna]).fillna(0).to_numpy()
+
+
+def _calcular_lote(df, ano):
+    esporadica = _numerico(df, "esporadica")
+    resultado = calcular_simulacao_centavos(
+        para_centavos(_numerico(df, "salario_mensal")),
+        _numerico(df, "parcela_b_pct"),
+        _numerico(df, "voluntaria_pct"),
+        _numerico(df, "contribuicoes_no_ano"),
+        valor_esporadica_centavos=para_centavos(esporadica),
+        incluir_esporadica=esporadica > 0,
+        parametros=parametros_do_ano(ano),
+    )
+    return resultado
+
+
+def _otimizar_lote(df, ano):
+    """Combinação de menor custo para o limite fiscal de cada linha, com o salário e as contribuições dela"""
+    return otimizar_limite_centavos(
+        para_centavos(_numerico(df, "salario_mensal")),
+        _numerico(df, "contribuicoes_no_ano"),
+        parametros=parametros_do_ano(ano),
+    )
+
+
+def _valores_numericos(valores, tipo):
+    """Coluna do resumo em reais -> valores para as células do Excel, que aplica FORMATO_EXCEL"""
+    return valores / 100 if tipo == "percentual" else valores  # "0.0%" espera a fração (10 pontos = 0.1)
+
+
+def processar_lote(df, ano=None, recomendacao=False, numerico=False):
+    """
+    Simula um lote de participantes e devolve o resumo formatado, uma linha por participante.
+
+    Com `recomendacao`, acrescenta as colunas de CAMPOS_RECOMENDACAO. Com
+    `numerico` (saída .xlsx), os valores não são formatados: reais em float,
+    percentuais e razões como fração e contagens em inteiros, para gravar
+    com FORMATOS_EXCEL_RESUMO.
+    """
+    formatar = _valores_numericos if numerico else formatar_campo_vetor
+    df = _padronizar_colunas(df)
+    resultado = em_reais(_simular_lote(df, ano))  # Centavos exatos; a formatação recebe reais
+
+    resumo = {"Matrícula": df["matricula"].astype(str).to_numpy()}
+    if "departamento" in df.columns:
+        resumo["Departamento"] = df["departamento"].fillna("").astype(str).to_numpy()
+    if "ano" in df.columns:
+        resumo["Ano"] = _anos_do_lote(df, ano)
+    for descricao, coluna, tipo in CAMPOS_RESUMO:
+        resumo[descricao] = formatar(resultado[coluna], tipo)
+    if recomendacao:
+        recomendado = em_reais(_simular_lote(df, ano, calcular=_otimizar_lote))
+        for descricao, coluna, tipo in CAMPOS_RECOMENDACAO:
+            resumo[descricao] = formatar(recomendado[coluna], tipo)
+    return pd.DataFrame(resumo)
+
+
+def _tipo_arrow(tipo):
+    """Tipo Arrow de cada tipo de CAMPOS_RESUMO nas saídas colunares"""
+    import pyarrow as pa
+
+    return {
+        "reais": pa.decimal128(18, 2),  # Os centavos do motor, exatos
+        "percentual": pa.float64(),  # Em pontos, como na tela (10.0 = 10%)
+        "razao": pa.float64(),  # Fração (0.12 = 12%)
+        "inteiro": pa.int64(),
+    }[tipo]
+
+
+def _decimal_de_centavos(centavos):
+    """Centavos int64 -> array decimal128(18, 2) do Arrow, sem conversão de valores"""
+    import pyarrow as pa
+
+    # Um decimal128 é o inteiro sem escala (os próprios centavos) em 128 bits, little-endian
+    palavras = np.empty((len(centavos), 2), dtype=np.int64)
+    palavras[:, 0] = centavos
+    palavras[:, 1] = centavos >> 63  # Extensão do sinal para os 64 bits altos
+    return pa.Array.from_buffers(pa.decimal128(18, 2), len(centavos), [None, pa.py_buffer(palavras)])
+
+
+def processar_lote_colunar(df, ano=None, recomendacao=False):
+    """
+    Simula um lote de participantes e devolve o resumo tipado, sem formatação.
+
+    Retorna um pa.RecordBatch com matrícula (e departamento e ano, se vierem na
+    entrada) e uma coluna por linha de CAMPOS_RESUMO, com o nome da coluna do
+    motor e a descrição do resumo nos metadados do campo ("descricao"). Com
+    `recomendacao`, seguem as colunas de CAMPOS_RECOMENDACAO, com o prefixo
+    "recomendacao_" no nome.
+    """
+    import pyarrow as pa
+
+    df = _padronizar_colunas(df)
+    resultado = _simular_lote(df, ano)
+
+    campos = [pa.field("matricula", pa.string())]
+    colunas = [pa.array(df["matricula"].astype(str).to_numpy(), type=pa.string())]
+    if "departamento" in df.columns:
+        campos.append(pa.field("departamento", pa.string()))
+        colunas.append(pa.array(df["departamento"].fillna("").astype(str).to_numpy(), type=pa.string()))
+    if "ano" in df.columns:
+        campos.append(pa.field("ano", pa.int64()))
+        colunas.append(pa.array(_anos_do_lote(df, ano)))
+    blocos = [("", CAMPOS_RESUMO, resultado)]
+    if recomendacao:
+        blocos.append(("recomendacao_", CAMPOS_RECOMENDACAO, _simular_lote(df, ano, calcular=_otimizar_lote)))
+    for prefixo, campos_resumo, valores in blocos:
+        for descricao, coluna, tipo in campos_resumo:
+            campos.append(pa.field(prefixo + coluna, _tipo_arrow(tipo), metadata={"descricao": descricao}))
+            if tipo == "reais":
+                colunas.append(_decimal_de_centavos(valores[coluna]))
+            else:
+                colunas.append(pa.array(valores[coluna], type=_tipo_arrow(tipo)))
+    return pa.RecordBatch.from_arrays(colunas, schema=pa.schema(campos))
+
+
+def nome_recibo(matricula, linha):
+    """Nome do recibo dentro do arquivo ZIP; a linha da entrada (a partir de 1) o diferencia se a matrícula se repetir"""
+    return f"recibo_{matricula}_{linha}.pdf"
+
+
+def renderizar_recibos(df, ano=None):
+    """
+    Simula um lote e devolve [(nome_do_arquivo, bytes_do_pdf), ...] na ordem da entrada.
+
+    O índice de `df` é a posição de cada participante na entrada (a partir de 0), usada em nome_recibo.
+    """
+    resultado = em_reais(_simular_lote(df, ano))
+    colunas = ["salario_mensal", "salario_anual", "contribuicao_mensal_total",
+               "total_contribuicao_anual", "valor_esporadica", "total_final"]
+    valores = zip(df.index + 1, df["matricula"].astype(str), *(resultado[c].tolist() for c in colunas))
+
+    recibos = []
+    for linha, matricula, salario, anual, mensal, total_anual, esporadica, total_final in valores:
+        pdf = gerar_pdf_recibo(None, salario, anual, mensal, total_anual, esporadica, total_final)
+        recibos.append((nome_recibo(matricula, linha), pdf.getvalue()))
+    return recibos
+
+
+def ler_em_lotes(caminho, tamanho_lote, separador=",", decimal="."):
+    """Gera DataFrames de até `tamanho_lote` linhas, sem carregar o arquivo inteiro"""
+    extensao = Path(caminho).suffix.lower()
+
+    if extensao == ".csv":
+        # A matrícula é lida como texto: o tipo não é adivinhado lote a lote ("00123" não vira 123)
+        cabecalho = pd.read_csv(caminho, sep=separador, nrows=0).columns
+        texto = {nome: str for nome in cabecalho if ALIASES_COLUNAS.get(_normalizar_cabecalho(nome)) == "matricula"}
+        yield from pd.read_csv(caminho, sep=separador, decimal=decimal, dtype=texto, chunksize=tamanho_lote)
+
+    elif extensao == ".parquet":
+        import pyarrow.parquet as pq
+
+        # Lotes Arrow: a conversão para o pandas fica para o processo que simula o lote
+        arquivo = pq.ParquetFile(caminho, memory_map=True)
+        yield from arquivo.iter_batches(batch_size=tamanho_lote, columns=_colunas_usadas(arquivo.schema_arrow.names))
+
+    elif extensao in EXTENSOES_ARROW:
+        import pyarrow as pa
+
+        with pa.memory_map(str(caminho)) as origem:
+            leitor = pa.ipc.open_file(origem)
+            colunas = _colunas_usadas(leitor.schema.names)
+            for i in range(leitor.num_record_batches):
+                lote = leitor.get_batch(i).select(colunas)
+                for inicio in range(0, lote.num_rows, tamanho_lote):
+                    yield lote.slice(inicio, tamanho_lote)
+
+    elif extensao in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+
+        planilha = load_workbook(caminho, read_only=True, data_only=True)
+        try:
+            linhas = planilha.active.iter_rows(values_only=True)
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                return
+            buffer = []
+            for linha in linhas:
+                buffer.append(linha)
+                if len(buffer) >= tamanho_lote:
+                    yield pd.DataFrame(buffer, columns=cabecalho)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=cabecalho)
+        finally:
+            planilha.close()
+
+    else:
+        raise ValueError(f"Formato de entrada não suportado: {extensao}")
+
+
+def fatias_colunares(caminho, tamanho_lote):
+    """
+    Divide uma entrada Parquet ou Arrow em fatias de até `tamanho_lote` linhas.
+
+    Só os metadados são lidos: cada fatia é (caminho, grupo, inicio, linhas),
+    com o row group (Parquet) ou o record batch (Arrow) de onde ela sai, e é
+    lida depois por _ler_fatia no processo que a simula.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if Path(caminho).suffix.lower() == ".parquet":
+        metadados = pq.ParquetFile(caminho).metadata
+        tamanhos = [metadados.row_group(i).num_rows for i in range(metadados.num_row_groups)]
+    else:
+        with pa.memory_map(str(caminho)) as origem:
+            leitor = pa.ipc.open_file(origem)
+            tamanhos = [leitor.get_batch(i).num_rows for i in range(leitor.num_record_batches)]
+    for grupo, total in enumerate(tamanhos):
+        for inicio in range(0, total, tamanho_lote):
+            yield str(caminho), grupo, inicio, min(tamanho_lote, total - inicio)
+
+
+@contextlib.contextmanager
+def _ler_fatia(caminho, grupo, inicio, linhas):
+    """Lê uma fatia de fatias_colunares, com um mapeamento em memória do próprio processo"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if Path(caminho).suffix.lower() == ".parquet":
+        with pq.ParquetFile(caminho, memory_map=True) as arquivo:
+            # Sem acesso direto a uma linha do row group: ele é decodificado em
+            # sequência até o fim da fatia, um lote de cada vez
+            partes, posicao = [], 0
+            for lote in arquivo.iter_batches(batch_size=linhas, row_groups=[grupo],
+                                             columns=_colunas_usadas(arquivo.schema_arrow.names)):
+                if posicao + lote.num_rows > inicio:
+                    partes.append(lote.slice(max(inicio - posicao, 0)))
+                posicao += lote.num_rows
+                if posicao >= inicio + linhas:
+                    break
+            yield pa.Table.from_batches(partes).slice(0, linhas)
+    else:
+        with pa.memory_map(caminho) as origem:
+            leitor = pa.ipc.open_file(origem)
+            yield leitor.get_batch(grupo).select(_colunas_usadas(leitor.schema.names)).slice(inicio, linhas)
+
+
+def _processar_fatia(processar, fatia, ano=None, recomendacao=False):
+    """Executa `processar` (processar_lote ou processar_lote_colunar) em uma fatia da entrada colunar"""
+    with _ler_fatia(*fatia) as lote:
+        return processar(lote, ano, recomendacao)
+
+
+class EscritorResumo:
+    """
+    Grava os lotes de resumo no arquivo de saída à medida que ficam prontos.
+
+    No .xlsx, com `planilhas_por` (uma coluna do resumo, como "Departamento"
+    ou "Ano"), cada valor da coluna ganha a sua própria aba. As saídas
+    colunares (.parquet e .arrow) recebem o resumo tipado de
+    processar_lote_colunar; o .xlsx, o DataFrame numérico de processar_lote
+    (gravado com FORMATOS_EXCEL_RESUMO); o .csv, o formatado.
+    """
+
+    def __init__(self, caminho, separador=",", planilhas_por=None):
+        self.caminho = caminho
+        self.separador = separador
+        self.extensao = Path(caminho).suffix.lower()
+        if self.extensao not in (".csv", ".parquet", ".xlsx", *EXTENSOES_ARROW):
+            raise ValueError(f"Formato de saída não suportado: {self.extensao}")
+        self.colunar = self.extensao in EXTENSOES_COLUNARES
+        if planilhas_por and self.extensao != ".xlsx":
+            raise ValueError("Separar em planilhas só é possível na saída .xlsx")
+        self.planilhas_por = planilhas_por
+        self._colunar = None
+        self._excel = None
+        self._primeiro = True
+
+    def escrever(self, df):
+        if self.extensao == ".csv":
+            df.to_csv(self.caminho, sep=self.separador, index=False,
+                      mode="w" if self._primeiro else "a", header=self._primeiro)
+        elif self.extensao == ".xlsx":
+            self._escrever_excel(df)
+        else:
+            if self._colunar is None:
+                self._colunar = self._abrir_colunar(df.schema)
+            self._colunar.write_batch(df)
+        self._primeiro = False
+
+    def _abrir_colunar(self, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.extensao == ".parquet":
+            return pq.ParquetWriter(self.caminho, schema)
+        return pa.ipc.new_file(self.caminho, schema)
+
+    def _escrever_excel(self, df):
+        if self._excel is None:
+            self._excel = EscritorExcel(self.caminho)
+        if self.planilhas_por is None:
+            self._excel.escrever(df, formatos=FORMATOS_EXCEL_RESUMO)
+            return
+        if self.planilhas_por not in df.columns:
+            raise ValueError(f"Coluna para separar as planilhas ausente na entrada: {self.planilhas_por.lower()}")
+        for grupo, linhas in df.groupby(self.planilhas_por, sort=False):
+            self._excel.escrever(linhas, aba=grupo, formatos=FORMATOS_EXCEL_RESUMO)
+
+    def fechar(self):
+        if self._colunar is not None:
+            self._colunar.close()
+        if self._excel is not None:
+            self._excel.fechar()
+
+
+def simular_arquivo(entrada, saida, tamanho_lote=TAMANHO_LOTE_PADRAO, processos=None,
+                    separador=",", decimal=".", ano=None, planilhas_por=None, recomendacao=False):
+    """
+    Simula todos os participantes de `entrada` e grava o resumo em `saida`.
+
+    No máximo 2 lotes por processo ficam em memória ao mesmo tempo; a ordem
+    das linhas da entrada é preservada na saída. Com `recomendacao`, o resumo
+    inclui a combinação de menor custo para o limite fiscal de cada
+    participante. Retorna o total de linhas.
+    """
+    processos = processos or os.cpu_count() or 1
+    escritor = EscritorResumo(saida, separador=separador, planilhas_por=planilhas_por)
+    if escritor.colunar:
+        processar = processar_lote_colunar
+    else:
+        processar = partial(processar_lote, numerico=escritor.extensao == ".xlsx")
+    if Path(entrada).suffix.lower() in EXTENSOES_COLUNARES:
+        # Só a posição de cada lote vai para os processos, que leem os dados do arquivo
+        # (um lote mapeado em memória seria copiado inteiro para ser enviado)
+        lotes = fatias_colunares(entrada, tamanho_lote)
+        processar = partial(_processar_fatia, processar)
+    else:
+        lotes = ler_em_lotes(entrada, tamanho_lote, separador=separador, decimal=decimal)
+    total = 0
+    try:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            pendentes = deque()
+            for lote in lotes:
+                pendentes.append(executor.submit(processar, lote, ano, recomendacao))
+                if len(pendentes) >= 2 * processos:
+                    resumo = pendentes.popleft().result()
+                    escritor.escrever(resumo)
+                    total += len(resumo)
+            while pendentes:
+                resumo = pendentes.popleft().result()
+                escritor.escrever(resumo)
+                total += len(resumo)
+    finally:
+        escritor.fechar()
+    return total
+
+
+def gerar_recibos_arquivo(entrada, destino_zip, tamanho_lote=TAMANHO_LOTE_RECIBOS, processos=None,
+                          separador=",", decimal=".", ao_progredir=None, ano=None):
+    """
+    Gera um recibo em PDF por participante de `entrada`, gravados em `destino_zip`.
+
+    Os recibos são escritos assim que cada lote fica pronto; só os lotes em
+    andamento ficam em memória. Se o ZIP já existir, as linhas da entrada que
+    já têm recibo nele são puladas, o que permite retomar uma execução
+    interrompida. `ao_progredir(gerados, pulados)` é chamado a cada lote.
+    Retorna a quantidade de recibos gerados nesta execução.
+    """
+    processos = processos or os.cpu_count() or 1
+    gerados = pulados = 0
+    linha = 0  # Linhas da entrada já lidas
+
+    def gravar(futuro):
+        nonlocal gerados
+        for nome, conteudo in futuro.result():
+            arquivo_zip.writestr(nome, conteudo)
+            gerados += 1
+        if ao_progredir is not None:
+            ao_progredir(gerados, pulados)
+
+    # Os recibos vão para uma cópia do ZIP, que só substitui o destino depois de
+    # fechada. Se a execução for interrompida (Ctrl+C ou erro), o diretório central
+    # é gravado e a cópia vira o destino, pronta para retomar; se o processo for
+    # morto sem chance de fechá-la, o destino continua o da execução anterior.
+    provisorio = f"{destino_zip}.tmp"
+    existe = os.path.exists(destino_zip)
+    if existe:
+        shutil.copyfile(destino_zip, provisorio)
+    with zipfile.ZipFile(provisorio, mode="a" if existe else "w", compression=zipfile.ZIP_STORED) as arquivo_zip:
+        try:
+            existentes = set(arquivo_zip.namelist())
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                pendentes = deque()
+                for lote in ler_em_lotes(entrada, tamanho_lote, separador=separador, decimal=decimal):
+                    lote = _padronizar_colunas(lote)
+                    lote.index = pd.RangeIndex(linha, linha + len(lote))
+                    linha += len(lote)
+                    if existentes:
+                        ja_gerados = np.array([nome_recibo(m, i + 1) in existentes
+                                               for m, i in zip(lote["matricula"], lote.index)], dtype=bool)
+                        pulados += int(ja_gerados.sum())
+                        lote = lote[~ja_gerados]
+                        if lote.empty:
+                            continue
+                    pendentes.append(executor.submit(renderizar_recibos, lote, ano))
+                    if len(pendentes) >= 2 * processos:
+                        gravar(pendentes.popleft())
+                while pendentes:
+                    gravar(pendentes.popleft())
+        finally:
+            arquivo_zip.close()  # Se o fechamento falhar, o destino anterior é preservado
+            os.replace(provisorio, destino_zip)
+    return gerados
+
+
+def _mostrar_progresso(gerados, pulados):
+    """Mostra o andamento da geração de recibos na mesma linha do terminal"""
+    print(f"\rRecibos gerados: {gerados} (já existentes: {pulados})", end="", file=sys.stderr, flush=True)
+
+
+def _encerrar_com_sigterm(signum, frame):
+    # Converte SIGTERM em SystemExit para que os arquivos de saída sejam fechados corretamente
+    sys.exit(128 + signum)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simula a contribuição esporádica de uma folha inteira de participantes."
+    )
+    parser.add_argument("entrada", help="Arquivo de entrada (.csv, .xlsx, .parquet ou .arrow)")
+    parser.add_argument("saida",
+                        help="Arquivo de saída (.csv, .xlsx, .parquet ou .arrow, ou .zip para recibos em PDF)")
+    parser.add_argument("--tamanho-lote", type=int, default=None,
+                        help=f"Linhas por lote (padrão: {TAMANHO_LOTE_PADRAO}; "
+                             f"{TAMANHO_LOTE_RECIBOS} para recibos)")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="Quantidade de processos (padrão: número de CPUs)")
+    parser.add_argument("--separador", default=",", help="Separador de colunas do CSV (padrão: ',')")
+    parser.add_argument("--decimal", default=".", help="Separador decimal do CSV de entrada (padrão: '.')")
+    parser.add_argument("--ano", type=int, default=None,
+                        help="Ano das regras do plano (padrão: o mais recente de parametros_plano.json)")
+    parser.add_argument("--planilhas-por", choices=["departamento", "ano"], default=None,
+                        help="Na saída .xlsx, uma aba por departamento ou por ano")
+    parser.add_argument("--recomendacao", action="store_true",
+                        help="Acrescenta ao resumo a Parcela B, a voluntária e a esporádica que atingem o "
+                             "limite fiscal com o menor custo para cada participante")
+    args = parser.parse_args(argv)
+
+    signal.signal(signal.SIGTERM, _encerrar_com_sigterm)
+    inicio = time.perf_counter()
+    try:
+        parametros_do_ano(args.ano)  # Valida o ano (e o arquivo de parâmetros) antes de começar
+        if Path(args.saida).suffix.lower() == ".zip":
+            total = gerar_recibos_arquivo(args.entrada, args.saida,
+                                          tamanho_lote=args.tamanho_lote or TAMANHO_LOTE_RECIBOS,
+                                          processos=args.processos, separador=args.separador,
+                                          decimal=args.decimal, ao_progredir=_mostrar_progresso,
+                                          ano=args.ano)
+            print(file=sys.stderr)
+            print(f"{total} recibos gerados em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+        else:
+            total = simular_arquivo(args.entrada, args.saida,
+                                    tamanho_lote=args.tamanho_lote or TAMANHO_LOTE_PADRAO,
+                                    processos=args.processos, separador=args.separador,
+                                    decimal=args.decimal, ano=args.ano,
+                                    planilhas_por=args.planilhas_por and args.planilhas_por.capitalize(),
+                                    recomendacao=args.recomendacao)
+            print(f"{total} participantes simulados em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+    except ValueError as erro:
+        parser.exit(1, f"Erro: {erro}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Validação do corpo JSON da API (api_simulador.ler_participantes)."""
+import asyncio
+import json
+import threading
+
+import pytest
+
+import api_simulador
+from api_simulador import ErroRequisicao, ServidorSimulacao, ler_participantes
+
+PARTICIPANTE = {"salario_mensal": 10000, "parcela_b_pct": 10, "voluntaria_pct": 0, "contribuicoes_no_ano": 13}
+
+
+def _ler(**campos):
+    return ler_participantes(json.dumps({**PARTICIPANTE, **campos}))
+
+
+def test_aceita_inteiros_escritos_como_float():
+    entradas, _, _ = _ler(ano=2025.0, contribuicoes_no_ano=12.0)
+    assert list(entradas) == [2025]
+    assert entradas[2025][4].tolist() == [12]
+
+
+@pytest.mark.parametrize("campos", [
+    {"ano": "dois mil"}, {"ano": [2025]}, {"ano": {}}, {"ano": 2025.5}, {"ano": True},
+    {"ano": 1900}, {"contribuicoes_no_ano": 12.5}, {"contribuicoes_no_ano": "13"},
+])
+def test_rejeita_ano_e_contribuicoes_invalidos_com_400(campos):
+    with pytest.raises(ErroRequisicao) as erro:
+        _ler(**campos)
+    assert erro.value.status == 400
+
+
+@pytest.mark.parametrize("campos", [
+    {"salario_mensal": -0.01}, {"parcela_b_pct": 4.0}, {"parcela_b_pct": 10.5}, {"parcela_b_pct": 7.25},
+    {"voluntaria_pct": -1}, {"voluntaria_pct": 11}, {"voluntaria_pct": 2.5},
+    {"contribuicoes_no_ano": -1}, {"contribuicoes_no_ano": 14},
+    {"esporadica": -100}, {"esporadica": 0.01},
+    {"salario_mensal": 10 ** 400}, {"contribuicoes_no_ano": 10 ** 400}, {"ano": 10 ** 400},
+])
+def test_rejeita_valores_fora_das_faixas_da_pagina_com_400(campos):
+    with pytest.raises(ErroRequisicao) as erro:
+        _ler(**campos)
+    assert erro.value.status == 400
+
+
+def test_aceita_os_extremos_das_faixas():
+    entradas, _, _ = ler_participantes(json.dumps([
+        {**PARTICIPANTE, "salario_mensal": 0, "parcela_b_pct": 4.5, "voluntaria_pct": 0, "contribuicoes_no_ano": 0},
+        {**PARTICIPANTE, "parcela_b_pct": 10, "voluntaria_pct": 10, "contribuicoes_no_ano": 13, "esporadica": 5000},
+    ]))
+    (_, salario, parcela_b, voluntaria, quantidade, esporadica), = entradas.values()
+    assert parcela_b.tolist() == [4.5, 10] and quantidade.tolist() == [0, 13] and esporadica.tolist() == [0, 5000]
+
+
+def test_inteiro_com_digitos_demais_responde_400():
+    with pytest.raises(ErroRequisicao) as erro:
+        ler_participantes(f'{{"salario_mensal": {"9" * 5000}}}')
+    assert erro.value.status == 400
+
+
+def test_motor_roda_fora_do_laco_de_eventos(monkeypatch):
+    calcular = api_simulador.calcular_simulacao
+    threads = []
+
+    def calcular_registrando(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return calcular(*args, **kwargs)
+
+    monkeypatch.setattr(api_simulador, "calcular_simulacao", calcular_registrando)
+
+    async def simular():
+        servidor = ServidorSimulacao()
+        tarefa = asyncio.create_task(servidor.agrupador.executar())
+        try:
+            return await servidor.simular(json.dumps([PARTICIPANTE, {**PARTICIPANTE, "salario_mensal": 20000}]))
+        finally:
+            tarefa.cancel()
+
+    respostas = asyncio.run(simular())
+    assert [resposta["salario_anual"] for resposta in respostas] == [140000.0, 280000.0]
+    assert threads and threading.get_ident() not in threads
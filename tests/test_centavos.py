@@ -0,0 +1,185 @@
+"""
+Caminho em centavos (motor.calcular_simulacao_centavos) contra uma referência
+em Decimal, contra casos calculados à mão e contra as fórmulas em float, e
+entradas vazias no lote.
+"""
+import io
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from motor import CAMPOS_CENTAVOS, MESES_SALARIO_ANUAL, calcular_simulacao, calcular_simulacao_centavos, para_centavos
+from parametros import parametros_do_ano
+from simulador_lote import processar_lote
+
+QUANTIDADE_MAXIMA = 13
+
+# Diferença máxima (centavos) em relação ao float: arredondamentos envolvidos em cada valor
+_ARREDONDAMENTOS_MENSAIS = {"valor_basica": 1, "valor_outro": 1, "contribuicao_voluntaria_valor": 1,
+                            "contribuicao_mensal_sem_voluntaria": 2, "contribuicao_mensal_total": 3}
+_ANUAIS = {"total_contribuicao_anual", "valor_ideal_esporadica", "total_final", "deducao_irpf"}
+_IMPOSTO = {"irpf_sem_deducao", "irpf_com_deducao", "economia_irpf"}
+
+
+def tolerancia(campo):
+    if campo in _ARREDONDAMENTOS_MENSAIS:
+        return _ARREDONDAMENTOS_MENSAIS[campo]
+    if campo in _ANUAIS:
+        return 3 * QUANTIDADE_MAXIMA + 1
+    if campo in _IMPOSTO:
+        return 2 * (3 * QUANTIDADE_MAXIMA + 1)
+    return 1
+
+
+def gerar_bloco(gerador, n):
+    return {
+        "salario_mensal": gerador.integers(100_000, 10_000_000, n),  # Centavos
+        "contribuicao_basica_outro_pct": gerador.choice(np.arange(4.5, 10.5, 0.5), n),
+        "contribuicao_voluntaria_pct": gerador.integers(0, 11, n).astype(np.float64),
+        "quantidade_contribuicoes": gerador.integers(0, QUANTIDADE_MAXIMA + 1, n),
+        "valor_esporadica": gerador.integers(0, 5_000_000, n) * (gerador.random(n) < 0.5),
+    }
+
+
+def _arredondar(valor):
+    return int(valor.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def referencia_decimal(salario, parcela_b, voluntaria, quantidade, esporadica, parametros):
+    """Uma linha, em Decimal (centavos), com as regras de arredondamento documentadas"""
+    total_ur = parametros.quantidade_ur * _arredondar(Decimal(str(parametros.valor_ur)) * 100)
+    salario = Decimal(int(salario))
+    basica = _arredondar(salario * Decimal("0.02"))
+    outro = 0 if salario < total_ur else _arredondar((salario - total_ur) * Decimal(str(parcela_b)) / 100)
+    valor_voluntaria = _arredondar(salario * Decimal(str(voluntaria)) / 100)
+    mensal = basica + outro + valor_voluntaria
+    anual = mensal * int(quantidade)
+    salario_anual = int(salario) * MESES_SALARIO_ANUAL
+    limite = _arredondar(salario_anual * Decimal(str(parametros.percentual_maximo)))
+    total_final = anual + int(esporadica)
+
+    def irpf(base):
+        return max(max(_arredondar(base * Decimal(str(aliquota)) - Decimal(str(deducao)) * 100)
+                       for _, aliquota, deducao in parametros.faixas_irpf), 0)
+
+    deducao = min(total_final, limite)
+    return {
+        "valor_basica": basica, "valor_outro": outro, "contribuicao_voluntaria_valor": valor_voluntaria,
+        "contribuicao_mensal_total": mensal, "total_contribuicao_anual": anual,
+        "valor_ideal_esporadica": limite - anual, "total_final": total_final, "deducao_irpf": deducao,
+        "irpf_sem_deducao": irpf(salario_anual), "irpf_com_deducao": irpf(salario_anual - deducao),
+    }
+
+
+def _em_centavos(bloco, parametros):
+    return calcular_simulacao_centavos(
+        bloco["salario_mensal"], bloco["contribuicao_basica_outro_pct"], bloco["contribuicao_voluntaria_pct"],
+        bloco["quantidade_contribuicoes"], valor_esporadica_centavos=bloco["valor_esporadica"],
+        parametros=parametros,
+    )
+
+
+def test_centavos_iguais_a_referencia_decimal():
+    parametros = parametros_do_ano()
+    bloco = gerar_bloco(np.random.default_rng(42), 500)
+    em_centavos = _em_centavos(bloco, parametros)
+    for i in range(500):
+        esperado = referencia_decimal(*(bloco[c][i] for c in bloco), parametros)
+        assert {campo: int(em_centavos[campo][i]) for campo in esperado} == esperado, f"linha {i}"
+
+
+def test_diferencas_para_o_float_dentro_do_arredondamento_mensal():
+    parametros = parametros_do_ano()
+    bloco = gerar_bloco(np.random.default_rng(7), 100_000)
+    em_float = calcular_simulacao(
+        bloco["salario_mensal"] / 100, bloco["contribuicao_basica_outro_pct"],
+        bloco["contribuicao_voluntaria_pct"], bloco["quantidade_contribuicoes"],
+        valor_esporadica=bloco["valor_esporadica"] / 100, parametros=parametros,
+    )
+    em_centavos = _em_centavos(bloco, parametros)
+    for campo in CAMPOS_CENTAVOS:
+        diferenca = int(np.abs(em_centavos[campo] - para_centavos(em_float[campo])).max())
+        assert diferenca <= tolerancia(campo), campo
+
+
+# Casos calculados à mão com as regras de 2025 (UR de R$ 795,68 × 7 = R$ 5.569,76; limite de 12%;
+# esporádica mínima de 3 UR = R$ 2.387,04): entradas em centavos e percentuais -> valores em centavos
+CASOS_2025 = [
+    # R$ 10.000,00: Parcela B sobre (10.000,00 - 5.569,76) × 10% = 443,024 -> 443,02
+    ((1_000_000, 10.0, 0.0, 13, 0), {
+        "valor_basica": 20_000, "valor_outro": 44_302, "contribuicao_voluntaria_valor": 0,
+        "contribuicao_mensal_total": 64_302, "total_contribuicao_anual": 835_926, "salario_anual": 14_000_000,
+        "valor_ideal_esporadica": 844_074, "valor_maximo_esporadica": 5_000_000, "total_final": 835_926,
+        "irpf_sem_deducao": 2_764_622, "irpf_com_deducao": 2_534_742, "economia_irpf": 229_880,
+    }),
+    # Salário igual ao total das UR: sem Parcela B; 2% de 5.569,76 = 111,3952 -> 111,40
+    ((556_976, 10.0, 2.0, 12, 0), {
+        "valor_basica": 11_140, "valor_outro": 0, "contribuicao_voluntaria_valor": 11_140,
+        "contribuicao_mensal_total": 22_280, "total_contribuicao_anual": 267_360, "salario_anual": 7_797_664,
+        "valor_ideal_esporadica": 668_360, "valor_maximo_esporadica": 2_784_880, "total_final": 267_360,
+        "irpf_sem_deducao": 1_058_980, "irpf_com_deducao": 985_456, "economia_irpf": 73_524,
+    }),
+    # Um centavo abaixo do total das UR
+    ((556_975, 10.0, 0.0, 13, 0), {
+        "valor_basica": 11_140, "valor_outro": 0, "contribuicao_mensal_total": 11_140,
+        "total_contribuicao_anual": 144_820, "valor_ideal_esporadica": 790_898,
+        "irpf_sem_deducao": 1_058_976, "irpf_com_deducao": 1_019_150,
+    }),
+    # R$ 10,00 acima do total das UR: Parcela B de 9,5% = 0,95
+    ((557_976, 9.5, 0.0, 13, 0), {
+        "valor_basica": 11_160, "valor_outro": 95, "contribuicao_mensal_total": 11_255,
+        "total_contribuicao_anual": 146_315, "salario_anual": 7_811_664, "valor_ideal_esporadica": 791_085,
+        "irpf_sem_deducao": 1_062_830, "irpf_com_deducao": 1_022_593,
+    }),
+    # Sem contribuições no ano, só a esporádica mínima
+    ((1_000_000, 10.0, 5.0, 0, 238_704), {
+        "contribuicao_mensal_total": 114_302, "total_contribuicao_anual": 0, "valor_ideal_esporadica": 1_680_000,
+        "total_final": 238_704, "deducao_irpf": 238_704, "irpf_com_deducao": 2_698_978, "economia_irpf": 65_644,
+    }),
+    # Meio centavo: 2% de 1.234,25 = 24,685 -> 24,69 e 3% = 37,0275 -> 37,03; isento de IRPF
+    ((123_425, 4.5, 3.0, 13, 0), {
+        "valor_basica": 2_469, "valor_outro": 0, "contribuicao_voluntaria_valor": 3_703,
+        "contribuicao_mensal_total": 6_172, "total_contribuicao_anual": 80_236, "salario_anual": 1_727_950,
+        "valor_ideal_esporadica": 127_118, "irpf_sem_deducao": 0, "economia_irpf": 0,
+    }),
+]
+
+
+@pytest.mark.parametrize("entradas, esperado", CASOS_2025)
+def test_casos_calculados_a_mao(entradas, esperado):
+    parametros = parametros_do_ano(2025)
+    salario, parcela_b, voluntaria, quantidade, esporadica = entradas
+    em_centavos = calcular_simulacao_centavos(salario, parcela_b, voluntaria, quantidade,
+                                              valor_esporadica_centavos=esporadica, parametros=parametros)
+    assert {campo: int(em_centavos[campo]) for campo in esperado} == esperado
+    assert float(em_centavos["percentual_recolhido"]) == pytest.approx(
+        em_centavos["total_contribuicao_anual"] / em_centavos["salario_anual"])
+
+    # O caminho em float (sem o arredondamento mensal) fica dentro da tolerância de cada valor
+    em_float = calcular_simulacao(salario / 100, parcela_b, voluntaria, quantidade,
+                                  valor_esporadica=esporadica / 100, parametros=parametros)
+    for campo, valor in esperado.items():
+        assert abs(int(para_centavos(em_float[campo])) - valor) <= tolerancia(campo), campo
+
+
+@pytest.mark.parametrize("valor", [np.nan, np.inf, -np.inf, 1e17])
+def test_para_centavos_rejeita_valores_sem_representacao(valor):
+    with pytest.raises(ValueError):
+        para_centavos(np.array([1.0, valor]))
+
+
+def test_lote_com_celulas_vazias_sai_zerado():
+    entrada = pd.read_csv(io.StringIO(
+        "matricula,salario_mensal,parcela_b_pct,voluntaria_pct,contribuicoes_no_ano,esporadica\n"
+        "1,,10,0,13,\n"
+        "2,10000,,,,\n"
+        "3,0,10,0,13,0\n"
+        "4,10000,0,0,0,0\n"
+    ))
+    resumo = processar_lote(entrada).drop(columns="Matrícula")
+    assert (resumo.iloc[0] == resumo.iloc[2]).all()  # Salário vazio = salário zero
+    assert (resumo.iloc[1] == resumo.iloc[3]).all()  # Percentuais e contribuições vazios = zero
+    assert resumo["Salário Mensal"].iloc[0] == "R$ 0,00"
+    assert resumo["Contribuições no Ano"].iloc[1] == "0"
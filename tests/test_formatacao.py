@@ -0,0 +1,20 @@
+"""As versões vetorizadas de formatacao produzem o mesmo texto que as escalares."""
+import numpy as np
+import pytest
+
+from formatacao import formatar_numero, formatar_numero_vetor, formatar_reais, formatar_reais_vetor
+
+# Empates em x,5, negativos que arredondam para zero, NaN, infinitos e valores fora do int64
+VALORES = [0.0, 0.005, 1.005, 2.675, -0.004, 999.995, 1234.565, -1234.56, 1e15, np.nan,
+           np.inf, -np.inf, 9.3e16, -1e17, 1e300]
+
+
+@pytest.mark.parametrize("valores", [VALORES, np.random.default_rng(3).uniform(-1e7, 1e7, 2000)])
+def test_reais_vetor_igual_ao_escalar(valores):
+    assert formatar_reais_vetor(valores).tolist() == [formatar_reais(valor) for valor in valores]
+
+
+@pytest.mark.parametrize("casas_decimais", [0, 1, 2])
+def test_numero_vetor_igual_ao_escalar(casas_decimais):
+    esperado = [formatar_numero(valor, casas_decimais) for valor in VALORES]
+    assert formatar_numero_vetor(VALORES, casas_decimais).tolist() == esperado
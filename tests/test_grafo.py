@@ -0,0 +1,103 @@
+"""Recálculo incremental dos nós da página (grafo.GrafoIncremental e sem_dependentes_de)."""
+from collections import Counter
+
+import pytest
+
+from grafo import GrafoIncremental, sem_dependentes_de
+from motor import NOS_SIMULACAO
+from parametros import parametros_do_ano
+
+ENTRADAS = {
+    "salario_mensal": 10_000.0,
+    "contribuicao_basica_outro_pct": 10.0,
+    "contribuicao_voluntaria_pct": 0.0,
+    "quantidade_contribuicoes": 13,
+    "valor_esporadica": 5_000.0,
+}
+ESPORADICA = {"total_final", "novo_percentual", "progresso"}  # Os nós que dependem de valor_esporadica
+
+
+def _contando(nos):
+    """Os mesmos nós, com as fórmulas contando quantas vezes cada nó foi calculado"""
+    calculos = Counter()
+
+    def contar(nome, formula):
+        def calcular(*valores):
+            calculos[nome] += 1
+            return formula(*valores)
+        return calcular
+
+    return {nome: (dependencias, contar(nome, formula)) for nome, (dependencias, formula) in nos.items()}, calculos
+
+
+@pytest.fixture
+def grafo():
+    nos, calculos = _contando(NOS_SIMULACAO)
+    grafo = GrafoIncremental({}, nos=nos)
+    grafo.definir("parametros", parametros_do_ano())
+    for nome, valor in ENTRADAS.items():
+        grafo.definir(nome, valor)
+    for nome in nos:
+        grafo.valor(nome)
+    calculos.clear()
+    return grafo, calculos
+
+
+def test_recalcula_so_os_dependentes_da_entrada(grafo):
+    grafo, calculos = grafo
+    grafo.definir("contribuicao_voluntaria_pct", 5.0)
+    for nome in grafo.nos:
+        grafo.valor(nome)
+    assert set(calculos) == {"contribuicao_voluntaria_valor", "contribuicao_mensal_total",
+                             "total_contribuicao_anual", "percentual_recolhido", "valor_ideal_esporadica",
+                             *ESPORADICA}
+    assert max(calculos.values()) == 1
+
+
+def test_entrada_com_o_mesmo_valor_nao_recalcula(grafo):
+    grafo, calculos = grafo
+    versao = grafo.versao("total_final")
+    grafo.definir("salario_mensal", 10_000.0)
+    assert grafo.versao("total_final") == versao
+    assert not calculos
+
+
+def test_no_recalculado_com_o_mesmo_valor_nao_propaga(grafo):
+    grafo, calculos = grafo
+    grafo.definir("salario_mensal", 3_000.0)  # Abaixo do total das UR: Parcela B zerada
+    grafo.valor("total_final")
+    calculos.clear()
+    grafo.definir("contribuicao_basica_outro_pct", 7.5)
+    assert grafo.valor("total_final") == 3_000.0 * 0.02 * 13 + 5_000.0
+    assert set(calculos) == {"valor_outro"}
+
+
+def test_nos_da_esporadica_fora_do_grafo_da_pagina():
+    nos = sem_dependentes_de("valor_esporadica")
+    assert ESPORADICA.isdisjoint(nos) and set(nos) == set(NOS_SIMULACAO) - ESPORADICA
+    assert list(nos) == [nome for nome in NOS_SIMULACAO if nome in nos]  # Mesma ordem topológica
+
+    # Na página, os valores da esporádica vêm do resultado em cache e entram como entradas
+    nos, calculos = _contando(nos)
+    grafo = GrafoIncremental({}, nos=nos)
+    grafo.definir("parametros", parametros_do_ano())
+    for nome, valor in ENTRADAS.items():
+        grafo.definir(nome, valor)
+    grafo.definir("total_final", 20_000.0)
+    montagens = []
+
+    def montar(total):
+        montagens.append(total)
+        return f"<div>{total}</div>"
+
+    grafo.html("card_total", ("total_final",), montar)
+    versao = grafo.versao("total_final")
+
+    # Mexer em um nó antes da esporádica recalcula esse nó, mas não invalida os valores da esporádica
+    grafo.definir("contribuicao_voluntaria_pct", 5.0)
+    for nome in nos:
+        grafo.valor(nome)
+    assert calculos and ESPORADICA.isdisjoint(calculos)
+    assert grafo.versao("total_final") == versao
+    assert grafo.html("card_total", ("total_final",), montar) == "<div>20000.0</div>"
+    assert montagens == [20_000.0]
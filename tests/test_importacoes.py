@@ -0,0 +1,16 @@
+"""Dependências pesadas que a página só carrega quando o usuário pede uma exportação."""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+CARREGADOS_SOB_DEMANDA = ["recibo", "fpdf", "requests", "openpyxl", "sqlalchemy"]
+
+
+def test_importar_a_pagina_nao_carrega_exportacoes_nem_historico():
+    # Processo novo: outros testes já importaram alguns destes módulos neste processo
+    codigo = (f"import json, sys, simulador; "
+              f"print(json.dumps([m for m in {CARREGADOS_SOB_DEMANDA!r} if m in sys.modules]))")
+    processo = subprocess.run([sys.executable, "-c", codigo], cwd=Path(__file__).resolve().parent.parent,
+                              capture_output=True, text=True, check=True)
+    assert json.loads(processo.stdout.strip().splitlines()[-1]) == []
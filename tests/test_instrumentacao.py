@@ -0,0 +1,58 @@
+"""Publicação do arquivo de métricas e medição dos fragmentos (instrumentacao)."""
+import os
+
+import pytest
+
+import instrumentacao
+
+
+@pytest.fixture
+def ativa(monkeypatch, tmp_path):
+    """Instrumentação ligada, publicando em tmp_path, com histogramas limpos"""
+    monkeypatch.setattr(instrumentacao, "ATIVO", True)
+    monkeypatch.setattr(instrumentacao, "CAMINHO_METRICAS", str(tmp_path / "metricas.prom"))
+    monkeypatch.setattr(instrumentacao, "_ultima_publicacao", 0.0)
+    monkeypatch.setattr(instrumentacao, "_histogramas", {})
+    return tmp_path
+
+
+def test_publicar_substitui_o_arquivo(ativa):
+    instrumentacao._publicar()
+    assert os.listdir(ativa) == ["metricas.prom"]
+
+
+def test_publicar_remove_o_temporario_se_a_substituicao_falha(ativa, monkeypatch):
+    def falhar(origem, destino):
+        raise PermissionError(destino)
+
+    monkeypatch.setattr(instrumentacao.os, "replace", falhar)
+    instrumentacao._publicar()
+    assert os.listdir(ativa) == []
+
+
+def test_fragmento_sozinho_e_medido_como_rerun(ativa, monkeypatch):
+    monkeypatch.setattr(instrumentacao, "_so_fragmentos", lambda: True)
+
+    @instrumentacao.medir_fragmento
+    def secao():
+        with instrumentacao.etapa("grafico"):
+            return 42
+
+    assert secao() == 42
+    assert {"grafico", "total_secao"} <= set(instrumentacao._histogramas)
+    assert "total" not in instrumentacao._histogramas
+
+
+def test_fragmento_no_rerun_da_pagina_soma_no_rerun(ativa, monkeypatch):
+    monkeypatch.setattr(instrumentacao, "_so_fragmentos", lambda: False)
+
+    @instrumentacao.medir_fragmento
+    def secao():
+        with instrumentacao.etapa("grafico"):
+            pass
+
+    instrumentacao.iniciar_rerun()
+    secao()
+    assert instrumentacao._histogramas == {}  # Nada registrado antes do fim do rerun da página
+    instrumentacao.finalizar_rerun()
+    assert set(instrumentacao._histogramas) == {"grafico", "total"}
@@ -0,0 +1,62 @@
+"""Combinação de menor custo (motor.otimizar_limite_centavos), conferida com a busca exaustiva."""
+import numpy as np
+
+from motor import (
+    PARCELA_B_MAXIMA, PARCELA_B_MINIMA, PASSO_PARCELA_B, PASSO_VOLUNTARIA, VOLUNTARIA_MAXIMA,
+    calcular_simulacao_centavos, otimizar_limite_centavos, para_centavos,
+)
+from parametros import parametros_do_ano
+
+PARCELAS_B = np.arange(PARCELA_B_MINIMA, PARCELA_B_MAXIMA + PASSO_PARCELA_B / 2, PASSO_PARCELA_B)
+VOLUNTARIAS = np.arange(0.0, VOLUNTARIA_MAXIMA + PASSO_VOLUNTARIA / 2, PASSO_VOLUNTARIA)
+
+
+def exaustiva(salario, quantidade, parametros):
+    """Todas as combinações; esporádica = o que falta, respeitando mínimo e máximo"""
+    parcela_b, voluntaria = (grade.ravel() for grade in np.meshgrid(PARCELAS_B, VOLUNTARIAS, indexing="ij"))
+    grade = calcular_simulacao_centavos(salario[:, None], parcela_b, voluntaria, quantidade[:, None],
+                                        incluir_esporadica=False, parametros=parametros)
+    anual = grade["total_contribuicao_anual"]
+    falta = grade["valor_ideal_esporadica"]
+    minimo, maximo = grade["valor_minimo_esporadica"], grade["valor_maximo_esporadica"]
+    esporadica = np.where(falta > 0, np.maximum(falta, minimo), 0)
+    possivel = (falta <= 0) | ((minimo <= maximo) & (falta <= maximo))
+    custo = np.where(possivel, anual + esporadica, np.iinfo(np.int64).max)
+    # Ordem de preferência: custo, esporádica, voluntária, Parcela B
+    ordem = np.lexsort((np.broadcast_to(parcela_b, custo.shape), np.broadcast_to(voluntaria, custo.shape),
+                        esporadica, custo), axis=-1)[:, 0]
+    linhas = np.arange(len(salario))
+    alcancavel = possivel.any(axis=-1)
+    return {
+        "contribuicao_basica_outro_pct": np.where(alcancavel, parcela_b[ordem], PARCELA_B_MAXIMA),
+        "contribuicao_voluntaria_pct": np.where(alcancavel, voluntaria[ordem], VOLUNTARIA_MAXIMA),
+        "valor_esporadica": np.where(alcancavel, esporadica[linhas, ordem],
+                                     np.where(minimo[:, 0] <= maximo[:, 0], maximo[:, 0], 0)),
+        "atinge_limite": alcancavel,
+    }
+
+
+def test_solucao_fechada_igual_a_busca_exaustiva():
+    parametros = parametros_do_ano()
+    total_ur = int(para_centavos(parametros.total_ur))
+    gerador = np.random.default_rng(7)
+    salario = np.concatenate([
+        [0, 1, total_ur - 1, total_ur, total_ur + 1],
+        gerador.integers(10_000, total_ur, 100),  # Abaixo do total das UR
+        gerador.integers(total_ur, 3_000_000, 100),
+        gerador.integers(3_000_000, 20_000_000, 100),
+    ])
+    quantidade = np.concatenate([[0, 13, 0, 1, 12], gerador.integers(0, 14, len(salario) - 5)])
+    quantidade[5::10] = 0  # Sem contribuições no ano em todas as faixas
+
+    # A amostra cobre os casos de borda da regra da esporádica
+    base = calcular_simulacao_centavos(salario, PARCELA_B_MINIMA, 0.0, quantidade,
+                                       incluir_esporadica=False, parametros=parametros)
+    assert (base["valor_minimo_esporadica"] > base["valor_maximo_esporadica"]).any()
+    assert (salario < total_ur).any() and (quantidade == 0).any()
+
+    otimo = otimizar_limite_centavos(salario, quantidade, parametros=parametros)
+    esperado = exaustiva(salario, quantidade, parametros)
+    assert otimo["atinge_limite"].any() and not otimo["atinge_limite"].all()
+    for coluna, valores in esperado.items():
+        np.testing.assert_array_equal(otimo[coluna], valores, err_msg=coluna)
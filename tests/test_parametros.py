@@ -0,0 +1,85 @@
+"""Leitura e validação de parametros_plano.json (parametros.carregar_tabela e parametros_do_ano)."""
+import copy
+import json
+
+import pytest
+
+from parametros import CAMINHO_PARAMETROS, VERSAO_FORMATO, ErroParametros, carregar_tabela, parametros_do_ano
+
+with open(CAMINHO_PARAMETROS, encoding="utf-8") as _arquivo:
+    TABELA = json.load(_arquivo)
+ANO = next(iter(TABELA["anos"]))
+
+
+def _carregar(tmp_path, conteudo):
+    caminho = tmp_path / "parametros.json"
+    caminho.write_text(json.dumps(conteudo), encoding="utf-8")
+    return carregar_tabela(str(caminho))  # Caminho novo a cada teste: não reaproveita o lru_cache
+
+
+def _com_ano(alterar):
+    conteudo = copy.deepcopy(TABELA)
+    alterar(conteudo["anos"][ANO])
+    return conteudo
+
+
+def test_arquivo_do_repositorio_e_valido():
+    assert parametros_do_ano().ano == max(int(ano) for ano in TABELA["anos"])
+    assert parametros_do_ano(int(ANO)) is parametros_do_ano(ANO)
+
+
+def test_ano_sem_parametros():
+    with pytest.raises(ErroParametros, match="Sem parâmetros do plano para 1999"):
+        parametros_do_ano(1999)
+
+
+@pytest.mark.parametrize("versao", [None, VERSAO_FORMATO - 1, VERSAO_FORMATO + 1, str(VERSAO_FORMATO)])
+def test_versao_do_formato_diferente(tmp_path, versao):
+    with pytest.raises(ErroParametros, match="versão do formato não suportada"):
+        _carregar(tmp_path, {**TABELA, "versao": versao})
+
+
+@pytest.mark.parametrize("anos, mensagem", [({}, "nenhum ano definido"), ({"2025a": {}}, "ano inválido")])
+def test_anos_ausentes_ou_invalidos(tmp_path, anos, mensagem):
+    with pytest.raises(ErroParametros, match=mensagem):
+        _carregar(tmp_path, {**TABELA, "anos": anos})
+
+
+def test_arquivo_ilegivel(tmp_path):
+    caminho = tmp_path / "parametros.json"
+    caminho.write_text("{versao: 2", encoding="utf-8")
+    with pytest.raises(ErroParametros, match="Não foi possível ler"):
+        carregar_tabela(str(caminho))
+
+
+@pytest.mark.parametrize("alterar, mensagem", [
+    (lambda ano: ano.pop("valor_ur"), r"campos ausentes \['valor_ur'\]"),
+    (lambda ano: ano.update(teto=1), r"desconhecidos \['teto'\]"),
+    (lambda ano: ano.update(quantidade_ur=7.5), "quantidade_ur inválido"),
+    (lambda ano: ano.update(percentual_maximo=True), "percentual_maximo inválido"),
+    (lambda ano: ano.update(percentual_maximo=1.2), "percentual_maximo fora do intervalo"),
+    (lambda ano: ano.update(prazo="31/12/2025"), "prazo inválido"),
+    (lambda ano: ano.update(prazo="2019-12-31"), "fora do ano"),
+])
+def test_campos_ausentes_ou_invalidos(tmp_path, alterar, mensagem):
+    with pytest.raises(ErroParametros, match=mensagem):
+        _carregar(tmp_path, _com_ano(alterar))
+
+
+def _trocar_faixas(i, j):
+    def alterar(ano):
+        faixas = ano["faixas_irpf"]
+        faixas[i], faixas[j] = faixas[j], faixas[i]
+    return alterar
+
+
+@pytest.mark.parametrize("alterar", [
+    _trocar_faixas(1, 2),  # Limites e alíquotas fora de ordem
+    _trocar_faixas(-2, -1),  # A faixa sem limite deixa de ser a última
+    lambda ano: ano["faixas_irpf"][1].update(deducao=ano["faixas_irpf"][1]["deducao"] + 10),  # Imposto descontínuo
+    lambda ano: ano["faixas_irpf"][1].pop("deducao"),
+    lambda ano: ano.update(faixas_irpf=[]),
+])
+def test_faixas_do_irpf_invalidas(tmp_path, alterar):
+    with pytest.raises(ErroParametros, match="faixas_irpf"):
+        _carregar(tmp_path, _com_ano(alterar))
@@ -0,0 +1,31 @@
+"""Planilhas gravadas por planilha_excel.EscritorExcel abrem no openpyxl."""
+import openpyxl
+import pandas as pd
+
+from planilha_excel import EscritorExcel
+
+
+def test_remove_caracteres_invalidos_em_xml(tmp_path):
+    caminho = tmp_path / "resumo.xlsx"
+    escritor = EscritorExcel(caminho)
+    df = pd.DataFrame({"Matrícula\x02": ["a\x01b", "R&D <x>", "￾ok", "linha\ttab"], "Valor": [1.5, 2, 3, 4]})
+    escritor.escrever(df, aba="Dep\x0bto")
+    escritor.fechar()
+
+    planilha = openpyxl.load_workbook(caminho)
+    aba = planilha["Depto"]
+    assert [celula.value for celula in aba["A"]] == ["Matrícula", "ab", "R&D <x>", "ok", "linha\ttab"]
+    assert [celula.value for celula in aba["B"]][1:] == [1.5, 2, 3, 4]
+
+
+def test_celulas_numericas_com_formato(tmp_path):
+    caminho = tmp_path / "resumo.xlsx"
+    escritor = EscritorExcel(caminho)
+    df = pd.DataFrame({"Nome": ["a", "b"], "Valor": [1234.56, float("nan")], "Taxa": [0.125, 0.5], "Qtd": [1, 2]})
+    escritor.escrever(df, formatos={"Valor": '"R$" #,##0.00', "Taxa": "0.0%"})
+    escritor.fechar()
+
+    aba = openpyxl.load_workbook(caminho)["Resumo"]
+    assert [(c.value, c.number_format) for c in aba[2]] == [
+        ("a", "General"), (1234.56, '"R$" #,##0.00'), (0.125, "0.0%"), (1, "General")]
+    assert aba["B3"].value is None
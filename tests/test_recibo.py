@@ -0,0 +1,125 @@
+"""Recibo em PDF (recibo.gerar_pdf_recibo)."""
+import re
+import struct
+import threading
+import time
+import zlib
+
+import pytest
+
+import recibo
+
+VALORES = (None, 10000.0, 140000.0, 1000.0, 13000.0, 5000.0, 18000.0)
+
+
+def textos(pdf):
+    """Textos escritos (operador Tj) nas páginas do PDF gerado pelo FPDF"""
+    conteudo = pdf.getvalue() if hasattr(pdf, "getvalue") else pdf
+    textos = []
+    for fluxo in re.findall(rb"stream\r?\n(.*?)\r?\nendstream", conteudo, re.S):
+        try:
+            fluxo = zlib.decompress(fluxo)
+        except zlib.error:
+            pass
+        textos += [texto.decode("latin-1") for texto in re.findall(rb"\((.*?)\) ?Tj", fluxo, re.S)]
+    return textos
+
+
+def textos_da_pagina(pagina):
+    """Textos escritos em uma página ainda não gerada (FPDF.pages)"""
+    return [texto.decode("latin-1") for texto in re.findall(rb"\((.*?)\) ?Tj", pagina.encode("latin-1"), re.S)]
+
+
+def fluxos(pdf):
+    """Fluxos (páginas, fontes, imagens) do PDF, descomprimidos quando possível"""
+    resultado = []
+    for fluxo in re.findall(rb"stream\r?\n(.*?)\r?\nendstream", pdf.getvalue(), re.S):
+        try:
+            fluxo = zlib.decompress(fluxo)
+        except zlib.error:
+            pass
+        resultado.append(fluxo)
+    return resultado
+
+
+def _png(largura=4, altura=2):
+    """PNG RGB mínimo, para o recibo ter logo sem depender do arquivo ou da rede"""
+    def bloco(tipo, dados):
+        return struct.pack(">I", len(dados)) + tipo + dados + struct.pack(">I", zlib.crc32(tipo + dados))
+
+    linhas = b"".join(b"\x00" + bytes([139, 4, 59]) * largura for _ in range(altura))
+    return (b"\x89PNG\r\n\x1a\n" + bloco(b"IHDR", struct.pack(">IIBBBBB", largura, altura, 8, 2, 0, 0, 0))
+            + bloco(b"IDAT", zlib.compress(linhas)) + bloco(b"IEND", b""))
+
+
+@pytest.fixture
+def com_logo(monkeypatch):
+    logo = recibo._decodificar_png(_png())
+    monkeypatch.setattr(recibo, "obter_logo", lambda: logo)
+    monkeypatch.setattr(recibo, "_cache_modelo", {"logo": None, "modelo": None})
+
+
+def _renderizar_do_zero(valores, data):
+    """O mesmo recibo desenhado em um FPDF novo, sem o modelo em cache e sem cópia"""
+    modelo = recibo._montar_modelo(recibo.obter_logo())
+    copiar, obter = recibo._copiar_modelo, recibo._obter_modelo
+    recibo._copiar_modelo, recibo._obter_modelo = (lambda pdf: pdf), (lambda: modelo)
+    try:
+        return recibo.gerar_pdf_recibo(*valores, data_simulacao=data)
+    finally:
+        recibo._copiar_modelo, recibo._obter_modelo = copiar, obter
+
+
+OUTROS_VALORES = (None, 3210.5, 44947.0, 210.99, 2743.87, 0.0, 2743.87)
+
+
+def test_copia_do_modelo_igual_ao_recibo_desenhado_do_zero(com_logo):
+    for valores, data in ((VALORES, "01/02/2025 09:30"), (OUTROS_VALORES, "15/12/2025 18:05")):
+        copia = recibo.gerar_pdf_recibo(*valores, data_simulacao=data)
+        assert fluxos(copia) == fluxos(_renderizar_do_zero(valores, data))
+
+
+def test_copias_nao_compartilham_estado(com_logo):
+    primeiro = recibo.gerar_pdf_recibo(*VALORES, data_simulacao="01/02/2025 09:30")
+    modelo = recibo._obter_modelo()[0]
+    paginas, fontes, imagens = dict(modelo.pages), repr(modelo.fonts), repr(modelo.images)
+
+    segundo = recibo.gerar_pdf_recibo(*OUTROS_VALORES, data_simulacao="15/12/2025 18:05")
+    terceiro = recibo.gerar_pdf_recibo(*VALORES, data_simulacao="01/02/2025 09:30")
+
+    assert "R$ 3.210,50" in textos(segundo) and "R$ 10.000,00" not in textos(segundo)
+    assert "Data da simulacao: 15/12/2025 18:05" in textos(segundo)
+    assert fluxos(terceiro) == fluxos(primeiro)
+    # O modelo continua como foi desenhado, sem os valores dos recibos
+    assert (dict(modelo.pages), repr(modelo.fonts), repr(modelo.images)) == (paginas, fontes, imagens)
+    assert not any("R$" in texto for texto in textos_da_pagina(modelo.pages[1]))
+
+
+def test_data_impressa_e_a_informada():
+    pdf = recibo.gerar_pdf_recibo(*VALORES, data_simulacao="01/02/2025 09:30")
+    assert "Data da simulacao: 01/02/2025 09:30" in textos(pdf)
+
+
+def test_falha_na_recarga_mantem_o_logo_anterior(monkeypatch):
+    monkeypatch.setattr(recibo, "_cache_logo", {"imagem": None, "expira_em": 0.0})
+    monkeypatch.setattr(recibo, "_decodificar_png", lambda conteudo: {"png": conteudo})
+    monkeypatch.setattr(recibo, "_carregar_logo", lambda: (b"logo", recibo.TTL_LOGO))
+    assert recibo.obter_logo() == {"png": b"logo"}
+
+    # Vencido e offline: a recarga roda em segundo plano e o recibo não a espera
+    liberar = threading.Event()
+
+    def download_offline():
+        liberar.wait(5)
+        raise OSError("sem rede")
+
+    monkeypatch.setattr(recibo, "_carregar_logo", download_offline)
+    recibo._cache_logo["expira_em"] = time.monotonic() - 1
+    assert recibo.obter_logo() == {"png": b"logo"}
+    recarga = next(t for t in threading.enumerate() if t.name == "recarga-logo")
+    liberar.set()
+    recarga.join(5)
+
+    assert recibo.obter_logo() == {"png": b"logo"}
+    restante = recibo._cache_logo["expira_em"] - time.monotonic()
+    assert recibo.TTL_LOGO_FALHA - 5 < restante <= recibo.TTL_LOGO_FALHA
@@ -0,0 +1,119 @@
+"""Leitura da folha no processamento em lote (simulador_lote)."""
+import signal
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+
+from simulador_lote import gerar_recibos_arquivo, ler_em_lotes, processar_lote, simular_arquivo
+
+CABECALHO = "Matrícula,Salário Mensal,Parcela B,Voluntária,Contribuições no Ano\n"
+
+
+def _folha(tmp_path, linhas):
+    caminho = tmp_path / "folha.csv"
+    caminho.write_text(CABECALHO + "".join(f"{linha}\n" for linha in linhas), encoding="utf-8")
+    return caminho
+
+
+@pytest.mark.parametrize("saida", ["resumo.csv", "resumo.parquet"])
+def test_matricula_mantem_zeros_a_esquerda_em_todos_os_lotes(tmp_path, saida):
+    # Lotes de 2 linhas: um só com matrículas numéricas, outro com texto
+    entrada = _folha(tmp_path, ["00123,5000,10,0,13", "456,6000,10,0,13", "A-7,7000,10,0,13"])
+    simular_arquivo(entrada, tmp_path / saida, tamanho_lote=2, processos=1)
+    if saida.endswith(".csv"):
+        matriculas = pd.read_csv(tmp_path / saida, dtype=str)["Matrícula"].tolist()
+    else:
+        matriculas = pq.read_table(tmp_path / saida)["matricula"].to_pylist()
+    assert matriculas == ["00123", "456", "A-7"]
+
+
+def test_matricula_vazia_e_rejeitada(tmp_path):
+    entrada = _folha(tmp_path, ["123,5000,10,0,13", ",6000,10,0,13"])
+    with pytest.raises(ValueError, match="Matrícula vazia em 1 linha"):
+        simular_arquivo(entrada, tmp_path / "resumo.csv", tamanho_lote=10, processos=1)
+
+
+def test_contribuicoes_fracionarias_sao_rejeitadas(tmp_path):
+    entrada = _folha(tmp_path, ["1,5000,10,0,12.0", "2,6000,10,0,12.7"])
+    lote = next(ler_em_lotes(entrada, 10))
+    with pytest.raises(ValueError, match="número inteiro: 12.7"):
+        processar_lote(lote)
+    resumo = processar_lote(lote.iloc[:1])
+    assert resumo["Contribuições no Ano"].tolist() == ["12"]
+
+
+def test_resumo_xlsx_em_celulas_numericas(tmp_path):
+    entrada = _folha(tmp_path, ["00123,5000,10,2,13", "456,6000.5,7.5,0,12"])
+    simular_arquivo(entrada, tmp_path / "resumo.xlsx", tamanho_lote=1, processos=1)
+
+    aba = openpyxl.load_workbook(tmp_path / "resumo.xlsx")["Resumo"]
+    colunas = {celula.value: celula.column for celula in aba[1]}
+    linha = {nome: aba.cell(row=3, column=coluna) for nome, coluna in colunas.items()}
+    assert linha["Matrícula"].value == "456"
+    assert (linha["Salário Mensal"].value, linha["Salário Mensal"].number_format) == (6000.5, '"R$" #,##0.00')
+    assert (linha["Contribuição Básica B (%)"].value, linha["Contribuição Básica B (%)"].number_format) == (0.075, "0.0%")
+    assert (linha["Contribuições no Ano"].value, linha["Contribuições no Ano"].number_format) == (12, "0")
+    assert all(isinstance(aba.cell(row=2, column=coluna).value, (int, float))
+               for nome, coluna in colunas.items() if nome != "Matrícula")
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_entrada_colunar_em_fatias_igual_ao_csv(tmp_path, formato):
+    # 7 linhas em grupos de 5 (row groups ou record batches) e lotes de 3: fatias
+    # que não coincidem com os grupos, lidas pelos próprios processos
+    linhas = [f"{i:05d},{5000 + 750 * i},{4.5 + i % 4},{i % 3},{12 + i % 2}" for i in range(7)]
+    entrada_csv = _folha(tmp_path, linhas)
+    tabela = pa.Table.from_pandas(pd.read_csv(entrada_csv, dtype={"Matrícula": str}), preserve_index=False)
+    entrada = tmp_path / f"folha.{formato}"
+    if formato == "parquet":
+        pq.write_table(tabela, entrada, row_group_size=5)
+    else:
+        feather.write_feather(tabela, entrada, compression="uncompressed", chunksize=5)
+
+    assert simular_arquivo(entrada_csv, tmp_path / "csv.parquet", tamanho_lote=3, processos=1) == 7
+    assert simular_arquivo(entrada, tmp_path / "colunar.parquet", tamanho_lote=3, processos=2) == 7
+    assert pq.read_table(tmp_path / "colunar.parquet").equals(pq.read_table(tmp_path / "csv.parquet"))
+    assert simular_arquivo(entrada, tmp_path / "resumo.csv", tamanho_lote=3, processos=1) == 7
+    assert pd.read_csv(tmp_path / "resumo.csv", dtype=str)["Matrícula"].tolist() == [f"{i:05d}" for i in range(7)]
+
+
+def _interromper(gerados, pulados):
+    raise KeyboardInterrupt
+
+
+def test_recibos_retomados_apos_interrupcao(tmp_path):
+    # Matrículas repetidas: cada linha da entrada ainda tem o seu recibo
+    entrada = _folha(tmp_path, [f"{i % 3},{5000 + i},10,0,13" for i in range(7)])
+    destino = tmp_path / "recibos.zip"
+
+    # Ctrl+C após o primeiro lote: o ZIP é fechado com o que já foi gerado
+    with pytest.raises(KeyboardInterrupt):
+        gerar_recibos_arquivo(entrada, destino, tamanho_lote=2, processos=1, ao_progredir=_interromper)
+    assert sorted(zipfile.ZipFile(destino).namelist()) == ["recibo_0_1.pdf", "recibo_1_2.pdf"]
+
+    # Processo (e os seus processos de trabalho) morto com SIGKILL após o primeiro lote
+    # novo, sem fechar o ZIP: o destino continua o da execução anterior
+    codigo = (f"import os, signal; from simulador_lote import gerar_recibos_arquivo; "
+              f"gerar_recibos_arquivo({str(entrada)!r}, {str(destino)!r}, tamanho_lote=2, processos=1, "
+              f"ao_progredir=lambda gerados, pulados: os.killpg(0, signal.SIGKILL))")
+    morto = subprocess.run([sys.executable, "-c", codigo], cwd=Path(__file__).resolve().parent.parent,
+                           start_new_session=True)
+    assert morto.returncode == -signal.SIGKILL
+    assert sorted(zipfile.ZipFile(destino).namelist()) == ["recibo_0_1.pdf", "recibo_1_2.pdf"]
+
+    progresso = []
+    assert gerar_recibos_arquivo(entrada, destino, tamanho_lote=2, processos=1,
+                                 ao_progredir=lambda *andamento: progresso.append(andamento)) == 5
+    assert progresso[-1] == (5, 2)
+    with zipfile.ZipFile(destino) as recibos:
+        assert recibos.testzip() is None
+        assert sorted(recibos.namelist()) == sorted(f"recibo_{i % 3}_{i + 1}.pdf" for i in range(7))
+    assert not Path(f"{destino}.tmp").exists()